@@ -11,6 +11,11 @@ from app.db.session import Base
 from app.models.user import User
 from app.models.message import Message
 from app.models.backup import Backup
+from app.models.sync_state import SyncState
+from app.models.job import Job
+from app.models.contact_summary import ContactSummary
+from app.models.user_stats import UserStats
+from app.models.export_artifact import ExportArtifact
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -0,0 +1,43 @@
+"""add_export_artifacts
+
+Revision ID: 0c8d5f27b3e1
+Revises: f47b2e8d1a36
+Create Date: 2026-10-18 15:12:48.903126
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '0c8d5f27b3e1'
+down_revision: Union[str, None] = 'f47b2e8d1a36'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Cached export files (the app's create_all may already have created the table)
+    if not sa.inspect(op.get_bind()).has_table('export_artifacts'):
+        op.create_table(
+            'export_artifacts',
+            sa.Column('id', postgresql.UUID(as_uuid=True), primary_key=True),
+            sa.Column('user_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('users.id', ondelete='CASCADE'), nullable=False),
+            sa.Column('contact_phone', sa.String(), nullable=True),
+            sa.Column('format', sa.String(), nullable=False),
+            sa.Column('range_start', sa.DateTime(), nullable=True),
+            sa.Column('range_end', sa.DateTime(), nullable=True),
+            sa.Column('cache_key', sa.String(), nullable=False),
+            sa.Column('fingerprint', sa.String(), nullable=False),
+            sa.Column('storage_path', sa.String(), nullable=False),
+            sa.Column('size_bytes', sa.BigInteger(), nullable=True),
+            sa.Column('message_count', sa.Integer(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.UniqueConstraint('user_id', 'cache_key', name='uq_export_artifacts_user_cache_key'),
+        )
+
+
+def downgrade() -> None:
+    op.drop_table('export_artifacts')
@@ -0,0 +1,30 @@
+"""add_backup_checkpoints
+
+Revision ID: 3b9f2c7d41e8
+Revises: 7a2d9e4b1c53
+Create Date: 2026-10-18 09:12:04.118230
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '3b9f2c7d41e8'
+down_revision: Union[str, None] = '7a2d9e4b1c53'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Page-level checkpoint columns for resumable backups
+    op.add_column('backups', sa.Column('resume_cursor', sa.String(), nullable=True))
+    op.add_column('backups', sa.Column('committed_messages', sa.Integer(), nullable=False, server_default='0'))
+    op.add_column('backups', sa.Column('last_checkpoint_at', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('backups', 'last_checkpoint_at')
+    op.drop_column('backups', 'committed_messages')
+    op.drop_column('backups', 'resume_cursor')
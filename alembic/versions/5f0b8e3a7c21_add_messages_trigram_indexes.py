@@ -0,0 +1,36 @@
+"""add_messages_trigram_indexes
+
+Revision ID: 5f0b8e3a7c21
+Revises: d2e7a4c19b60
+Create Date: 2026-10-18 11:58:40.217694
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '5f0b8e3a7c21'
+down_revision: Union[str, None] = 'd2e7a4c19b60'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TRIGRAM_COLUMNS = ('contact_phone', 'contact_name', 'message_text')
+
+
+def upgrade() -> None:
+    # Fuzzy search mode: similarity ranking and indexed ILIKE on these columns
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    with op.get_context().autocommit_block():
+        for column in TRIGRAM_COLUMNS:
+            op.create_index(
+                f'ix_messages_{column}_trgm', 'messages', [column],
+                postgresql_using='gin', postgresql_ops={column: 'gin_trgm_ops'},
+                postgresql_concurrently=True
+            )
+
+
+def downgrade() -> None:
+    for column in TRIGRAM_COLUMNS:
+        op.drop_index(f'ix_messages_{column}_trgm')
@@ -0,0 +1,38 @@
+"""add_sync_states
+
+Revision ID: 7a2d9e4b1c53
+Revises: 1475b4d1fcda
+Create Date: 2026-10-18 08:40:17.224519
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '7a2d9e4b1c53'
+down_revision: Union[str, None] = '1475b4d1fcda'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Per-user, per-source high-water mark for incremental backups
+    # (the app's create_all may already have created the table)
+    if not sa.inspect(op.get_bind()).has_table('sync_states'):
+        op.create_table(
+            'sync_states',
+            sa.Column('id', postgresql.UUID(as_uuid=True), primary_key=True),
+            sa.Column('user_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('users.id', ondelete='CASCADE'), nullable=False),
+            sa.Column('source', sa.String(), nullable=False),
+            sa.Column('last_message_at', sa.DateTime(), nullable=True),
+            sa.Column('last_message_id', sa.String(), nullable=True),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+            sa.UniqueConstraint('user_id', 'source', name='uq_sync_states_user_source'),
+        )
+
+
+def downgrade() -> None:
+    op.drop_table('sync_states')
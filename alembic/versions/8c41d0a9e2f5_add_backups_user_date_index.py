@@ -0,0 +1,26 @@
+"""add_backups_user_date_index
+
+Revision ID: 8c41d0a9e2f5
+Revises: 3b9f2c7d41e8
+Create Date: 2026-10-18 10:02:47.530912
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '8c41d0a9e2f5'
+down_revision: Union[str, None] = '3b9f2c7d41e8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Latest backup per user, used by the due-time scheduler
+    op.create_index('ix_backups_user_id_backup_date', 'backups', ['user_id', 'backup_date'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_backups_user_id_backup_date')
@@ -0,0 +1,27 @@
+"""drop_sync_states_paging_cursor
+
+Revision ID: 9e4b7c2a6d18
+Revises: c3f9a1e7d205
+Create Date: 2026-10-18 17:20:44.803516
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '9e4b7c2a6d18'
+down_revision: Union[str, None] = 'c3f9a1e7d205'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Written but never read; incremental fetches use last_message_at
+    # (the app's create_all may have created the column)
+    op.execute("ALTER TABLE sync_states DROP COLUMN IF EXISTS paging_cursor")
+
+
+def downgrade() -> None:
+    op.add_column('sync_states', sa.Column('paging_cursor', sa.String(), nullable=True))
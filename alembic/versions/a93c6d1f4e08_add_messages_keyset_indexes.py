@@ -0,0 +1,37 @@
+"""add_messages_keyset_indexes
+
+Revision ID: a93c6d1f4e08
+Revises: 5f0b8e3a7c21
+Create Date: 2026-10-18 12:41:09.885130
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'a93c6d1f4e08'
+down_revision: Union[str, None] = '5f0b8e3a7c21'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Cursor pagination on (timestamp, id), newest first
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_messages_user_contact_timestamp_id', 'messages',
+            ['user_id', 'contact_phone', sa.text('timestamp DESC'), sa.text('id DESC')],
+            postgresql_concurrently=True
+        )
+        op.create_index(
+            'ix_messages_user_timestamp_id', 'messages',
+            ['user_id', sa.text('timestamp DESC'), sa.text('id DESC')],
+            postgresql_concurrently=True
+        )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_messages_user_timestamp_id')
+    op.drop_index('ix_messages_user_contact_timestamp_id')
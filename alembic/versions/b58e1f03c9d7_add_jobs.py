@@ -0,0 +1,69 @@
+"""add_jobs
+
+Revision ID: b58e1f03c9d7
+Revises: 8c41d0a9e2f5
+Create Date: 2026-10-18 10:31:52.614078
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = 'b58e1f03c9d7'
+down_revision: Union[str, None] = '8c41d0a9e2f5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Older active duplicates of the same user/kind/payload, which would block the unique index
+DEDUPE_SQL = """
+UPDATE jobs SET status = 'failed', error = 'Duplicate of an active job', locked_by = NULL, finished_at = now()
+WHERE id IN (
+    SELECT id FROM (
+        SELECT id, row_number() OVER (PARTITION BY user_id, kind, payload ORDER BY created_at DESC) AS n
+        FROM jobs
+        WHERE status IN ('queued', 'running')
+    ) ranked
+    WHERE n > 1
+)
+"""
+
+
+def upgrade() -> None:
+    # Durable job queue (the app's create_all may already have created the table)
+    if not sa.inspect(op.get_bind()).has_table('jobs'):
+        op.create_table(
+            'jobs',
+            sa.Column('id', postgresql.UUID(as_uuid=True), primary_key=True),
+            sa.Column('user_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('users.id', ondelete='CASCADE'), nullable=False),
+            sa.Column('kind', sa.String(), nullable=False),
+            sa.Column('payload', postgresql.JSONB(), nullable=True),
+            sa.Column('status', sa.String(), nullable=True),
+            sa.Column('attempts', sa.Integer(), nullable=True),
+            sa.Column('max_attempts', sa.Integer(), nullable=True),
+            sa.Column('run_at', sa.DateTime(), nullable=True),
+            sa.Column('locked_by', sa.String(), nullable=True),
+            sa.Column('locked_at', sa.DateTime(), nullable=True),
+            sa.Column('progress', postgresql.JSONB(), nullable=True),
+            sa.Column('result', postgresql.JSONB(), nullable=True),
+            sa.Column('error', sa.String(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.Column('started_at', sa.DateTime(), nullable=True),
+            sa.Column('finished_at', sa.DateTime(), nullable=True),
+        )
+    else:
+        op.execute(DEDUPE_SQL)
+    
+    # Worker claim query, per-user job listing, and enqueue dedupe
+    op.execute("CREATE INDEX IF NOT EXISTS ix_jobs_status_run_at ON jobs (status, run_at)")
+    op.execute("CREATE INDEX IF NOT EXISTS ix_jobs_user_id_created_at ON jobs (user_id, created_at)")
+    op.execute(
+        "CREATE UNIQUE INDEX IF NOT EXISTS uq_jobs_active_user_kind_payload ON jobs (user_id, kind, payload) "
+        "WHERE status IN ('queued', 'running')"
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('jobs')
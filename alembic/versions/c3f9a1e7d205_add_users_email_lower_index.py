@@ -0,0 +1,30 @@
+"""add_users_email_lower_index
+
+Revision ID: c3f9a1e7d205
+Revises: 0c8d5f27b3e1
+Create Date: 2026-10-18 16:02:31.457920
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3f9a1e7d205'
+down_revision: Union[str, None] = '0c8d5f27b3e1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Case-insensitive login lookup by normalized email
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_users_email_lower', 'users', [sa.text('lower(email)')],
+            postgresql_concurrently=True
+        )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_users_email_lower')
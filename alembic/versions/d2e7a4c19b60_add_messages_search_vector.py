@@ -0,0 +1,41 @@
+"""add_messages_search_vector
+
+Revision ID: d2e7a4c19b60
+Revises: b58e1f03c9d7
+Create Date: 2026-10-18 11:20:13.402871
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = 'd2e7a4c19b60'
+down_revision: Union[str, None] = 'b58e1f03c9d7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SEARCH_VECTOR_SQL = (
+    "to_tsvector('spanish', coalesce(message_text, '')) || "
+    "to_tsvector('english', coalesce(message_text, ''))"
+)
+
+
+def upgrade() -> None:
+    # Generated full-text column (rewrites the table once) and its GIN index
+    op.add_column(
+        'messages',
+        sa.Column('search_vector', postgresql.TSVECTOR(), sa.Computed(SEARCH_VECTOR_SQL, persisted=True))
+    )
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_messages_search_vector', 'messages', ['search_vector'],
+            postgresql_using='gin', postgresql_concurrently=True
+        )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_messages_search_vector')
+    op.drop_column('messages', 'search_vector')
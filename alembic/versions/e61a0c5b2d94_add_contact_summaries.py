@@ -0,0 +1,80 @@
+"""add_contact_summaries
+
+Revision ID: e61a0c5b2d94
+Revises: a93c6d1f4e08
+Create Date: 2026-10-18 13:26:51.640312
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = 'e61a0c5b2d94'
+down_revision: Union[str, None] = 'a93c6d1f4e08'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Frozen copy of contact_summaries.REBUILD_SQL (all users) and PREVIEW_LENGTH as of
+# this revision, so later changes to the app code never alter what this migration does
+PREVIEW_LENGTH = 120
+
+BACKFILL_SQL = """
+INSERT INTO contact_summaries (
+    id, user_id, contact_phone, contact_name, message_count,
+    last_message_at, last_message_preview, updated_at
+)
+SELECT
+    gen_random_uuid(), totals.user_id, totals.contact_phone, latest.contact_name,
+    totals.message_count, latest.timestamp, left(latest.message_text, :preview_length), now()
+FROM (
+    SELECT user_id, contact_phone, count(*) AS message_count
+    FROM messages
+    WHERE contact_phone IS NOT NULL
+    GROUP BY user_id, contact_phone
+) totals
+JOIN (
+    SELECT DISTINCT ON (user_id, contact_phone)
+        user_id, contact_phone, nullif(contact_name, 'Unknown') AS contact_name, timestamp, message_text
+    FROM messages
+    WHERE contact_phone IS NOT NULL
+    ORDER BY user_id, contact_phone, timestamp DESC NULLS LAST, id DESC
+) latest USING (user_id, contact_phone)
+ON CONFLICT ON CONSTRAINT uq_contact_summaries_user_phone DO UPDATE SET
+    contact_name = coalesce(excluded.contact_name, contact_summaries.contact_name),
+    message_count = excluded.message_count,
+    last_message_at = excluded.last_message_at,
+    last_message_preview = excluded.last_message_preview,
+    updated_at = excluded.updated_at
+"""
+
+
+def upgrade() -> None:
+    # The app's create_all may already have created the (empty) table
+    if not sa.inspect(op.get_bind()).has_table('contact_summaries'):
+        op.create_table(
+            'contact_summaries',
+            sa.Column('id', postgresql.UUID(as_uuid=True), primary_key=True),
+            sa.Column('user_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('users.id', ondelete='CASCADE'), nullable=False),
+            sa.Column('contact_phone', sa.String(), nullable=False),
+            sa.Column('contact_name', sa.String(), nullable=True),
+            sa.Column('message_count', sa.Integer(), nullable=False, server_default='0'),
+            sa.Column('last_message_at', sa.DateTime(), nullable=True),
+            sa.Column('last_message_preview', sa.String(), nullable=True),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+            sa.UniqueConstraint('user_id', 'contact_phone', name='uq_contact_summaries_user_phone'),
+        )
+        op.create_index(
+            'ix_contact_summaries_user_last_message_at', 'contact_summaries',
+            ['user_id', 'last_message_at']
+        )
+    
+    # Backfill from existing messages
+    op.execute(sa.text(BACKFILL_SQL).bindparams(preview_length=PREVIEW_LENGTH))
+
+
+def downgrade() -> None:
+    op.drop_index('ix_contact_summaries_user_last_message_at')
+    op.drop_table('contact_summaries')
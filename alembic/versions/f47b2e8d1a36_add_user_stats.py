@@ -0,0 +1,38 @@
+"""add_user_stats
+
+Revision ID: f47b2e8d1a36
+Revises: e61a0c5b2d94
+Create Date: 2026-10-18 14:05:33.172458
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = 'f47b2e8d1a36'
+down_revision: Union[str, None] = 'e61a0c5b2d94'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Filled by the scheduler's stats recount (it runs once on scheduler start)
+    if not sa.inspect(op.get_bind()).has_table('user_stats'):
+        op.create_table(
+            'user_stats',
+            sa.Column('user_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True),
+            sa.Column('total_backups', sa.Integer(), nullable=False, server_default='0'),
+            sa.Column('total_messages', sa.BigInteger(), nullable=False, server_default='0'),
+            sa.Column('total_contacts', sa.Integer(), nullable=False, server_default='0'),
+            sa.Column('bytes_stored', sa.BigInteger(), nullable=False, server_default='0'),
+            sa.Column('last_backup_date', sa.DateTime(), nullable=True),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+            sa.Column('reconciled_at', sa.DateTime(), nullable=True),
+        )
+
+
+def downgrade() -> None:
+    op.drop_table('user_stats')
@@ -1,32 +1,96 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.db.session import get_db
+from app.db.session import get_db, get_async_db
 from app.models.user import User
+from app.core.metrics import metrics
+from app.core.principal import UserPrincipal, principal_cache
 from app.core.security import SECRET_KEY, ALGORITHM
+from typing import Optional
 import uuid
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
 
-def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
-) -> User:
-    credentials_exception = HTTPException(
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+def _user_id_from_token(token: str) -> uuid.UUID:
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         user_id: str = payload.get("sub")
         if user_id is None:
-            raise credentials_exception
-    except JWTError:
-        raise credentials_exception
-        
-    user = db.query(User).filter(User.id == uuid.UUID(user_id)).first()
+            raise _credentials_exception()
+        return uuid.UUID(user_id)
+    except (JWTError, ValueError):
+        raise _credentials_exception()
+
+def _cached_principal(user_id: uuid.UUID) -> Optional[UserPrincipal]:
+    principal = principal_cache.get(user_id)
+    metrics.incr("auth.principal_cache_hits" if principal else "auth.principal_cache_misses")
+    return principal
+
+def _remember(user: User) -> UserPrincipal:
+    principal = UserPrincipal.from_user(user)
+    principal_cache.set(user.id, principal)
+    return principal
+
+def get_current_principal(
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_db)
+) -> UserPrincipal:
+    """
+    The caller as a cached snapshot: no query while the entry is fresh
+    Use get_current_user instead when the endpoint changes the user or needs its credentials
+    """
+    user_id = _user_id_from_token(token)
+    principal = _cached_principal(user_id)
+    if principal:
+        return principal
+    user = db.get(User, user_id)
+    if user is None:
+        raise _credentials_exception()
+    return _remember(user)
+
+async def get_current_principal_async(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_async_db)
+) -> UserPrincipal:
+    """get_current_principal for `async def` endpoints"""
+    user_id = _user_id_from_token(token)
+    principal = _cached_principal(user_id)
+    if principal:
+        return principal
+    user = await db.get(User, user_id)
+    if user is None:
+        raise _credentials_exception()
+    return _remember(user)
+
+def get_current_user(
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_db)
+) -> User:
+    """The caller's User row, attached to the request session"""
+    user_id = _user_id_from_token(token)
+    user = db.get(User, user_id)
+    if user is None:
+        raise _credentials_exception()
+    _remember(user)
+    return user
+
+async def get_current_user_async(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_async_db)
+) -> User:
+    """get_current_user for `async def` endpoints; the user belongs to the request's AsyncSession"""
+    user_id = _user_id_from_token(token)
+    user = await db.get(User, user_id)
     if user is None:
-        raise credentials_exception
+        raise _credentials_exception()
+    _remember(user)
     return user
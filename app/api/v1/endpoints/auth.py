@@ -1,10 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
-from app.db.session import get_db
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.session import get_async_db
 from app.models.user import User
-from app.api.deps import get_current_user
-from app.core.security import verify_password, get_password_hash, create_access_token
+from app.api.deps import get_current_principal
+from app.core.principal import UserPrincipal
+from app.core.security import (
+    verify_and_update_password, verify_dummy_password, get_password_hash, create_access_token
+)
+from app.core.executors import HashingBusyError, run_password_hash
+from app.core.rate_limit import account_login_throttle, ip_login_throttle
 from pydantic import BaseModel, EmailStr
 import logging
 
@@ -23,22 +29,40 @@ class Token(BaseModel):
     access_token: str
     token_type: str
 
+async def _hash(fn, *args):
+    """Password hashing on its own bounded pool (see app/core/executors.py)"""
+    try:
+        return await run_password_hash(fn, *args)
+    except HashingBusyError:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many sign-in requests, please try again shortly",
+            headers={"Retry-After": "1"},
+        )
+
+def _too_many_attempts(retry_after: float) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail="Too many failed login attempts, please try again later",
+        headers={"Retry-After": str(int(retry_after))},
+    )
+
 @router.post("/register", response_model=Token)
-def register(
+async def register(
     user_in: UserRegister,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Register new WhatsBackup user
     No plan selected yet - user will choose after login
     """
     # 1. Check if user exists
-    existing_user = db.query(User).filter(User.email == user_in.email).first()
+    existing_user = await db.scalar(select(User.id).where(func.lower(User.email) == user_in.email.lower()))
     if existing_user:
         raise HTTPException(status_code=400, detail="Email already registered")
 
     # 2. Create User for WhatsBackup
-    hashed_password = get_password_hash(user_in.password)
+    hashed_password = await _hash(get_password_hash, user_in.password)
     new_user = User(
         email=user_in.email,
         hashed_password=hashed_password,
@@ -50,8 +74,7 @@ def register(
         backup_frequency_hours=24
     )
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
     
     logger.info(f"New user registered: {new_user.email}")
     
@@ -60,26 +83,52 @@ def register(
     return {"access_token": access_token, "token_type": "bearer"}
 
 @router.post("/login", response_model=Token)
-def login(
+async def login(
+    request: Request,
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Login to WhatsBackup"""
-    user = db.query(User).filter(User.email == form_data.username).first()
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    """
+    Login to WhatsBackup
+    Accounts and client IPs with too many recent failures get 429 before any hashing
+    """
+    account = form_data.username.strip().lower()
+    # Behind a proxy this is the X-Forwarded-For client only when uvicorn runs with
+    # --proxy-headers --forwarded-allow-ips=<proxy IPs> (see DEPLOYMENT.md)
+    client_ip = request.client.host if request.client else "unknown"
+    retry_after = max(account_login_throttle.retry_after(account), ip_login_throttle.retry_after(client_ip))
+    if retry_after:
+        raise _too_many_attempts(retry_after)
+    
+    # Same normalized value as the throttle key (served by ix_users_email_lower)
+    user = await db.scalar(select(User).where(func.lower(User.email) == account))
+    if user:
+        valid, new_hash = await _hash(verify_and_update_password, form_data.password, user.hashed_password)
+    else:
+        valid, new_hash = await _hash(verify_dummy_password, form_data.password)
+    if not valid:
+        account_login_throttle.record_failure(account)
+        ip_login_throttle.record_failure(client_ip)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
     
+    account_login_throttle.reset(account)
+    if new_hash:
+        # BCRYPT_ROUNDS (or the scheme) changed since this hash was made
+        user.hashed_password = new_hash
+        await db.commit()
+        logger.info(f"Password rehashed for {user.email}")
+    
     logger.info(f"User logged in: {user.email}")
     access_token = create_access_token(subject=user.id)
     return {"access_token": access_token, "token_type": "bearer"}
 
 @router.get("/me")
 def get_current_user_info(
-    current_user: User = Depends(get_current_user)
+    current_user: UserPrincipal = Depends(get_current_principal)
 ):
     """Get current user information"""
     return {
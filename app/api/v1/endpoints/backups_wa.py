@@ -1,80 +1,68 @@
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from fastapi.responses import StreamingResponse
 from app.db.session import get_db
-from app.api.deps import get_current_user
-from app.models.user import User
+from app.db.replica import get_read_db, get_async_read_db
+from app.api.deps import get_current_principal, get_current_principal_async
+from app.core.principal import UserPrincipal
 from app.services.whatsapp_backup import WhatsAppBackupService
+from app.services.job_queue import enqueue_job, serialize_job
+from app.services.user_stats import get_user_stats
 
 router = APIRouter()
 
-@router.post("/create")
-async def create_backup_now(
-    current_user: User = Depends(get_current_user),
+@router.post("/create", status_code=202)
+def create_backup_now(
+    current_user: UserPrincipal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """
-    Create backup immediately (also runs automatically every 24hrs)
+    Queue a backup immediately (also runs automatically every 24hrs)
     VALUE PROP: "Backup now, sleep peacefully"
+    
+    Returns a job id right away; poll /api/v1/jobs/{job_id} for progress
     """
-    if not current_user.whatsapp_phone_id or not current_user.whatsapp_access_token:
+    if not current_user.whatsapp_connected:
         raise HTTPException(
             status_code=400, 
             detail="WhatsApp not connected. Please connect your WhatsApp Business account first."
         )
     
-    service = WhatsAppBackupService(
-        current_user.whatsapp_phone_id, 
-        current_user.whatsapp_access_token
-    )
-    
-    try:
-        result = await service.create_backup(current_user.id, db)
-        return result
-    except ValueError as e:
-        raise HTTPException(status_code=400, detail=str(e))
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Backup failed: {str(e)}")
+    job = enqueue_job("backup", current_user.id, db, payload={"service": "whatsapp_backup"})
+    return serialize_job(job)
 
 @router.get("/history")
-def get_backup_history(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+async def get_backup_history(
+    current_user: UserPrincipal = Depends(get_current_principal_async),
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """Show all backups performed"""
     service = WhatsAppBackupService("", "")  # No credentials needed for read operations
-    backups = service.get_backup_history(current_user.id, db)
+    backups = await service.get_backup_history_async(current_user.id, db)
     return backups
 
 @router.get("/stats")
 def get_backup_stats(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: UserPrincipal = Depends(get_current_principal),
+    db: Session = Depends(get_read_db)
 ):
-    """Get overall backup statistics"""
-    from app.models.backup import Backup
-    from app.models.message import Message
-    from sqlalchemy import func
-    
-    total_backups = db.query(func.count(Backup.id)).filter(
-        Backup.user_id == current_user.id
-    ).scalar()
-    
-    total_messages = db.query(func.count(Message.id)).filter(
-        Message.user_id == current_user.id
-    ).scalar()
-    
-    total_contacts = db.query(func.count(func.distinct(Message.contact_phone))).filter(
-        Message.user_id == current_user.id
-    ).scalar()
+    """Get overall backup statistics (one row, maintained by the backups themselves)"""
+    stats = get_user_stats(current_user.id, db)
     
-    last_backup = db.query(Backup).filter(
-        Backup.user_id == current_user.id
-    ).order_by(Backup.backup_date.desc()).first()
+    if not stats:
+        return {
+            "total_backups": 0,
+            "total_messages": 0,
+            "total_contacts": 0,
+            "bytes_stored": 0,
+            "last_backup_date": None
+        }
     
     return {
-        "total_backups": total_backups or 0,
-        "total_messages": total_messages or 0,
-        "total_contacts": total_contacts or 0,
-        "last_backup_date": last_backup.backup_date.isoformat() if last_backup else None
+        "total_backups": stats.total_backups,
+        "total_messages": stats.total_messages,
+        "total_contacts": stats.total_contacts,
+        "bytes_stored": stats.bytes_stored,
+        "last_backup_date": stats.last_backup_date.isoformat() if stats.last_backup_date else None
     }
@@ -4,11 +4,13 @@ Handles WhatsApp connections via QR code for Express plan users
 """
 
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.db.session import get_db
-from app.core.security import get_current_user
-from app.models.user import User
+from app.db.session import get_db, get_async_db
+from app.api.deps import get_current_principal, get_current_principal_async
+from app.core.principal import UserPrincipal
 from app.integrations.whatsapp_baileys import BaileysService
+from app.services.job_queue import enqueue_job, serialize_job
 from pydantic import BaseModel
 from typing import Dict, Any
 import logging
@@ -37,7 +39,7 @@ class ConnectionStatus(BaseModel):
     status: str = None
 
 
-def verify_express_plan(current_user: User):
+def verify_express_plan(current_user: UserPrincipal):
     """Middleware to verify user is on Express plan"""
     if current_user.plan_type != 'express':
         raise HTTPException(
@@ -48,8 +50,8 @@ def verify_express_plan(current_user: User):
 
 @router.post("/generate-qr", response_model=QRResponse)
 async def generate_qr_code(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: UserPrincipal = Depends(get_current_principal_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Generate QR code for WhatsApp connection (Express plan only)
@@ -75,8 +77,8 @@ async def generate_qr_code(
 
 @router.get("/status", response_model=ConnectionStatus)
 async def check_connection_status(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: UserPrincipal = Depends(get_current_principal_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Check if WhatsApp is connected for current user
@@ -97,19 +99,20 @@ async def check_connection_status(
         )
 
 
-@router.post("/create-backup")
-async def create_backup(
-    current_user: User = Depends(get_current_user),
+@router.post("/create-backup", status_code=status.HTTP_202_ACCEPTED)
+def create_backup(
+    current_user: UserPrincipal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """
-    Create manual backup from Baileys session (Express plan)
+    Queue a manual backup from Baileys session (Express plan)
     
-    Fetches all messages from connected WhatsApp Web session and saves to database
+    Returns a job id right away; a worker fetches all messages from the
+    connected WhatsApp Web session and saves them. Poll /api/v1/jobs/{job_id}
     """
     verify_express_plan(current_user)
     
-    logger.info(f"Creating Baileys backup for user {current_user.email}")
+    logger.info(f"Queueing Baileys backup for user {current_user.email}")
     
     # Check if user can create backup (check message limits)
     from app.services.plans import can_create_backup
@@ -121,32 +124,15 @@ async def create_backup(
             detail=reason
         )
     
-    try:
-        result = await baileys_service.create_backup(current_user.id, db)
-        
-        # Increment message count for Express plan
-        from app.services.plans import increment_message_count
-        increment_message_count(current_user.id, result['total_messages'], db)
-        
-        return result
-        
-    except ValueError as e:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=str(e)
-        )
-    except Exception as e:
-        logger.error(f"Failed to create backup: {e}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Backup failed: {str(e)}"
-        )
+    # The worker increments the Express message count once the backup completes
+    job = enqueue_job("backup", current_user.id, db, payload={"service": "baileys"})
+    return serialize_job(job)
 
 
 @router.delete("/disconnect")
 async def disconnect_session(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: UserPrincipal = Depends(get_current_principal_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Disconnect WhatsApp session (logout)
@@ -0,0 +1,103 @@
+"""
+Exports API Endpoints
+Request PDF / CSV / NDJSON exports as background jobs and download the results
+"""
+
+from fastapi import APIRouter, Depends, HTTPException, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+from pydantic import BaseModel
+from typing import Literal, Optional
+from datetime import datetime
+from app.db.session import get_db
+from app.api.deps import get_current_principal
+from app.core.principal import UserPrincipal
+from app.models.export_artifact import ExportArtifact
+from app.services.job_queue import enqueue_job, serialize_job
+from app.services.exports import (
+    EXPORT_FORMATS, export_cache_key, export_fingerprint, find_cached_export,
+    get_export_storage, export_filename, serialize_artifact
+)
+import uuid
+
+router = APIRouter()
+
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+
+class ExportRequest(BaseModel):
+    format: Literal["pdf", "csv", "ndjson"] = "pdf"
+    contact_phone: Optional[str] = None  # Omit to export the whole account
+    start: Optional[datetime] = None
+    end: Optional[datetime] = None
+
+
+@router.post("/", status_code=202)
+def request_export(
+    data: ExportRequest,
+    response: Response,
+    current_user: UserPrincipal = Depends(get_current_principal),
+    db: Session = Depends(get_db)
+):
+    """
+    Request an export
+    Returns the ready artifact right away (200) when nothing changed since it was
+    built; otherwise queues a job (202): poll /api/v1/jobs/{job_id}, whose result
+    has the download_url once completed
+    """
+    fingerprint = export_fingerprint(current_user.id, data.contact_phone, db, data.start, data.end)
+    if not fingerprint:
+        raise HTTPException(status_code=404, detail="No messages found for this export")
+    
+    cache_key = export_cache_key(data.contact_phone, data.format, data.start, data.end)
+    cached = find_cached_export(current_user.id, cache_key, fingerprint, db)
+    if cached:
+        response.status_code = 200
+        return {"job_id": None, "status": "completed", "cached": True, "result": serialize_artifact(cached)}
+    
+    job = enqueue_job("export", current_user.id, db, payload={
+        "format": data.format,
+        "contact_phone": data.contact_phone,
+        "start": data.start.isoformat() if data.start else None,
+        "end": data.end.isoformat() if data.end else None,
+    })
+    return {**serialize_job(job), "cached": False}
+
+
+@router.get("/")
+def list_exports(
+    current_user: UserPrincipal = Depends(get_current_principal),
+    db: Session = Depends(get_db)
+):
+    """Previously built exports, newest first"""
+    artifacts = db.query(ExportArtifact).filter(
+        ExportArtifact.user_id == current_user.id
+    ).order_by(ExportArtifact.created_at.desc()).all()
+    return [serialize_artifact(artifact) for artifact in artifacts]
+
+
+@router.get("/{artifact_id}/download")
+def download_export(
+    artifact_id: uuid.UUID,
+    current_user: UserPrincipal = Depends(get_current_principal),
+    db: Session = Depends(get_db)
+):
+    """Stream a built export file from storage"""
+    artifact = db.query(ExportArtifact).filter(
+        ExportArtifact.id == artifact_id,
+        ExportArtifact.user_id == current_user.id
+    ).first()
+    storage = get_export_storage()
+    if not artifact or not storage.exists(artifact.storage_path):
+        raise HTTPException(status_code=404, detail="Export not found")
+    
+    def chunks():
+        with storage.open_file(artifact.storage_path) as f:
+            while chunk := f.read(DOWNLOAD_CHUNK_SIZE):
+                yield chunk
+    
+    return StreamingResponse(
+        chunks(),
+        media_type=EXPORT_FORMATS[artifact.format],
+        headers={"Content-Disposition": f"attachment; filename={export_filename(artifact)}"}
+    )
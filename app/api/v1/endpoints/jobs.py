@@ -0,0 +1,43 @@
+"""
+Jobs API Endpoints
+Status and progress of queued background work (backups)
+"""
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from app.db.session import get_db
+from app.api.deps import get_current_principal
+from app.core.principal import UserPrincipal
+from app.models.job import Job
+from app.services.job_queue import get_job, serialize_job
+import uuid
+
+router = APIRouter()
+
+
+@router.get("/")
+def list_jobs(
+    kind: str = Query(None),
+    limit: int = Query(20, le=100),
+    current_user: UserPrincipal = Depends(get_current_principal),
+    db: Session = Depends(get_db)
+):
+    """Most recent jobs for the current user"""
+    query = db.query(Job).filter(Job.user_id == current_user.id)
+    if kind:
+        query = query.filter(Job.kind == kind)
+    jobs = query.order_by(Job.created_at.desc()).limit(limit).all()
+    return [serialize_job(job) for job in jobs]
+
+
+@router.get("/{job_id}")
+def get_job_status(
+    job_id: uuid.UUID,
+    current_user: UserPrincipal = Depends(get_current_principal),
+    db: Session = Depends(get_db)
+):
+    """Status, progress and result of one job"""
+    job = get_job(job_id, current_user.id, db)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return serialize_job(job)
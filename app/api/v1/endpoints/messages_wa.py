@@ -1,31 +1,57 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from datetime import datetime
 from app.db.session import get_db
-from app.api.deps import get_current_user
-from app.models.user import User
+from app.db.replica import get_read_db, get_async_read_db
+from app.api.deps import get_current_principal, get_current_principal_async
+from app.core.principal import UserPrincipal
 from app.models.message import Message
+from app.models.contact_summary import ContactSummary
 from app.services.whatsapp_backup import WhatsAppBackupService
+from app.services.search import contact_match
+from app.services.pagination import keyset_page
 
 router = APIRouter()
 
+CONTACT_SORTS = {
+    "recent": ContactSummary.last_message_at.desc().nulls_last(),
+    "name": ContactSummary.contact_name.asc().nulls_last(),
+    "messages": ContactSummary.message_count.desc(),
+}
+
 @router.get("/")
 def get_messages(
+    response: Response,
     contact_phone: str = Query(None),
-    limit: int = Query(500, le=1000),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    limit: int = Query(500, ge=1, le=1000),
+    before: str = Query(None, description="Cursor: return messages older than this"),
+    after: str = Query(None, description="Cursor: return messages newer than this"),
+    current_user: UserPrincipal = Depends(get_current_principal),
+    db: Session = Depends(get_read_db)
 ):
     """
     View backed-up conversations (even if WhatsApp is down)
     VALUE: "Your messages are always accessible"
+    Newest first. Page with the cursors returned in the X-Before-Cursor (older)
+    and X-After-Cursor (newer) headers; absent when there is nothing further.
     """
     query = db.query(Message).filter(Message.user_id == current_user.id)
     
     if contact_phone:
         query = query.filter(Message.contact_phone == contact_phone)
     
-    messages = query.order_by(Message.timestamp.desc()).limit(limit).all()
+    try:
+        page = keyset_page(query, Message.timestamp, Message.id, limit, before=before, after=after)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    if page.before:
+        response.headers["X-Before-Cursor"] = page.before
+    if page.after:
+        response.headers["X-After-Cursor"] = page.after
+    messages = page.rows
     
     return [
         {
@@ -41,47 +67,64 @@ def get_messages(
     ]
 
 @router.get("/search")
-def search_messages(
+async def search_messages(
     q: str = Query(..., min_length=2),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    mode: str = Query("fulltext", pattern="^(fulltext|substring|fuzzy)$"),
+    limit: int = Query(100, ge=1, le=500),
+    current_user: UserPrincipal = Depends(get_current_principal_async),
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """
     Search through ALL backed-up messages
     VALUE: "Find that conversation from 3 months ago in seconds"
+    mode=fulltext (default): ranked by relevance, with a highlighted `snippet`
+    mode=substring: plain ILIKE match, newest first
+    mode=fuzzy: trigram similarity on phone, contact name and text (partial numbers, typos)
     """
     service = WhatsAppBackupService("", "")
-    results = service.search_messages(current_user.id, q, db)
+    results = await service.search_messages_async(current_user.id, q, db, mode=mode, limit=limit)
     return results
 
 @router.get("/contacts")
 def get_contacts(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    response: Response,
+    q: str = Query(None, min_length=2),
+    fuzzy: bool = Query(False),
+    sort: str = Query("recent", pattern="^(recent|name|messages)$"),
+    limit: int = Query(200, ge=1, le=1000),
+    offset: int = Query(0, ge=0),
+    current_user: UserPrincipal = Depends(get_current_principal),
+    db: Session = Depends(get_read_db)
 ):
-    """Get list of all contacts with backed-up messages"""
-    from sqlalchemy import func, distinct
+    """
+    Get list of all contacts with backed-up messages
+    Reads the per-contact summaries kept up to date by backups (one row per contact).
+    q filters by partial phone number or name; fuzzy=true also matches
+    misspelled names and orders by similarity. X-Total-Count has the number of matches.
+    """
+    query = db.query(ContactSummary).filter(ContactSummary.user_id == current_user.id)
+    order = [CONTACT_SORTS[sort], ContactSummary.contact_phone]
+    
+    if q:
+        condition, score = contact_match(
+            q, fuzzy=fuzzy,
+            phone_column=ContactSummary.contact_phone,
+            name_column=ContactSummary.contact_name
+        )
+        query = query.filter(condition)
+        if fuzzy:
+            order.insert(0, score.desc())
     
-    contacts = db.query(
-        Message.contact_phone,
-        Message.contact_name,
-        func.count(Message.id).label('message_count'),
-        func.max(Message.timestamp).label('last_message_date')
-    ).filter(
-        Message.user_id == current_user.id
-    ).group_by(
-        Message.contact_phone, 
-        Message.contact_name
-    ).order_by(
-        func.max(Message.timestamp).desc()
-    ).all()
+    response.headers["X-Total-Count"] = str(query.count())
+    contacts = query.order_by(*order).offset(offset).limit(limit).all()
     
     return [
         {
             "contact_phone": c.contact_phone,
             "contact_name": c.contact_name,
             "message_count": c.message_count,
-            "last_message_date": c.last_message_date.isoformat() if c.last_message_date else None
+            "last_message_date": c.last_message_at.isoformat() if c.last_message_at else None,
+            "last_message_preview": c.last_message_preview
         }
         for c in contacts
     ]
@@ -89,20 +132,23 @@ def get_contacts(
 @router.get("/export/{contact_phone}")
 def export_conversation(
     contact_phone: str,
-    current_user: User = Depends(get_current_user),
+    start: datetime = Query(None, description="Only messages at or after this time"),
+    end: datetime = Query(None, description="Only messages before this time"),
+    current_user: UserPrincipal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """
     Export complete conversation to PDF
     VALUE: "Legal documentation, audits, accounting records"
+    The PDF is streamed as it is rendered, so large conversations start downloading right away
     """
     service = WhatsAppBackupService("", "")
     
     try:
-        pdf_buffer = service.export_conversation_pdf(current_user.id, contact_phone, db)
+        pdf_stream = service.export_conversation_pdf(current_user.id, contact_phone, db, start=start, end=end)
         
         return StreamingResponse(
-            pdf_buffer,
+            pdf_stream,
             media_type="application/pdf",
             headers={"Content-Disposition": f"attachment; filename=conversacion_{contact_phone}.pdf"}
         )
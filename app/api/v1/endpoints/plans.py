@@ -6,8 +6,9 @@ Allows users to select and manage their subscription plans
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from app.db.session import get_db
-from app.core.security import get_current_user
+from app.api.deps import get_current_user, get_current_principal
 from app.models.user import User
+from app.core.principal import UserPrincipal
 from app.services.plans import get_plan_limits, PLANS, upgrade_to_pro
 from pydantic import BaseModel
 from typing import List, Dict, Any
@@ -81,7 +82,7 @@ def select_plan(
 
 @router.post("/upgrade-to-pro")
 def upgrade_plan(
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """
@@ -104,7 +105,7 @@ def upgrade_plan(
 
 @router.get("/current")
 def get_current_plan(
-    current_user: User = Depends(get_current_user)
+    current_user: UserPrincipal = Depends(get_current_principal)
 ) -> Dict[str, Any]:
     """
     Get current user's plan information
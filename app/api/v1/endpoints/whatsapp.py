@@ -1,10 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.db.session import get_db
-from app.api.deps import get_current_user
+from app.db.session import get_db, get_async_db
+from app.api.deps import get_current_user_async, get_current_principal
 from app.models.user import User
+from app.core.principal import UserPrincipal
 from app.services.whatsapp_backup import WhatsAppBackupService
-from app.integrations.whatsapp_api import WhatsAppAPIService
+from app.integrations.whatsapp_api import WhatsAppAPIService, invalidate_connection_status, remember_connection_status
+from app.services.job_queue import enqueue_job, serialize_job
 from pydantic import BaseModel
 import logging
 
@@ -19,8 +22,8 @@ class WhatsAppConnect(BaseModel):
 @router.post("/connect")
 async def connect_whatsapp(
     data: WhatsAppConnect,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Connect user's WhatsApp Business account (Pro Plan)
@@ -36,11 +39,16 @@ async def connect_whatsapp(
             detail="Invalid WhatsApp credentials. Please check your Phone Number ID and Access Token."
         )
     
+    # Replace any cached status for the old credentials
+    if current_user.whatsapp_phone_id and current_user.whatsapp_access_token:
+        invalidate_connection_status(current_user.whatsapp_phone_id, current_user.whatsapp_access_token)
+    remember_connection_status(data.phone_number_id, data.access_token, verification)
+    
     # Save credentials
     current_user.whatsapp_phone_id = data.phone_number_id
     current_user.whatsapp_access_token = data.access_token
     current_user.plan_type = 'pro'  # Ensure user is on Pro plan
-    db.commit()
+    await db.commit()
     
     logger.info(f"User {current_user.email} connected WhatsApp Pro successfully")
     
@@ -53,10 +61,9 @@ async def connect_whatsapp(
 
 @router.get("/status")
 async def get_whatsapp_status(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user_async)
 ):
-    """Check if WhatsApp Pro is connected and verify status"""
+    """Check if WhatsApp Pro is connected and verify status (cached, see verify_connection_cached)"""
     is_connected = bool(current_user.whatsapp_phone_id and current_user.whatsapp_access_token)
     
     result = {
@@ -72,7 +79,7 @@ async def get_whatsapp_status(
                 current_user.whatsapp_phone_id,
                 current_user.whatsapp_access_token
             )
-            verification = await service.verify_connection()
+            verification = await service.verify_connection_cached()
             result["verified"] = verification.get("connected", False)
             result["verified_name"] = verification.get("verified_name")
         except Exception as e:
@@ -82,44 +89,43 @@ async def get_whatsapp_status(
     
     return result
 
-@router.post("/create-backup")
-async def create_manual_backup(
-    current_user: User = Depends(get_current_user),
+@router.post("/create-backup", status_code=202)
+def create_manual_backup(
+    current_user: UserPrincipal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
-    """Create manual backup for Pro plan user"""
+    """
+    Queue a manual backup for Pro plan user
+    Returns a job id right away; poll /api/v1/jobs/{job_id} for progress
+    """
     if current_user.plan_type != 'pro':
         raise HTTPException(
             status_code=403,
             detail="This feature is only available for Pro plan users"
         )
     
-    if not current_user.whatsapp_phone_id or not current_user.whatsapp_access_token:
+    if not current_user.whatsapp_connected:
         raise HTTPException(
             status_code=400,
             detail="WhatsApp not connected. Please connect first."
         )
     
-    try:
-        service = WhatsAppAPIService(
-            current_user.whatsapp_phone_id,
-            current_user.whatsapp_access_token
-        )
-        result = await service.create_backup(current_user.id, db)
-        return result
-    except Exception as e:
-        logger.error(f"Manual backup failed for {current_user.email}: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+    job = enqueue_job("backup", current_user.id, db, payload={"service": "whatsapp_api"})
+    logger.info(f"Manual backup queued for {current_user.email}: job {job.id}")
+    return serialize_job(job)
 
 @router.delete("/disconnect")
 async def disconnect_whatsapp(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Disconnect WhatsApp Pro"""
+    if current_user.whatsapp_phone_id and current_user.whatsapp_access_token:
+        invalidate_connection_status(current_user.whatsapp_phone_id, current_user.whatsapp_access_token)
+    
     current_user.whatsapp_phone_id = None
     current_user.whatsapp_access_token = None
-    db.commit()
+    await db.commit()
     
     return {
         "status": "disconnected",
@@ -0,0 +1,122 @@
+"""
+In-process TTL cache
+Small async-aware LRU cache with stale-while-revalidate and hit/miss metrics
+"""
+
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+from app.core.metrics import metrics
+import asyncio
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class TTLCache:
+    """
+    Entries are fresh for `ttl` seconds. After that they are still served
+    for up to `stale_ttl` more seconds while one background task reloads them,
+    so callers only wait on the loader for a cold or fully expired key.
+    Past `max_size` entries the least recently used one is evicted.
+    """
+    
+    def __init__(self, name: str, ttl: float, stale_ttl: float = 0, max_size: int = 10_000):
+        self.name = name
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_size = max_size
+        # key -> (value, expires_at), least recently used first
+        self._entries: "OrderedDict[Hashable, Tuple[Any, float]]" = OrderedDict()
+        self._lock = threading.Lock()  # Also used from sync endpoints running in the threadpool
+        self._refreshing: Dict[Hashable, asyncio.Task] = {}  # Held so tasks aren't garbage collected
+        self._hits = 0
+        self._misses = 0
+    
+    def _lookup(self, key: Hashable) -> Optional[Tuple[Any, float]]:
+        """Entry for `key` (fresh or not), marked as most recently used"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry:
+                self._entries.move_to_end(key)
+            return entry
+    
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Fresh value for `key`, or None"""
+        entry = self._lookup(key)
+        if entry and entry[1] > time.monotonic():
+            return entry[0]
+        return None
+    
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+    
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+    
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+    
+    async def get_or_load(
+        self,
+        key: Hashable,
+        loader: Callable[[], Awaitable[Any]],
+        ttl_for: Optional[Callable[[Any], float]] = None
+    ) -> Any:
+        """
+        Return the cached value for `key`, loading it when missing
+        
+        Args:
+            key: Cache key
+            loader: Coroutine function producing the value
+            ttl_for: Optional per-value TTL (e.g. shorter for failures)
+        
+        Returns:
+            The cached or freshly loaded value
+        """
+        now = time.monotonic()
+        entry = self._lookup(key)
+        if entry:
+            value, expires_at = entry
+            if expires_at > now:
+                self._record(hit=True)
+                return value
+            if expires_at + self.stale_ttl > now:
+                self._record(hit=True)
+                metrics.incr(f"cache_{self.name}_stale_hits")
+                if key not in self._refreshing:
+                    self._refreshing[key] = asyncio.create_task(self._refresh(key, loader, ttl_for))
+                return value
+        
+        self._record(hit=False)
+        value = await loader()
+        self.set(key, value, ttl_for(value) if ttl_for else None)
+        return value
+    
+    async def _refresh(self, key, loader, ttl_for) -> None:
+        try:
+            value = await loader()
+            # Skip if the key was invalidated while we were loading
+            if key in self._entries:
+                self.set(key, value, ttl_for(value) if ttl_for else None)
+        except Exception as e:
+            logger.warning(f"Background refresh of {self.name} cache failed: {e}")
+        finally:
+            self._refreshing.pop(key, None)
+    
+    def _record(self, hit: bool) -> None:
+        if hit:
+            self._hits += 1
+            metrics.incr(f"cache_{self.name}_hits")
+        else:
+            self._misses += 1
+            metrics.incr(f"cache_{self.name}_misses")
+        metrics.set(f"cache_{self.name}_hit_ratio", self._hits / (self._hits + self._misses))
@@ -1,5 +1,6 @@
 from pydantic_settings import BaseSettings
 from pydantic import ConfigDict
+from typing import Optional
 
 class Settings(BaseSettings):
     PROJECT_NAME: str = "WhatsBackup API"
@@ -9,9 +10,97 @@ class Settings(BaseSettings):
     POSTGRES_PASSWORD: str
     POSTGRES_DB: str
     DATABASE_URL: str
+    ASYNC_DATABASE_URL: Optional[str] = None  # Defaults to DATABASE_URL with the asyncpg driver
+    DATABASE_READ_URL: Optional[str] = None  # Streaming replica for read-only endpoints
+    DB_READ_MAX_LAG_SECONDS: float = 30.0  # Fall back to the primary when the replica is further behind
+    DB_READ_LAG_CHECK_SECONDS: float = 5.0  # How long a replica lag measurement is reused
+    
+    # Connection pools, per engine (API sync, API async, background worker)
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 10
+    DB_WORKER_POOL_SIZE: int = 5
+    DB_WORKER_MAX_OVERFLOW: int = 5
+    DB_POOL_TIMEOUT_SECONDS: float = 10.0  # Wait for a free connection before failing
+    DB_POOL_RECYCLE_SECONDS: int = 30 * 60
+    DB_POOL_PRE_PING: bool = True
+    DB_API_STATEMENT_TIMEOUT_MS: int = 15_000  # Postgres statement_timeout; 0 disables
+    DB_WORKER_STATEMENT_TIMEOUT_MS: int = 10 * 60 * 1000
     
     SECRET_KEY: str
     DOMAIN: str = "localhost"
+    
+    # Password hashing and login protection
+    BCRYPT_ROUNDS: int = 12  # Changing it rehashes each password at the user's next login
+    PASSWORD_HASH_WORKERS: int = 4  # Concurrent bcrypt computations per process
+    PASSWORD_HASH_MAX_QUEUE: int = 64  # Hash requests waiting for a worker before new ones get 503
+    LOGIN_FAILURE_WINDOW_SECONDS: int = 15 * 60
+    LOGIN_MAX_FAILURES_PER_ACCOUNT: int = 5
+    LOGIN_MAX_FAILURES_PER_IP: int = 50
+
+    # Backup ingestion
+    BACKUP_BATCH_SIZE: int = 1000
+    BACKUP_CONFLICT_MODE: str = "skip"  # skip, update or error
+    BACKUP_MAX_INFLIGHT_PAGES: int = 4  # Fetched pages buffered ahead of the DB writer
+    
+    # Backup jobs (concurrency is JOB_WORKER_CONCURRENCY per worker)
+    BACKUP_JOB_TIMEOUT_SECONDS: int = 60 * 60  # Per-user limit so one slow account can't hold a worker slot
+    
+    # Due-time scheduler
+    BACKUP_SCHEDULER_REFRESH_SECONDS: int = 5 * 60  # How often due times are recomputed
+    BACKUP_SCHEDULE_JITTER_FRACTION: float = 0.1  # Spread each user within 10% of their period
+    BACKUP_RETRY_MINUTES: int = 60  # Delay before retrying a user whose last backup failed
+    
+    # Scheduler ownership (one leader across workers/replicas via pg advisory lock)
+    RUN_SCHEDULER: bool = True  # Set false on API processes when running `python -m app.schedulers`
+    SCHEDULER_LOCK_KEY: int = 7_240_001
+    SCHEDULER_HEARTBEAT_SECONDS: int = 30
+    SCHEDULER_LEADER_RETRY_SECONDS: int = 30
+    
+    # Dashboard stats recount (run by the scheduler leader)
+    STATS_RECONCILE_HOURS: int = 24
+    STATS_RECONCILE_BATCH_SIZE: int = 500  # Users recounted per transaction
+    
+    # Conversation exports
+    EXPORT_FETCH_SIZE: int = 1000  # Rows per server-side cursor fetch
+    EXPORT_STORAGE_DIR: str = "backups/exports"  # Cached export artifacts (local storage)
+    EXPORT_RENDER_BATCH_SIZE: int = 500  # Messages laid out per process-pool task
+    
+    # CPU-bound work (PDF layout) runs in this many spawned processes; 0 runs it inline
+    CPU_POOL_PROCESSES: int = 2
+    
+    # Shared outbound HTTP client pools (Graph API, Baileys server)
+    HTTP_MAX_CONNECTIONS: int = 100
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    HTTP_KEEPALIVE_EXPIRY_SECONDS: float = 30.0
+    HTTP2_ENABLED: bool = False  # HTTP/2 to graph.facebook.com (needs the h2 package)
+    
+    # Meta Graph API rate limiting (per access token, from X-App-Usage / X-Business-Use-Case-Usage)
+    GRAPH_THROTTLE_START_PERCENT: float = 50.0  # Start spacing requests above this usage
+    GRAPH_MAX_REQUEST_INTERVAL_SECONDS: float = 10.0  # Spacing as usage approaches 100%
+    GRAPH_MAX_RETRIES: int = 6
+    GRAPH_RETRY_BASE_SECONDS: float = 1.0
+    GRAPH_RETRY_MAX_SECONDS: float = 5 * 60
+    GRAPH_TOKEN_BUDGET_IDLE_SECONDS: int = 60 * 60  # Pacing state of a token unused this long is dropped
+    GRAPH_TOKEN_BUDGET_MAX_TOKENS: int = 10_000
+    
+    # WhatsApp Pro connection status cache
+    WHATSAPP_STATUS_CACHE_SECONDS: int = 5 * 60
+    WHATSAPP_STATUS_STALE_SECONDS: int = 60 * 60  # Served while refreshing in the background
+    WHATSAPP_STATUS_FAILURE_CACHE_SECONDS: int = 30
+    
+    # Authenticated user snapshots (app/core/principal.py)
+    AUTH_PRINCIPAL_CACHE_SECONDS: int = 60  # Bounds staleness in processes that didn't make the change
+    AUTH_PRINCIPAL_CACHE_SIZE: int = 10_000
+    
+    # Durable job queue
+    RUN_JOB_WORKER: bool = False  # Embed a worker in the API (dev only); production runs `python -m app.workers`
+    JOB_WORKER_CONCURRENCY: int = 4
+    JOB_POLL_SECONDS: int = 5
+    JOB_HEARTBEAT_SECONDS: int = 30
+    JOB_LOCK_TIMEOUT_SECONDS: int = 5 * 60  # Running jobs without a heartbeat this long are re-queued
+    JOB_MAX_ATTEMPTS: int = 5
+    JOB_RETRY_BASE_SECONDS: int = 30
+    JOB_RETRY_MAX_SECONDS: int = 60 * 60
 
     model_config = ConfigDict(
         case_sensitive=True,
@@ -0,0 +1,154 @@
+"""
+Shared executors
+Size-limited process pool for CPU-bound work (export rendering), so heavy
+jobs use other cores instead of competing with request handling for the GIL,
+and a bounded thread pool for password hashing, so login bursts can't take
+over the request threadpool
+"""
+
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+from app.core.config import settings
+from app.core.metrics import metrics
+import asyncio
+import multiprocessing
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+_in_flight = 0
+
+
+def get_process_pool() -> Optional[ProcessPoolExecutor]:
+    """
+    The shared pool, created on first use; None when CPU_POOL_PROCESSES is 0
+    Workers are spawned (not forked) so they never inherit DB connections or threads
+    """
+    global _pool
+    if settings.CPU_POOL_PROCESSES <= 0:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=settings.CPU_POOL_PROCESSES,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+            logger.info(f"CPU process pool started ({settings.CPU_POOL_PROCESSES} processes)")
+        return _pool
+
+
+def _track(future: Future) -> None:
+    global _in_flight
+    with _pool_lock:
+        _in_flight -= 1
+        metrics.set("cpu_pool.in_flight", _in_flight)
+
+
+def submit_cpu(fn: Callable[..., Any], *args: Any) -> Future:
+    """
+    Run fn(*args) in the process pool (fn and args must be picklable)
+    Without a pool the call runs inline and an already-completed future is returned
+    """
+    global _in_flight
+    pool = get_process_pool()
+    if pool is None:
+        future: Future = Future()
+        try:
+            future.set_result(fn(*args))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+    
+    with _pool_lock:
+        _in_flight += 1
+        metrics.set("cpu_pool.in_flight", _in_flight)
+    future = pool.submit(fn, *args)
+    future.add_done_callback(_track)
+    metrics.incr("cpu_pool.submitted")
+    return future
+
+
+class HashingBusyError(RuntimeError):
+    """Too many password hashes are already waiting for a worker"""
+
+
+_hash_pool: Optional[ThreadPoolExecutor] = None
+_hash_waiting = 0
+
+
+def _get_hash_pool() -> ThreadPoolExecutor:
+    global _hash_pool
+    with _pool_lock:
+        if _hash_pool is None:
+            # bcrypt releases the GIL, so threads hash in parallel
+            _hash_pool = ThreadPoolExecutor(
+                max_workers=settings.PASSWORD_HASH_WORKERS,
+                thread_name_prefix="password-hash"
+            )
+        return _hash_pool
+
+
+def _hash_started() -> None:
+    global _hash_waiting
+    with _pool_lock:
+        _hash_waiting -= 1
+        metrics.set("password_hash.queue_depth", _hash_waiting)
+
+
+async def run_password_hash(fn: Callable[..., Any], *args: Any) -> Any:
+    """
+    Run a password hashing call on the dedicated pool (PASSWORD_HASH_WORKERS threads)
+    
+    Raises:
+        HashingBusyError: If PASSWORD_HASH_MAX_QUEUE calls are already waiting
+    """
+    global _hash_waiting
+    with _pool_lock:
+        if _hash_waiting >= settings.PASSWORD_HASH_MAX_QUEUE:
+            metrics.incr("password_hash.rejected")
+            raise HashingBusyError("Password hashing queue is full")
+        _hash_waiting += 1
+        metrics.set("password_hash.queue_depth", _hash_waiting)
+    
+    def run():
+        _hash_started()
+        started = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            metrics.observe("password_hash.seconds", time.perf_counter() - started)
+    
+    return await asyncio.get_running_loop().run_in_executor(_get_hash_pool(), run)
+
+
+async def to_thread_shielded(fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """
+    asyncio.to_thread for calls that use a caller-owned DB session
+    If the caller is cancelled (job timeout, shutdown) the thread keeps running,
+    so wait for it before re-raising: the caller's cleanup (rollback, marking the
+    backup failed, closing the session) must never overlap the in-flight write
+    """
+    future = asyncio.ensure_future(asyncio.to_thread(fn, *args, **kwargs))
+    try:
+        return await asyncio.shield(future)
+    except asyncio.CancelledError:
+        while not future.done():
+            try:
+                await asyncio.wait({future})
+            except asyncio.CancelledError:
+                continue
+        raise
+
+
+def shutdown_process_pool() -> None:
+    """Stop pool workers (called on application shutdown)"""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+        logger.info("CPU process pool stopped")
@@ -0,0 +1,62 @@
+"""
+Shared HTTP clients
+Application-scoped, pooled httpx.AsyncClients reused by every outbound
+WhatsApp (Graph API) and Baileys call instead of one client per call
+"""
+
+from typing import Dict
+import httpx
+from app.core.config import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+GRAPH = "graph"
+BAILEYS = "baileys"
+
+_clients: Dict[str, httpx.AsyncClient] = {}
+
+
+def _build_client(name: str) -> httpx.AsyncClient:
+    limits = httpx.Limits(
+        max_connections=settings.HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY_SECONDS,
+    )
+    if name == GRAPH:
+        # Many concurrent backups multiplex well over HTTP/2 to graph.facebook.com
+        return httpx.AsyncClient(
+            timeout=httpx.Timeout(30.0, connect=10.0),
+            limits=limits,
+            http2=settings.HTTP2_ENABLED,
+        )
+    if name == BAILEYS:
+        return httpx.AsyncClient(timeout=httpx.Timeout(30.0, connect=10.0), limits=limits)
+    raise ValueError(f"Unknown HTTP client: {name}")
+
+
+def get_http_client(name: str) -> httpx.AsyncClient:
+    """
+    Returns the shared client for `name` ('graph' or 'baileys')
+    Created on first use so workers and scripts work without the API lifespan
+    """
+    client = _clients.get(name)
+    if client is None or client.is_closed:
+        client = _build_client(name)
+        _clients[name] = client
+    return client
+
+
+def start_http_clients() -> None:
+    """Create all shared clients up front (called from the app lifespan)"""
+    for name in (GRAPH, BAILEYS):
+        get_http_client(name)
+    logger.info("HTTP client pools started")
+
+
+async def close_http_clients() -> None:
+    """Close pooled connections on shutdown"""
+    for name, client in list(_clients.items()):
+        await client.aclose()
+        del _clients[name]
+    logger.info("HTTP client pools closed")
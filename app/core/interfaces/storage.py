@@ -1,4 +1,6 @@
 from abc import ABC, abstractmethod
+from io import BytesIO
+from typing import BinaryIO, Iterable
 
 class StorageProvider(ABC):
     @abstractmethod
@@ -10,3 +12,23 @@ class StorageProvider(ABC):
     def get_file(self, path: str) -> bytes:
         """Retrieve content from storage."""
         pass
+
+    def save_stream(self, filename: str, chunks: Iterable[bytes]) -> str:
+        """Save content produced in chunks; providers that can write incrementally override this."""
+        return self.save_file(filename, b"".join(chunks))
+
+    def open_file(self, path: str) -> BinaryIO:
+        """Open stored content for reading; providers that can stream override this."""
+        return BytesIO(self.get_file(path))
+
+    def exists(self, path: str) -> bool:
+        """Whether the path/identifier still refers to stored content."""
+        try:
+            self.get_file(path)
+            return True
+        except (FileNotFoundError, KeyError):
+            return False
+
+    def delete_file(self, path: str) -> None:
+        """Remove stored content; a no-op for providers that don't support deletion."""
+        pass
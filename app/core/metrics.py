@@ -0,0 +1,52 @@
+"""
+In-process metrics registry
+Counters, gauges and timing summaries exposed as JSON on /metrics
+"""
+
+import threading
+from collections import defaultdict
+from typing import Any, Dict
+
+
+class Metrics:
+    """Thread-safe registry shared by the API, schedulers and workers of one process"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, float] = defaultdict(float)
+        self._gauges: Dict[str, float] = {}
+        self._summaries: Dict[str, Dict[str, float]] = {}
+    
+    def incr(self, name: str, value: float = 1) -> None:
+        """Increase a monotonic counter"""
+        with self._lock:
+            self._counters[name] += value
+    
+    def set(self, name: str, value: float) -> None:
+        """Set a gauge to its current value"""
+        with self._lock:
+            self._gauges[name] = value
+    
+    def observe(self, name: str, value: float) -> None:
+        """Record one observation (e.g. a duration) into a count/sum/max summary"""
+        with self._lock:
+            summary = self._summaries.setdefault(name, {"count": 0, "sum": 0.0, "max": 0.0})
+            summary["count"] += 1
+            summary["sum"] += value
+            summary["max"] = max(summary["max"], value)
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """Copy of every metric, safe to serialize"""
+        with self._lock:
+            summaries = {
+                name: {**s, "avg": s["sum"] / s["count"] if s["count"] else 0.0}
+                for name, s in self._summaries.items()
+            }
+            return {
+                "counters": dict(self._counters),
+                "gauges": dict(self._gauges),
+                "summaries": summaries,
+            }
+
+
+metrics = Metrics()
@@ -0,0 +1,72 @@
+"""
+Authenticated user snapshots
+Request authentication reads a small, cached copy of the user instead of
+loading the row on every request. Any update to a user drops its entry when
+the change commits; other processes pick it up within AUTH_PRINCIPAL_CACHE_SECONDS.
+"""
+
+from typing import NamedTuple, Optional
+from uuid import UUID
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.models.user import User
+
+
+class UserPrincipal(NamedTuple):
+    """What endpoints need to know about the caller (no credentials)"""
+    id: UUID
+    email: str
+    full_name: Optional[str]
+    phone_number: Optional[str]
+    plan_type: Optional[str]
+    plan_status: Optional[str]
+    backup_frequency_hours: Optional[int]
+    whatsapp_connected: bool  # Pro: Business API credentials saved
+    baileys_connected: bool  # Express: QR session linked
+    
+    @classmethod
+    def from_user(cls, user: User) -> "UserPrincipal":
+        return cls(
+            id=user.id,
+            email=user.email,
+            full_name=user.full_name,
+            phone_number=user.phone_number,
+            plan_type=user.plan_type,
+            plan_status=user.plan_status,
+            backup_frequency_hours=user.backup_frequency_hours,
+            whatsapp_connected=bool(user.whatsapp_phone_id and user.whatsapp_access_token),
+            baileys_connected=bool(user.baileys_session_id),
+        )
+
+
+principal_cache = TTLCache(
+    "user_principals",
+    ttl=settings.AUTH_PRINCIPAL_CACHE_SECONDS,
+    max_size=settings.AUTH_PRINCIPAL_CACHE_SIZE
+)
+
+_CHANGED_KEY = "changed_user_ids"
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _user_changed(mapper, connection, target: User) -> None:
+    # Dropped now and again on commit: a request that reads the old row
+    # between the flush and the commit could otherwise cache it again
+    principal_cache.invalidate(target.id)
+    session = Session.object_session(target)
+    if session is not None:
+        session.info.setdefault(_CHANGED_KEY, set()).add(target.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed(session: Session) -> None:
+    for user_id in session.info.pop(_CHANGED_KEY, ()):
+        principal_cache.invalidate(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changes(session: Session) -> None:
+    session.info.pop(_CHANGED_KEY, None)
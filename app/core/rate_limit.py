@@ -0,0 +1,73 @@
+"""
+Login throttling
+Failed logins are counted per account and per client IP in a sliding window;
+a key over its limit is refused before any password hashing is done
+"""
+
+from collections import deque
+from typing import Deque, Dict, Hashable
+from app.core.config import settings
+from app.core.metrics import metrics
+import threading
+import time
+
+
+class FailureThrottle:
+    """
+    Sliding-window failure counter (in-process, so limits apply per API process)
+    At most `max_keys` keys are tracked; the least recently failing key is dropped first.
+    """
+    
+    def __init__(self, name: str, max_failures: int, window_seconds: float, max_keys: int = 100_000):
+        self.name = name
+        self.max_failures = max_failures
+        self.window_seconds = window_seconds
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        self._failures: Dict[Hashable, Deque[float]] = {}
+    
+    def _prune(self, key: Hashable, now: float) -> Deque[float]:
+        failures = self._failures.get(key)
+        if failures is None:
+            return deque()
+        while failures and failures[0] <= now - self.window_seconds:
+            failures.popleft()
+        if not failures:
+            del self._failures[key]
+        return failures
+    
+    def retry_after(self, key: Hashable) -> float:
+        """Seconds until `key` may try again, 0 when it isn't blocked"""
+        now = time.monotonic()
+        with self._lock:
+            failures = self._prune(key, now)
+            if len(failures) < self.max_failures:
+                return 0.0
+            # Allowed again once enough failures age out of the window
+            oldest_counted = failures[len(failures) - self.max_failures]
+        metrics.incr(f"login_throttle.{self.name}.blocked")
+        return max(oldest_counted + self.window_seconds - now, 1.0)
+    
+    def record_failure(self, key: Hashable) -> None:
+        now = time.monotonic()
+        with self._lock:
+            failures = self._failures.pop(key, None)
+            if failures is None:
+                if len(self._failures) >= self.max_keys:
+                    self._failures.pop(next(iter(self._failures)), None)
+                failures = deque(maxlen=self.max_failures)
+            failures.append(now)
+            # Re-inserted last: dict order tracks the most recent failure
+            self._failures[key] = failures
+    
+    def reset(self, key: Hashable) -> None:
+        with self._lock:
+            self._failures.pop(key, None)
+
+
+account_login_throttle = FailureThrottle(
+    "account", settings.LOGIN_MAX_FAILURES_PER_ACCOUNT, settings.LOGIN_FAILURE_WINDOW_SECONDS
+)
+ip_login_throttle = FailureThrottle(
+    "ip", settings.LOGIN_MAX_FAILURES_PER_IP, settings.LOGIN_FAILURE_WINDOW_SECONDS
+)
@@ -1,5 +1,5 @@
 from datetime import datetime, timedelta
-from typing import Optional, Any
+from typing import Optional, Any, Tuple
 from jose import jwt
 from passlib.context import CryptContext
 from app.core.config import settings
@@ -9,11 +9,40 @@ SECRET_KEY = "YOUR_SUPER_SECRET_KEY_CHANGE_THIS_IN_PROD"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30 * 24 * 60 # 1 Month for MVP convenience
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Hashes made with any other cost are flagged by needs_update / verify_and_update
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__max_rounds=settings.BCRYPT_ROUNDS,
+)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
+def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    Check a password and rehash it when the stored hash uses an outdated scheme or cost
+    
+    Returns:
+        (valid, new_hash) - new_hash is None unless the stored hash should be replaced
+    """
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+_dummy_hash: Optional[str] = None
+
+def verify_dummy_password(plain_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    Spend the same bcrypt work as verify_and_update_password when there is no user,
+    so login timing doesn't reveal which emails are registered. Always fails.
+    """
+    global _dummy_hash
+    if _dummy_hash is None:
+        _dummy_hash = pwd_context.hash("dummy-password-for-unknown-accounts")
+    pwd_context.verify(plain_password, _dummy_hash)
+    return False, None
+
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
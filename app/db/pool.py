@@ -0,0 +1,94 @@
+"""
+Connection pool settings and metrics
+Every engine gets its pool size, timeouts and Postgres statement_timeout from
+Settings according to its role, and reports checkout wait and saturation
+"""
+
+from typing import Any, Dict
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from app.core.config import settings
+from app.core.metrics import metrics
+import time
+
+API, READ, WORKER = "api", "read", "worker"
+
+
+class _PoolMetrics:
+    """Times each checkout (including the wait for a free connection) and tracks saturation"""
+    
+    role = API
+    
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            metrics.incr(f"db.{self.role}.checkout_timeouts")
+            raise
+        finally:
+            metrics.observe(f"db.{self.role}.checkout_wait_seconds", time.perf_counter() - start)
+            self._report()
+    
+    def _do_return_conn(self, record):
+        try:
+            return super()._do_return_conn(record)
+        finally:
+            self._report()
+    
+    def _report(self) -> None:
+        in_use = self.checkedout()
+        capacity = self.size() + max(self._max_overflow, 0)
+        metrics.set(f"db.{self.role}.connections_in_use", in_use)
+        metrics.set(f"db.{self.role}.pool_saturation", in_use / capacity if capacity else 0.0)
+
+
+class InstrumentedQueuePool(_PoolMetrics, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_PoolMetrics, AsyncAdaptedQueuePool):
+    pass
+
+
+def _pool_class(base: type, role: str) -> type:
+    # A subclass per role: pools are re-created on dispose() with the same class
+    return type(f"{role.title()}{base.__name__}", (base,), {"role": role})
+
+
+def statement_timeout_ms(role: str) -> int:
+    if role == WORKER:
+        return settings.DB_WORKER_STATEMENT_TIMEOUT_MS
+    return settings.DB_API_STATEMENT_TIMEOUT_MS
+
+
+def engine_options(role: str, is_async: bool = False) -> Dict[str, Any]:
+    """
+    Keyword arguments for create_engine / create_async_engine
+    
+    Args:
+        role: API (request handling), READ (replica browsing, same limits as API)
+            or WORKER (backups, jobs, schedulers, exports)
+        is_async: Options for the asyncpg engine instead of psycopg2
+    
+    Returns:
+        Pool class, sizes, timeouts and connect_args setting statement_timeout
+    """
+    worker = role == WORKER
+    timeout = statement_timeout_ms(role)
+    if is_async:
+        connect_args = {"server_settings": {"statement_timeout": str(timeout)}}
+    else:
+        connect_args = {"options": f"-c statement_timeout={timeout}"}
+    return {
+        "poolclass": _pool_class(
+            InstrumentedAsyncQueuePool if is_async else InstrumentedQueuePool,
+            f"{role}_async" if is_async else role
+        ),
+        "pool_size": settings.DB_WORKER_POOL_SIZE if worker else settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_WORKER_MAX_OVERFLOW if worker else settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT_SECONDS,
+        "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "connect_args": connect_args,
+    }
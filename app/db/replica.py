@@ -0,0 +1,121 @@
+"""
+Read-replica routing
+Read-only endpoints take their session from get_read_db / get_async_read_db,
+which use the replica (DATABASE_READ_URL) while its replication lag stays under
+DB_READ_MAX_LAG_SECONDS and the primary otherwise
+"""
+
+from typing import AsyncIterator, Iterator, Optional
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.db.session import (
+    SessionLocal, AsyncSessionLocal, ReadSessionLocal, AsyncReadSessionLocal, read_engine, async_read_engine
+)
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Seconds since the last replayed transaction, 0 when the WAL receiver is streaming
+# and nothing is waiting to be replayed (an idle primary would otherwise look like
+# a lagging replica). A stopped receiver has nothing to replay either, so without
+# streaming the replay age counts; NULL (never replayed) means unusable
+LAG_SQL = """
+SELECT CASE
+    WHEN NOT pg_is_in_recovery() THEN 0
+    WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn()
+        AND EXISTS (SELECT 1 FROM pg_stat_wal_receiver WHERE status = 'streaming') THEN 0
+    ELSE extract(epoch FROM now() - pg_last_xact_replay_timestamp())
+END
+"""
+
+
+def _lag(value) -> Optional[float]:
+    return None if value is None else float(value)
+
+
+class ReplicaMonitor:
+    """Replication lag, measured at most every DB_READ_LAG_CHECK_SECONDS"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._lag: Optional[float] = None  # None: not measured yet, or the check failed
+        self._checked_at = 0.0
+    
+    def _claim_check(self) -> bool:
+        """True for the one caller that should measure now; everyone else reuses the last value"""
+        with self._lock:
+            now = time.monotonic()
+            if now - self._checked_at < settings.DB_READ_LAG_CHECK_SECONDS:
+                return False
+            self._checked_at = now
+            return True
+    
+    def _record(self, lag: Optional[float]) -> None:
+        with self._lock:
+            self._lag = lag
+        if lag is None:
+            metrics.incr("db.replica.check_failures")
+        else:
+            metrics.set("db.replica.lag_seconds", lag)
+    
+    def usable(self) -> bool:
+        lag = self._lag
+        return lag is not None and lag <= settings.DB_READ_MAX_LAG_SECONDS
+    
+    def refresh(self) -> None:
+        if not self._claim_check():
+            return
+        try:
+            with read_engine.connect() as conn:
+                self._record(_lag(conn.execute(text(LAG_SQL)).scalar()))
+        except Exception as e:
+            logger.warning(f"Replica lag check failed, reading from the primary: {e}")
+            self._record(None)
+    
+    async def refresh_async(self) -> None:
+        if not self._claim_check():
+            return
+        try:
+            async with async_read_engine.connect() as conn:
+                self._record(_lag((await conn.execute(text(LAG_SQL))).scalar()))
+        except Exception as e:
+            logger.warning(f"Replica lag check failed, reading from the primary: {e}")
+            self._record(None)
+
+
+replica_monitor = ReplicaMonitor()
+
+
+def _route(use_replica: bool) -> None:
+    metrics.incr("db.read.replica" if use_replica else "db.read.primary")
+
+
+def get_read_db() -> Iterator[Session]:
+    """Session for read-only endpoints: the replica when configured and fresh enough, else the primary"""
+    use_replica = False
+    if ReadSessionLocal is not None:
+        replica_monitor.refresh()
+        use_replica = replica_monitor.usable()
+    _route(use_replica)
+    db = ReadSessionLocal() if use_replica else SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_read_db() -> AsyncIterator[AsyncSession]:
+    """get_read_db for `async def` endpoints"""
+    use_replica = False
+    if AsyncReadSessionLocal is not None:
+        await replica_monitor.refresh_async()
+        use_replica = replica_monitor.usable()
+    _route(use_replica)
+    factory = AsyncReadSessionLocal if use_replica else AsyncSessionLocal
+    async with factory() as db:
+        yield db
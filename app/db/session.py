@@ -1,10 +1,48 @@
+from typing import AsyncIterator
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 from app.core.config import settings
+from app.db.pool import API, READ, WORKER, engine_options
 
-engine = create_engine(settings.DATABASE_URL)
+# Request handling: short statement_timeout so a runaway query can't hold a connection
+engine = create_engine(settings.DATABASE_URL, **engine_options(API))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Backups, jobs, schedulers and exports: own pool and a longer timeout, so
+# background work neither starves requests of connections nor hits their limit
+worker_engine = create_engine(settings.DATABASE_URL, **engine_options(WORKER))
+WorkerSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=worker_engine)
+
+
+def _with_asyncpg(database_url: str) -> str:
+    return make_url(database_url).set(drivername="postgresql+asyncpg").render_as_string(hide_password=False)
+
+
+def async_database_url() -> str:
+    """ASYNC_DATABASE_URL, or DATABASE_URL switched to the asyncpg driver"""
+    return settings.ASYNC_DATABASE_URL or _with_asyncpg(settings.DATABASE_URL)
+
+
+# Used by `async def` endpoints so queries await instead of blocking the event loop.
+# Objects stay loaded after commit: async code can't lazy-load expired attributes.
+async_engine = create_async_engine(async_database_url(), **engine_options(API, is_async=True))
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+# Optional streaming replica for read-only browsing (see app/db/replica.py for routing)
+read_engine = None
+ReadSessionLocal = None
+async_read_engine = None
+AsyncReadSessionLocal = None
+if settings.DATABASE_READ_URL:
+    read_engine = create_engine(settings.DATABASE_READ_URL, **engine_options(READ))
+    ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+    async_read_engine = create_async_engine(
+        _with_asyncpg(settings.DATABASE_READ_URL), **engine_options(READ, is_async=True)
+    )
+    AsyncReadSessionLocal = async_sessionmaker(async_read_engine, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
 def get_db():
@@ -13,3 +51,7 @@ def get_db():
         yield db
     finally:
         db.close()
+
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -1,4 +1,5 @@
 import os
+from typing import BinaryIO, Iterable
 from app.core.interfaces.storage import StorageProvider
 
 class LocalStorageProvider(StorageProvider):
@@ -16,3 +17,25 @@ class LocalStorageProvider(StorageProvider):
     def get_file(self, path: str) -> bytes:
         with open(path, "rb") as f:
             return f.read()
+
+    def save_stream(self, filename: str, chunks: Iterable[bytes]) -> str:
+        # Write to a temp name and rename, so readers never see a partial file
+        file_path = os.path.join(self.upload_dir, filename)
+        tmp_path = f"{file_path}.part"
+        with open(tmp_path, "wb") as f:
+            for chunk in chunks:
+                f.write(chunk)
+        os.replace(tmp_path, file_path)
+        return file_path
+
+    def open_file(self, path: str) -> BinaryIO:
+        return open(path, "rb")
+
+    def exists(self, path: str) -> bool:
+        return os.path.exists(path)
+
+    def delete_file(self, path: str) -> None:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,215 @@
+"""
+Meta Graph API Client
+Rate-limit-aware request layer shared by every Graph API call: paces requests
+from Meta's usage headers and retries throttled or failed requests
+"""
+
+import httpx
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.http import get_http_client, GRAPH
+from app.core.metrics import metrics
+from typing import Any, Optional
+import hashlib
+import json
+import logging
+import random
+import asyncio
+import time
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Graph error codes returned (usually with HTTP 400) when a limit is hit
+THROTTLE_ERROR_CODES = {4, 17, 32, 613, 80004, 80006, 80007}
+
+
+class TokenBudget:
+    """
+    Pacing state for one access token, shared by all concurrent backups using it
+    
+    Meta reports usage as a percentage of the current window. Below
+    GRAPH_THROTTLE_START_PERCENT requests go out unpaced; above it each
+    request reserves a slot spaced further apart as usage approaches 100%,
+    and a reported time-to-regain-access blocks the token until then.
+    """
+    
+    def __init__(self):
+        self.usage = 0.0
+        self.next_slot = 0.0
+        self.blocked_until = 0.0
+    
+    def interval(self) -> float:
+        start = settings.GRAPH_THROTTLE_START_PERCENT
+        if self.usage <= start:
+            return 0.0
+        pressure = min(1.0, (self.usage - start) / (100 - start))
+        return settings.GRAPH_MAX_REQUEST_INTERVAL_SECONDS * pressure ** 2
+    
+    async def wait_turn(self) -> None:
+        """Sleep until this request's slot (slots are reserved synchronously, so no lock is needed)"""
+        now = time.monotonic()
+        start = max(now, self.next_slot, self.blocked_until)
+        self.next_slot = start + self.interval()
+        delay = start - now
+        if delay > 0:
+            metrics.observe("graph_api_throttle_wait_seconds", delay)
+            await asyncio.sleep(delay)
+    
+    def block_for(self, seconds: float) -> None:
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+    
+    def update(self, headers: httpx.Headers) -> None:
+        """Read X-App-Usage / X-Business-Use-Case-Usage from a response"""
+        usage = 0.0
+        regain_minutes = 0.0
+        
+        app_usage = _parse_json_header(headers.get("x-app-usage"))
+        if isinstance(app_usage, dict):
+            usage = max([usage] + [float(v) for v in app_usage.values() if isinstance(v, (int, float))])
+        
+        buc_usage = _parse_json_header(headers.get("x-business-use-case-usage"))
+        if isinstance(buc_usage, dict):
+            for entries in buc_usage.values():
+                for entry in entries if isinstance(entries, list) else []:
+                    for key in ("call_count", "total_cputime", "total_time"):
+                        value = entry.get(key)
+                        if isinstance(value, (int, float)):
+                            usage = max(usage, float(value))
+                    regain = entry.get("estimated_time_to_regain_access")
+                    if isinstance(regain, (int, float)):
+                        regain_minutes = max(regain_minutes, float(regain))
+        
+        self.usage = usage
+        if regain_minutes > 0:
+            self.block_for(regain_minutes * 60)
+        metrics.set("graph_api_usage_percent", usage)
+
+
+# Budgets of recently used tokens; idle ones expire, and the LRU bound keeps
+# long-lived workers from holding one per token ever seen
+_budgets = TTLCache(
+    "graph_token_budgets",
+    ttl=settings.GRAPH_TOKEN_BUDGET_IDLE_SECONDS,
+    max_size=settings.GRAPH_TOKEN_BUDGET_MAX_TOKENS
+)
+
+
+def get_token_budget(access_token: str) -> TokenBudget:
+    """Budget shared by every client using this token (keyed by hash, never the raw token)"""
+    key = hashlib.sha256(access_token.encode()).hexdigest()
+    budget = _budgets.get(key) or TokenBudget()
+    _budgets.set(key, budget)  # Every use restarts the idle timeout
+    return budget
+
+
+def _parse_json_header(value: Optional[str]) -> Any:
+    if not value:
+        return None
+    try:
+        return json.loads(value)
+    except ValueError:
+        return None
+
+
+def _is_throttled(response: httpx.Response) -> bool:
+    if response.status_code == 429:
+        return True
+    if response.status_code not in (400, 403):
+        return False
+    try:
+        code = response.json().get("error", {}).get("code")
+    except ValueError:
+        return False
+    return code in THROTTLE_ERROR_CODES
+
+
+def _backoff(attempt: int, retry_after: Optional[str] = None) -> float:
+    """Exponential backoff with full jitter, honouring Retry-After (up to GRAPH_RETRY_MAX_SECONDS)"""
+    if retry_after and retry_after.isdigit():
+        return min(float(retry_after), settings.GRAPH_RETRY_MAX_SECONDS)
+    ceiling = min(
+        settings.GRAPH_RETRY_MAX_SECONDS,
+        settings.GRAPH_RETRY_BASE_SECONDS * 2 ** attempt
+    )
+    return random.uniform(0, ceiling)
+
+
+class GraphAPIClient:
+    """
+    Graph API requests for one access token
+    Retries 429/5xx, throttling error codes and transport errors, and raises
+    once retries are exhausted so callers never mistake a failure for the end of data
+    """
+    
+    def __init__(self, access_token: str):
+        self.headers = {
+            "Authorization": f"Bearer {access_token}",
+            "Content-Type": "application/json"
+        }
+        self.budget = get_token_budget(access_token)
+    
+    async def request(
+        self,
+        method: str,
+        url: str,
+        max_retries: Optional[int] = None,
+        **kwargs
+    ) -> httpx.Response:
+        """
+        Send a request, pacing and retrying as needed
+        
+        Args:
+            method: HTTP method
+            url: Full Graph API URL
+            max_retries: Override GRAPH_MAX_RETRIES (e.g. fewer for interactive calls)
+            **kwargs: Passed to httpx (params, json, timeout, ...)
+        
+        Returns:
+            The successful response
+        
+        Raises:
+            httpx.HTTPError: When the request still fails after the last retry
+        """
+        if max_retries is None:
+            max_retries = settings.GRAPH_MAX_RETRIES
+        client = get_http_client(GRAPH)
+        attempt = 0
+        while True:
+            await self.budget.wait_turn()
+            metrics.incr("graph_api_requests")
+            try:
+                response = await client.request(method, url, headers=self.headers, **kwargs)
+            except httpx.TransportError as e:
+                if attempt >= max_retries:
+                    raise
+                delay = _backoff(attempt)
+                logger.warning(f"Graph API transport error ({e}), retrying in {delay:.1f}s")
+            else:
+                self.budget.update(response.headers)
+                throttled = _is_throttled(response)
+                if not throttled and response.status_code not in RETRY_STATUSES:
+                    response.raise_for_status()
+                    return response
+                if attempt >= max_retries:
+                    response.raise_for_status()
+                delay = _backoff(attempt, response.headers.get("retry-after"))
+                if throttled:
+                    # Every backup sharing this token waits, not just this one
+                    metrics.incr("graph_api_throttled")
+                    self.budget.block_for(delay)
+                logger.warning(
+                    f"Graph API returned {response.status_code}, retrying in {delay:.1f}s "
+                    f"(attempt {attempt + 1}/{max_retries})"
+                )
+            
+            metrics.incr("graph_api_retries")
+            attempt += 1
+            await asyncio.sleep(delay)
+    
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+    
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
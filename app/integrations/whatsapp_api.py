@@ -4,17 +4,32 @@ Integrates with Meta's official WhatsApp Business API
 """
 
 import httpx
-from typing import List, Dict, Any
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.integrations.graph_client import GraphAPIClient
+from typing import List, Dict, Any, Optional, AsyncIterator
 from sqlalchemy.orm import Session
 from app.models.user import User
-from app.models.message import Message
-from app.models.backup import Backup
+from app.services.ingestion import MessageIngestor, MessagePage, ingest_pages, normalize_api_message
+from app.services.sync_state import get_high_water_mark
+from app.core.executors import to_thread_shielded
+from app.services.checkpoints import start_backup, complete_backup, fail_backup, checkpoint_writer
 from datetime import datetime, timedelta
 from uuid import UUID
+import asyncio
+import hashlib
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
+# verify_connection results, keyed by (phone_number_id, token hash)
+connection_status_cache = TTLCache(
+    "whatsapp_status",
+    ttl=settings.WHATSAPP_STATUS_CACHE_SECONDS,
+    stale_ttl=settings.WHATSAPP_STATUS_STALE_SECONDS
+)
+
 
 class WhatsAppAPIService:
     """
@@ -26,52 +41,79 @@ class WhatsAppAPIService:
         self.api_url = "https://graph.facebook.com/v18.0"
         self.phone_id = phone_number_id
         self.token = access_token
-        self.headers = {
-            "Authorization": f"Bearer {self.token}",
-            "Content-Type": "application/json"
-        }
+        self.client = GraphAPIClient(self.token)
     
-    async def fetch_messages(self, days_back: int = 30) -> List[Dict[str, Any]]:
+    async def iter_message_pages(
+        self,
+        days_back: int = 30,
+        since: Optional[datetime] = None,
+        after: Optional[str] = None
+    ) -> AsyncIterator[MessagePage]:
         """
-        Fetch messages from WhatsApp Business API
-        Uses pagination to get all messages from the last X days
+        Stream messages from WhatsApp Business API one page at a time
+        Covers the last X days, or only messages newer than the stored
+        high-water mark when `since` is given
         
         Args:
             days_back: Number of days to look back for messages
+            since: Timestamp of the newest message already stored
+            after: Paging cursor to resume from (checkpoint of an earlier backup)
             
-        Returns:
-            List of message dictionaries
+        Yields:
+            MessagePage with the page's messages and its 'after' cursor
         """
-        logger.info(f"Fetching messages from WhatsApp API (last {days_back} days)")
+        if since:
+            cutoff = int(since.timestamp())
+            logger.info(f"Fetching messages from WhatsApp API (since {since.isoformat()})")
+        else:
+            cutoff = int(time.time()) - days_back * 24 * 60 * 60
+            logger.info(f"Fetching messages from WhatsApp API (last {days_back} days)")
         
-        all_messages = []
         url = f"{self.api_url}/{self.phone_id}/messages"
-        params = {"limit": 100}
+        params = {"limit": 100, "since": cutoff}
+        if after:
+            params["after"] = after
+            logger.info(f"Resuming from cursor {after}")
+        total = 0
         
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            while True:
-                try:
-                    response = await client.get(url, headers=self.headers, params=params)
-                    response.raise_for_status()
-                    data = response.json()
-                    
-                    if "data" in data:
-                        messages = data["data"]
-                        all_messages.extend(messages)
-                        logger.info(f"Fetched {len(messages)} messages")
-                    
-                    # Check for next page
-                    if "paging" in data and "next" in data["paging"]:
-                        url = data["paging"]["next"]
-                        params = {}  # Next URL already has params
-                    else:
-                        break
-                        
-                except httpx.HTTPError as e:
-                    logger.error(f"Error fetching messages: {e}")
-                    break
+        while True:
+            # Throttling and transient errors are retried by the client;
+            # anything else fails the backup (resumable from its checkpoint)
+            # instead of passing a truncated history off as complete
+            response = await self.client.get(url, params=params)
+            data = response.json()
+            
+            cursors = data.get("paging", {}).get("cursors", {})
+            messages = data.get("data", [])
+            # Messages arrive newest first: once a page reaches the cutoff,
+            # everything after it is already stored (or out of the window)
+            newer = [m for m in messages if int(m.get("timestamp", 0)) >= cutoff]
+            total += len(newer)
+            logger.info(f"Fetched {len(newer)} messages")
+            
+            if newer:
+                yield MessagePage(newer, cursors.get("after"))
+            
+            if len(newer) < len(messages):
+                break
+            
+            # Check for next page
+            if "paging" in data and "next" in data["paging"]:
+                url = data["paging"]["next"]
+                params = {}  # Next URL already has params
+            else:
+                break
         
-        logger.info(f"Total messages fetched: {len(all_messages)}")
+        logger.info(f"Total messages fetched: {total}")
+    
+    async def fetch_messages(self, days_back: int = 30, since: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """
+        Fetch all messages into a list (see iter_message_pages)
+        Prefer streaming the pages for large accounts
+        """
+        all_messages = []
+        async for page in self.iter_message_pages(days_back=days_back, since=since):
+            all_messages.extend(page.messages)
         return all_messages
     
     async def create_backup(self, user_id: UUID, db: Session) -> Dict[str, Any]:
@@ -87,95 +129,61 @@ class WhatsAppAPIService:
         """
         logger.info(f"Creating WhatsApp API backup for user {user_id}")
         
-        user = db.query(User).filter(User.id == user_id).first()
+        # Blocking DB work runs in a thread so the event loop keeps serving other jobs
+        user = await to_thread_shielded(db.get, User, user_id)
         if not user:
             raise ValueError("User not found")
         
         if not user.whatsapp_phone_id or not user.whatsapp_access_token:
             raise ValueError("WhatsApp API credentials not configured")
+        owner_phone = user.phone_number
         
-        # Create backup record
-        backup = Backup(
-            user_id=user_id,
-            backup_date=datetime.utcnow(),
-            status="in_progress",
-            backup_source="api"  # Meta API
-        )
-        db.add(backup)
-        db.commit()
-        db.refresh(backup)
+        # Resume a failed/interrupted backup from its checkpoint, or start a new one
+        backup, resume_from = await to_thread_shielded(start_backup, user_id, "api", db)
+        backup_id, backup_date = backup.id, backup.backup_date
         
         try:
-            # Fetch messages from API
-            messages_data = await self.fetch_messages(days_back=90)
+            # Stream only messages newer than the last successful backup,
+            # writing each page while the next one is being fetched.
+            # Every batch commits and checkpoints the cursor of the last complete page.
+            since = await to_thread_shielded(get_high_water_mark, user_id, "api", db)
+            ingestor = MessageIngestor(
+                db, user_id, backup_id, source="api",
+                checkpoint=checkpoint_writer(backup, db)
+            )
             
-            # Save messages to database
-            saved_count = 0
-            contacts = set()
+            stats = await ingest_pages(
+                self.iter_message_pages(days_back=90, since=since, after=resume_from),
+                ingestor,
+                lambda msg_data: normalize_api_message(msg_data, owner_phone)
+            )
             
-            for msg_data in messages_data:
-                try:
-                    # Extract message details from Meta API payload
-                    from_number = msg_data.get("from", "")
-                    contact_name = msg_data.get("profile", {}).get("name", "Unknown")
-                    message_type = msg_data.get("type", "text")
-                    
-                    # Extract message text based on type
-                    message_text = ""
-                    if message_type == "text":
-                        message_text = msg_data.get("text", {}).get("body", "")
-                    elif message_type == "image":
-                        message_text = f"[Image: {msg_data.get('image', {}).get('caption', 'No caption')}]"
-                    elif message_type == "video":
-                        message_text = f"[Video: {msg_data.get('video', {}).get('caption', 'No caption')}]"
-                    elif message_type == "audio":
-                        message_text = "[Audio message]"
-                    elif message_type == "document":
-                        message_text = f"[Document: {msg_data.get('document', {}).get('filename', 'Unknown')}]"
-                    
-                    # Create message record
-                    message = Message(
-                        user_id=user_id,
-                        backup_id=backup.id,
-                        whatsapp_message_id=msg_data.get("id"),
-                        contact_name=contact_name,
-                        contact_phone=from_number,
-                        message_text=message_text,
-                        message_type=message_type,
-                        source="api",  # From Meta API
-                        timestamp=datetime.fromtimestamp(int(msg_data.get("timestamp", 0))),
-                        is_from_me=(from_number == user.phone_number)
-                    )
-                    db.add(message)
-                    saved_count += 1
-                    contacts.add(from_number)
-                    
-                except Exception as e:
-                    logger.error(f"Error saving message: {e}")
-                    continue
+            # Update backup status and move the high-water mark forward
+            saved_count, total_contacts = await to_thread_shielded(
+                complete_backup, backup, ingestor, db
+            )
             
-            # Update backup status
-            backup.status = "completed"
-            backup.total_messages = saved_count
-            backup.total_contacts = len(contacts)
-            db.commit()
-            
-            logger.info(f"Backup completed: {saved_count} messages, {len(contacts)} contacts")
+            logger.info(
+                f"Backup completed: {saved_count} new messages "
+                f"({stats['skipped']} already stored), {total_contacts} contacts"
+            )
             
             return {
-                "backup_id": str(backup.id),
+                "backup_id": str(backup_id),
                 "total_messages": saved_count,
-                "total_contacts": len(contacts),
+                "skipped_messages": stats["skipped"],
+                "updated_messages": stats["updated"],
+                "total_contacts": total_contacts,
                 "status": "completed",
-                "backup_date": backup.backup_date.isoformat(),
+                "backup_date": backup_date.isoformat(),
                 "source": "api"
             }
             
-        except Exception as e:
-            # Mark backup as failed
-            backup.status = "failed"
-            backup.error_message = str(e)
-            db.commit()
+        except (Exception, asyncio.CancelledError) as e:
+            # Also on timeout/shutdown: the in-flight batch write has finished by now.
+            # Discard the partial batch (committed batches stay checkpointed),
+            # then mark backup as failed so the next run resumes it
+            await to_thread_shielded(fail_backup, backup, str(e) or "Interrupted", db)
             logger.error(f"Backup failed: {e}")
             raise
     
@@ -203,11 +211,9 @@ class WhatsAppAPIService:
         }
         
         try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.post(url, headers=self.headers, json=payload)
-                response.raise_for_status()
-                logger.info("Test message sent successfully")
-                return True
+            await self.client.post(url, json=payload, timeout=10.0, max_retries=1)
+            logger.info("Test message sent successfully")
+            return True
                 
         except httpx.HTTPError as e:
             logger.error(f"Failed to send test message: {e}")
@@ -225,17 +231,15 @@ class WhatsAppAPIService:
         url = f"{self.api_url}/{self.phone_id}"
         
         try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.get(url, headers=self.headers)
-                response.raise_for_status()
-                data = response.json()
+            response = await self.client.get(url, timeout=10.0, max_retries=1)
+            data = response.json()
                 
-                return {
-                    "connected": True,
-                    "phone_number_id": self.phone_id,
-                    "verified_name": data.get("verified_name", "Unknown"),
-                    "quality_rating": data.get("quality_rating", "Unknown")
-                }
+            return {
+                "connected": True,
+                "phone_number_id": self.phone_id,
+                "verified_name": data.get("verified_name", "Unknown"),
+                "quality_rating": data.get("quality_rating", "Unknown")
+            }
                 
         except httpx.HTTPError as e:
             logger.error(f"Connection verification failed: {e}")
@@ -243,3 +247,33 @@ class WhatsAppAPIService:
                 "connected": False,
                 "error": str(e)
             }
+    
+    async def verify_connection_cached(self) -> Dict[str, Any]:
+        """
+        verify_connection() through the status cache
+        Status polling is served from memory and refreshed in the background;
+        failed verifications are only cached briefly
+        """
+        return await connection_status_cache.get_or_load(
+            connection_cache_key(self.phone_id, self.token),
+            self.verify_connection,
+            ttl_for=lambda result: (
+                settings.WHATSAPP_STATUS_CACHE_SECONDS if result.get("connected")
+                else settings.WHATSAPP_STATUS_FAILURE_CACHE_SECONDS
+            )
+        )
+
+
+def connection_cache_key(phone_number_id: str, access_token: str) -> tuple:
+    """Status cache key (the token is hashed, never kept in memory as a key)"""
+    return (phone_number_id, hashlib.sha256(access_token.encode()).hexdigest())
+
+
+def invalidate_connection_status(phone_number_id: str, access_token: str) -> None:
+    """Drop the cached verification for these credentials"""
+    connection_status_cache.invalidate(connection_cache_key(phone_number_id, access_token))
+
+
+def remember_connection_status(phone_number_id: str, access_token: str, verification: Dict[str, Any]) -> None:
+    """Seed the cache with a verification that was just performed (e.g. on /connect)"""
+    connection_status_cache.set(connection_cache_key(phone_number_id, access_token), verification)
@@ -4,11 +4,15 @@ Python wrapper to communicate with Baileys Node.js server
 """
 
 import httpx
-from typing import Dict, Any, List
+from app.core.http import get_http_client, BAILEYS
+from typing import Dict, Any, List, Optional, AsyncIterator
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from app.models.user import User
-from app.models.message import Message
-from app.models.backup import Backup
+from app.services.ingestion import MessageIngestor, MessagePage, ingest_pages, normalize_baileys_message
+from app.services.sync_state import get_high_water_mark
+from app.core.executors import to_thread_shielded
+from app.services.checkpoints import start_backup, complete_backup, fail_backup, checkpoint_writer
 from datetime import datetime
 from uuid import UUID
 import logging
@@ -17,6 +21,16 @@ import asyncio
 logger = logging.getLogger(__name__)
 
 
+def _get_session_id(user_id: UUID) -> Optional[str]:
+    from app.db.session import WorkerSessionLocal
+    db = WorkerSessionLocal()
+    try:
+        user = db.get(User, user_id)
+        return user.baileys_session_id if user else None
+    finally:
+        db.close()
+
+
 class BaileysService:
     """
     Service to interact with Baileys Node.js server
@@ -25,22 +39,21 @@ class BaileysService:
     
     def __init__(self, baileys_server_url: str = "http://localhost:3000"):
         self.server_url = baileys_server_url
-        self.timeout = httpx.Timeout(30.0, connect=10.0)
     
-    async def generate_qr_code(self, user_id: UUID, db: Session) -> Dict[str, Any]:
+    async def generate_qr_code(self, user_id: UUID, db: AsyncSession) -> Dict[str, Any]:
         """
         Generate QR code for WhatsApp connection
         
         Args:
             user_id: User ID to generate QR for
-            db: Database session
+            db: Async database session
             
         Returns:
             Dictionary with QR code data (base64 image)
         """
         logger.info(f"Generating QR code for user {user_id}")
         
-        user = db.query(User).filter(User.id == user_id).first()
+        user = await db.get(User, user_id)
         if not user:
             raise ValueError("User not found")
         
@@ -49,94 +62,119 @@ class BaileysService:
         
         # Call Baileys server to generate QR
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.post(
-                    f"{self.server_url}/generate-qr",
-                    json={"session_id": session_id}
-                )
-                response.raise_for_status()
-                data = response.json()
+            client = get_http_client(BAILEYS)
+            response = await client.post(
+                f"{self.server_url}/generate-qr",
+                json={"session_id": session_id}
+            )
+            response.raise_for_status()
+            data = response.json()
                 
-                # Save session ID to user
-                user.baileys_session_id = session_id
-                db.commit()
+            # Save session ID to user
+            user.baileys_session_id = session_id
+            await db.commit()
                 
-                logger.info(f"QR generated successfully for {user_id}")
-                return data
+            logger.info(f"QR generated successfully for {user_id}")
+            return data
                 
         except httpx.HTTPError as e:
             logger.error(f"Failed to generate QR: {e}")
             raise Exception(f"Baileys server error: {str(e)}")
     
-    async def check_connection_status(self, user_id: UUID, db: Session) -> Dict[str, Any]:
+    async def check_connection_status(self, user_id: UUID, db: AsyncSession) -> Dict[str, Any]:
         """
         Check if WhatsApp is connected for this user
         
         Args:
             user_id: User ID to check
-            db: Database session
+            db: Async database session
             
         Returns:
             Dictionary with connection status
         """
-        user = db.query(User).filter(User.id == user_id).first()
+        user = await db.get(User, user_id)
         if not user or not user.baileys_session_id:
             return {"connected": False, "reason": "No session found"}
         
-        session_id = user.baileys_session_id
-        
+        return await self.session_status(user.baileys_session_id)
+    
+    async def session_status(self, session_id: str) -> Dict[str, Any]:
+        """Connection status of a Baileys session as reported by the server"""
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.get(
-                    f"{self.server_url}/status/{session_id}"
-                )
-                response.raise_for_status()
-                return response.json()
+            client = get_http_client(BAILEYS)
+            response = await client.get(
+                f"{self.server_url}/status/{session_id}"
+            )
+            response.raise_for_status()
+            return response.json()
                 
         except httpx.HTTPError as e:
             logger.error(f"Failed to check status: {e}")
             return {"connected": False, "error": str(e)}
     
-    async def fetch_messages(self, user_id: UUID, days_back: int = 30) -> List[Dict[str, Any]]:
+    async def iter_message_pages(
+        self,
+        session_id: str,
+        days_back: int = 30,
+        since: Optional[datetime] = None
+    ) -> AsyncIterator[MessagePage]:
+        """
+        Fetch messages from a Baileys session as MessagePages for ingest_pages
+        The server returns everything in one response, so this is a single page
+        
+        Args:
+            session_id: Baileys session ID
+            days_back: Number of days to look back
+            since: Only return messages at or after this timestamp (high-water mark)
+        """
+        payload = {"session_id": session_id, "days_back": days_back}
+        if since:
+            payload["since"] = int(since.timestamp())
+        
+        try:
+            client = get_http_client(BAILEYS)
+            response = await client.post(
+                f"{self.server_url}/fetch-messages",
+                json=payload
+            )
+            response.raise_for_status()
+            data = response.json()
+        except httpx.HTTPError as e:
+            logger.error(f"Failed to fetch messages: {e}")
+            raise
+        
+        messages = data.get("messages", [])
+        logger.info(f"Fetched {len(messages)} messages from Baileys")
+        if messages:
+            yield MessagePage(messages)
+    
+    async def fetch_messages(
+        self,
+        user_id: UUID,
+        days_back: int = 30,
+        since: Optional[datetime] = None
+    ) -> List[Dict[str, Any]]:
         """
         Fetch messages from Baileys session
         
         Args:
             user_id: User ID
             days_back: Number of days to look back
+            since: Only return messages at or after this timestamp (high-water mark)
             
         Returns:
             List of messages
         """
         logger.info(f"Fetching messages from Baileys for user {user_id}")
         
-        from app.db.session import SessionLocal
-        db = SessionLocal()
+        session_id = await asyncio.to_thread(_get_session_id, user_id)
+        if not session_id:
+            raise ValueError("No Baileys session found for user")
         
-        try:
-            user = db.query(User).filter(User.id == user_id).first()
-            if not user or not user.baileys_session_id:
-                raise ValueError("No Baileys session found for user")
-            
-            session_id = user.baileys_session_id
-            
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.post(
-                    f"{self.server_url}/fetch-messages",
-                    json={"session_id": session_id, "days_back": days_back}
-                )
-                response.raise_for_status()
-                data = response.json()
-                
-                messages = data.get("messages", [])
-                logger.info(f"Fetched {len(messages)} messages from Baileys")
-                return messages
-                
-        except httpx.HTTPError as e:
-            logger.error(f"Failed to fetch messages: {e}")
-            raise
-        finally:
-            db.close()
+        messages = []
+        async for page in self.iter_message_pages(session_id, days_back=days_back, since=since):
+            messages.extend(page.messages)
+        return messages
     
     async def create_backup(self, user_id: UUID, db: Session) -> Dict[str, Any]:
         """
@@ -151,119 +189,97 @@ class BaileysService:
         """
         logger.info(f"Creating Baileys backup for user {user_id}")
         
-        user = db.query(User).filter(User.id == user_id).first()
+        # Blocking DB work runs in a thread so the event loop keeps serving other jobs
+        user = await to_thread_shielded(db.get, User, user_id)
         if not user:
             raise ValueError("User not found")
         
-        if not user.baileys_session_id:
+        session_id = user.baileys_session_id
+        if not session_id:
             raise ValueError("No Baileys session found. Please connect WhatsApp first.")
         
         # Check connection status
-        status = await self.check_connection_status(user_id, db)
+        status = await self.session_status(session_id)
         if not status.get("connected"):
             raise ValueError("WhatsApp is not connected. Please scan QR code again.")
         
-        # Create backup record
-        backup = Backup(
-            user_id=user_id,
-            backup_date=datetime.utcnow(),
-            status="in_progress",
-            backup_source="baileys"  # From Baileys
-        )
-        db.add(backup)
-        db.commit()
-        db.refresh(backup)
+        # Create backup record (no paging cursor: only a backup interrupted by a dead worker is taken over)
+        backup, _ = await to_thread_shielded(start_backup, user_id, "baileys", db)
+        backup_id, backup_date = backup.id, backup.backup_date
         
         try:
-            # Fetch messages from Baileys
-            messages_data = await self.fetch_messages(user_id, days_back=90)
-            
-            # Save messages to database
-            saved_count = 0
-            contacts = set()
+            # Fetch only messages newer than the last successful backup and
+            # upsert them in fixed-size batches (already-stored messages are skipped)
+            since = await to_thread_shielded(get_high_water_mark, user_id, "baileys", db)
+            ingestor = MessageIngestor(
+                db, user_id, backup_id, source="baileys",
+                checkpoint=checkpoint_writer(backup, db)
+            )
             
-            for msg_data in messages_data:
-                try:
-                    contact_phone = msg_data.get("from", "")
-                    
-                    message = Message(
-                        user_id=user_id,
-                        backup_id=backup.id,
-                        whatsapp_message_id=msg_data.get("id"),
-                        contact_name="Unknown",  # Baileys doesn't provide names easily
-                        contact_phone=contact_phone,
-                        message_text=msg_data.get("text", ""),
-                        message_type="text",
-                        source="baileys",  # From Baileys
-                        timestamp=datetime.fromtimestamp(int(msg_data.get("timestamp", 0))),
-                        is_from_me=msg_data.get("from_me", False)
-                    )
-                    db.add(message)
-                    saved_count += 1
-                    contacts.add(contact_phone)
-                    
-                except Exception as e:
-                    logger.error(f"Error saving message: {e}")
-                    continue
+            stats = await ingest_pages(
+                self.iter_message_pages(session_id, days_back=90, since=since),
+                ingestor,
+                normalize_baileys_message
+            )
             
-            # Update backup status
-            backup.status = "completed"
-            backup.total_messages = saved_count
-            backup.total_contacts = len(contacts)
-            db.commit()
+            # Update backup status and move the high-water mark forward
+            saved_count, total_contacts = await to_thread_shielded(complete_backup, backup, ingestor, db)
             
-            logger.info(f"Baileys backup completed: {saved_count} messages")
+            logger.info(
+                f"Baileys backup completed: {saved_count} new messages "
+                f"({stats['skipped']} already stored)"
+            )
             
             return {
-                "backup_id": str(backup.id),
+                "backup_id": str(backup_id),
                 "total_messages": saved_count,
-                "total_contacts": len(contacts),
+                "skipped_messages": stats["skipped"],
+                "updated_messages": stats["updated"],
+                "total_contacts": total_contacts,
                 "status": "completed",
-                "backup_date": backup.backup_date.isoformat(),
+                "backup_date": backup_date.isoformat(),
                 "source": "baileys"
             }
             
-        except Exception as e:
-            # Mark backup as failed
-            backup.status = "failed"
-            backup.error_message = str(e)
-            db.commit()
+        except (Exception, asyncio.CancelledError) as e:
+            # Also on timeout/shutdown. Discard the partial batch (committed ones are skipped on re-run), then mark backup as failed
+            await to_thread_shielded(fail_backup, backup, str(e) or "Interrupted", db)
             logger.error(f"Baileys backup failed: {e}")
             raise
     
-    async def disconnect_session(self, user_id: UUID, db: Session) -> bool:
+    async def disconnect_session(self, user_id: UUID, db: AsyncSession) -> bool:
         """
         Disconnect Baileys session (logout)
         
         Args:
             user_id: User ID
-            db: Database session
+            db: Async database session
             
         Returns:
             True if successful
         """
         logger.info(f"Disconnecting Baileys session for user {user_id}")
         
-        user = db.query(User).filter(User.id == user_id).first()
+        user = await db.get(User, user_id)
         if not user or not user.baileys_session_id:
             return False
         
         session_id = user.baileys_session_id
         
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.post(
-                    f"{self.server_url}/disconnect/{session_id}"
-                )
-                response.raise_for_status()
+            client = get_http_client(BAILEYS)
+            response = await client.post(
+                f"{self.server_url}/disconnect/{session_id}"
+            )
+            response.raise_for_status()
                 
-                # Clear session from user
-                user.baileys_session_id = None
-                user.baileys_auth_state = None
-                db.commit()
+            # Clear session from user
+            user.baileys_session_id = None
+            user.baileys_auth_state = None
+            await db.commit()
                 
-                logger.info(f"Session disconnected successfully for {user_id}")
-                return True
+            logger.info(f"Session disconnected successfully for {user_id}")
+            return True
                 
         except httpx.HTTPError as e:
             logger.error(f"Failed to disconnect: {e}")
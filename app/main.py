@@ -2,11 +2,19 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 from app.core.config import settings
-from app.db.session import engine, Base
+from app.core.metrics import metrics
+from app.core.http import start_http_clients, close_http_clients
+from app.core.executors import shutdown_process_pool
+from app.db.session import engine, async_engine, async_read_engine, Base
 from app.models.user import User
 from app.models.message import Message
 from app.models.backup import Backup
 from app.models.subscription import Subscription
+from app.models.sync_state import SyncState
+from app.models.job import Job
+from app.models.contact_summary import ContactSummary
+from app.models.user_stats import UserStats
+from app.models.export_artifact import ExportArtifact
 import asyncio
 import logging
 
@@ -21,44 +29,43 @@ async def lifespan(app: FastAPI):
     # Create tables on startup
     Base.metadata.create_all(bind=engine)
     
-    # Start background schedulers
-    logger.info("🚀 Starting automated backup schedulers...")
+    # Pooled outbound HTTP clients shared by all integrations
+    start_http_clients()
     
-    # Start Express backup scheduler (every 12 hours)
-    from app.schedulers.express_backup import run_express_backup
-    asyncio.create_task(schedule_express_backups(run_express_backup))
+    # Start background scheduler; with several workers/replicas only the
+    # process holding the scheduler lock actually schedules backups
+    scheduler_task = None
+    worker_task = None
+    if settings.RUN_SCHEDULER:
+        logger.info("🚀 Starting automated backup scheduler...")
+        
+        # Each user is backed up when their own backup_frequency_hours elapses
+        from app.schedulers.due_scheduler import DueBackupScheduler
+        from app.schedulers.leader import run_as_leader
+        scheduler_task = asyncio.create_task(run_as_leader(DueBackupScheduler().run))
+        
+        logger.info("✅ Scheduler started successfully")
     
-    # Start Pro backup scheduler (every 24 hours)
-    from app.schedulers.pro_backup import run_pro_backup
-    asyncio.create_task(schedule_pro_backups(run_pro_backup))
-    
-    logger.info("✅ Schedulers started successfully")
+    # Embedded job worker for development; production runs `python -m app.workers`
+    # so backups never compete with requests for the API event loop
+    if settings.RUN_JOB_WORKER:
+        from app.workers.job_worker import JobWorker
+        worker_task = asyncio.create_task(JobWorker().run())
     
     yield
     
-    logger.info("Shutting down schedulers...")
-
-
-async def schedule_express_backups(backup_func):
-    """Schedule Express backups every 12 hours"""
-    while True:
-        try:
-            await backup_func()
-            await asyncio.sleep(12 * 60 * 60)  # 12 hours
-        except Exception as e:
-            logger.error(f"Express scheduler error: {e}")
-            await asyncio.sleep(60 * 60)  # Retry in 1 hour
-
-
-async def schedule_pro_backups(backup_func):
-    """Schedule Pro backups every 24 hours"""
-    while True:
-        try:
-            await backup_func()
-            await asyncio.sleep(24 * 60 * 60)  # 24 hours
-        except Exception as e:
-            logger.error(f"Pro scheduler error: {e}")
-            await asyncio.sleep(60 * 60)  # Retry in 1 hour
+    if scheduler_task:
+        logger.info("Shutting down scheduler...")
+        scheduler_task.cancel()
+    if worker_task:
+        logger.info("Shutting down job worker...")
+        worker_task.cancel()
+    
+    await close_http_clients()
+    await async_engine.dispose()
+    if async_read_engine is not None:
+        await async_read_engine.dispose()
+    shutdown_process_pool()
 
 
 app = FastAPI(
@@ -74,6 +81,8 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Pagination headers the browser may read (GET /messages cursors, contact counts)
+    expose_headers=["X-Before-Cursor", "X-After-Cursor", "X-Total-Count"],
 )
 
 # Audit middleware disabled for WhatsBackup (uses old CRM models)
@@ -82,7 +91,7 @@ app.add_middleware(
 
 
 
-from app.api.v1.endpoints import auth, whatsapp, backups_wa, messages_wa, baileys, plans
+from app.api.v1.endpoints import auth, whatsapp, backups_wa, messages_wa, baileys, plans, jobs, exports
 
 app.include_router(auth.router, prefix="/api/v1/auth", tags=["auth"])
 app.include_router(plans.router, prefix="/api/v1/plans", tags=["plans"])
@@ -90,12 +99,19 @@ app.include_router(whatsapp.router, prefix="/api/v1/whatsapp", tags=["whatsapp-p
 app.include_router(baileys.router, prefix="/api/v1/baileys", tags=["whatsapp-express"])
 app.include_router(backups_wa.router, prefix="/api/v1/backups", tags=["backups"])
 app.include_router(messages_wa.router, prefix="/api/v1/messages", tags=["messages"])
+app.include_router(jobs.router, prefix="/api/v1/jobs", tags=["jobs"])
+app.include_router(exports.router, prefix="/api/v1/exports", tags=["exports"])
 
 
 @app.get("/health")
 def health_check():
     return {"status": "ok", "version": "0.1.0"}
 
+@app.get("/metrics")
+def get_metrics():
+    """Process-local counters, gauges and timings (backup throughput, caches, pools)"""
+    return metrics.snapshot()
+
 @app.get("/")
 def root():
     return {"message": f"Welcome to {settings.PROJECT_NAME}"}
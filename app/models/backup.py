@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer, DateTime, ForeignKey
+from sqlalchemy import Column, String, Integer, DateTime, ForeignKey, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from app.db.session import Base
@@ -7,6 +7,10 @@ from datetime import datetime
 
 class Backup(Base):
     __tablename__ = "backups"
+    __table_args__ = (
+        # Latest backup per user (scheduler due times, history, stats)
+        Index("ix_backups_user_id_backup_date", "user_id", "backup_date"),
+    )
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
@@ -20,6 +24,11 @@ class Backup(Base):
     
     error_message = Column(String, nullable=True)
     
+    # Page-level checkpoint so a failed or interrupted backup can resume
+    resume_cursor = Column(String, nullable=True)  # 'after' cursor of the last committed page
+    committed_messages = Column(Integer, default=0)
+    last_checkpoint_at = Column(DateTime, nullable=True)
+    
     # Relationships
     user = relationship("User", backref="backups")
     
@@ -0,0 +1,32 @@
+from sqlalchemy import Column, String, Integer, DateTime, ForeignKey, UniqueConstraint, Index
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import relationship
+from app.db.session import Base
+import uuid
+from datetime import datetime
+
+class ContactSummary(Base):
+    """Per-contact message totals, maintained by backup ingestion (see app/services/contact_summaries.py)"""
+    __tablename__ = "contact_summaries"
+    __table_args__ = (
+        UniqueConstraint("user_id", "contact_phone", name="uq_contact_summaries_user_phone"),
+        # Default contacts listing: most recent conversation first
+        Index("ix_contact_summaries_user_last_message_at", "user_id", "last_message_at"),
+    )
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    contact_phone = Column(String, nullable=False)
+    
+    contact_name = Column(String)  # Display name from the newest message that had one
+    message_count = Column(Integer, default=0, nullable=False)
+    last_message_at = Column(DateTime, nullable=True)
+    last_message_preview = Column(String, nullable=True)
+    
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    # Relationships
+    user = relationship("User", backref="contact_summaries")
+    
+    def __repr__(self):
+        return f"<ContactSummary {self.user_id} {self.contact_phone} ({self.message_count})>"
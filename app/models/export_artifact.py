@@ -0,0 +1,38 @@
+from sqlalchemy import Column, String, Integer, BigInteger, DateTime, ForeignKey, UniqueConstraint
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import relationship
+from app.db.session import Base
+import uuid
+from datetime import datetime
+
+class ExportArtifact(Base):
+    """Generated export file, reused while the exported messages are unchanged"""
+    __tablename__ = "export_artifacts"
+    __table_args__ = (
+        UniqueConstraint("user_id", "cache_key", name="uq_export_artifacts_user_cache_key"),
+    )
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    
+    # What was exported (contact_phone None = whole account)
+    contact_phone = Column(String, nullable=True)
+    format = Column(String, nullable=False)  # pdf, csv or ndjson
+    range_start = Column(DateTime, nullable=True)
+    range_end = Column(DateTime, nullable=True)
+    cache_key = Column(String, nullable=False)  # Hash of the fields above
+    
+    # Latest message id + message count at generation time; a mismatch means stale
+    fingerprint = Column(String, nullable=False)
+    
+    storage_path = Column(String, nullable=False)
+    size_bytes = Column(BigInteger, default=0)
+    message_count = Column(Integer, default=0)
+    
+    created_at = Column(DateTime, default=datetime.utcnow)
+    
+    # Relationships
+    user = relationship("User", backref="export_artifacts")
+    
+    def __repr__(self):
+        return f"<ExportArtifact {self.format} {self.contact_phone or 'all'} for {self.user_id}>"
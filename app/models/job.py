@@ -0,0 +1,51 @@
+from sqlalchemy import Column, String, Integer, DateTime, ForeignKey, Index, text
+from sqlalchemy.dialects.postgresql import UUID, JSONB
+from sqlalchemy.orm import relationship
+from app.db.session import Base
+import uuid
+from datetime import datetime
+
+class Job(Base):
+    """Durable background job (backups run by worker processes, not request handlers)"""
+    __tablename__ = "jobs"
+    __table_args__ = (
+        # Worker claim query: next queued job whose run_at has passed
+        Index("ix_jobs_status_run_at", "status", "run_at"),
+        Index("ix_jobs_user_id_created_at", "user_id", "created_at"),
+        # At most one active job per user, kind and payload (enqueue dedupe)
+        Index(
+            "uq_jobs_active_user_kind_payload", "user_id", "kind", "payload",
+            unique=True,
+            postgresql_where=text("status IN ('queued', 'running')")
+        ),
+    )
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    
+    kind = Column(String, nullable=False)  # 'backup'
+    payload = Column(JSONB, nullable=True)
+    status = Column(String, default="queued")  # queued, running, completed, failed
+    
+    # Retry with backoff: a failed attempt is re-queued with a later run_at
+    attempts = Column(Integer, default=0)
+    max_attempts = Column(Integer, default=5)
+    run_at = Column(DateTime, default=datetime.utcnow)
+    
+    # Worker ownership; locked_at doubles as heartbeat so crashed workers' jobs are re-queued
+    locked_by = Column(String, nullable=True)
+    locked_at = Column(DateTime, nullable=True)
+    
+    progress = Column(JSONB, nullable=True)
+    result = Column(JSONB, nullable=True)
+    error = Column(String, nullable=True)
+    
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    
+    # Relationships
+    user = relationship("User", backref="jobs")
+    
+    def __repr__(self):
+        return f"<Job {self.id} {self.kind} - {self.status}>"
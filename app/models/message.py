@@ -1,12 +1,29 @@
-from sqlalchemy import Column, String, Boolean, DateTime, ForeignKey, Text
-from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, String, Boolean, DateTime, ForeignKey, Text, Computed, Index, DDL, event
+from sqlalchemy.dialects.postgresql import UUID, TSVECTOR
+from sqlalchemy.orm import relationship, deferred
 from app.db.session import Base
 import uuid
 from datetime import datetime
 
+# Conversations mix Spanish and English: index both stemmings of every message
+SEARCH_VECTOR_SQL = (
+    "to_tsvector('spanish', coalesce(message_text, '')) || "
+    "to_tsvector('english', coalesce(message_text, ''))"
+)
+
 class Message(Base):
     __tablename__ = "messages"
+    __table_args__ = (
+        # Full-text search (see app/services/search.py)
+        Index("ix_messages_search_vector", "search_vector", postgresql_using="gin"),
+        # Trigram indexes for fuzzy / partial matching (pg_trgm)
+        Index("ix_messages_contact_phone_trgm", "contact_phone",
+              postgresql_using="gin", postgresql_ops={"contact_phone": "gin_trgm_ops"}),
+        Index("ix_messages_contact_name_trgm", "contact_name",
+              postgresql_using="gin", postgresql_ops={"contact_name": "gin_trgm_ops"}),
+        Index("ix_messages_message_text_trgm", "message_text",
+              postgresql_using="gin", postgresql_ops={"message_text": "gin_trgm_ops"}),
+    )
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
@@ -24,6 +41,9 @@ class Message(Base):
     timestamp = Column(DateTime, index=True)
     is_from_me = Column(Boolean, default=False)
     
+    # Maintained by Postgres from message_text; deferred so normal loads skip it
+    search_vector = deferred(Column(TSVECTOR, Computed(SEARCH_VECTOR_SQL, persisted=True)))
+    
     created_at = Column(DateTime, default=datetime.utcnow)
     
     # Relationships
@@ -32,3 +52,15 @@ class Message(Base):
     
     def __repr__(self):
         return f"<Message {self.id} from {self.contact_name}>"
+
+
+# Keyset pagination (app/services/pagination.py) of a conversation / of all
+# messages, newest first; declared here because they need column expressions
+Index(
+    "ix_messages_user_contact_timestamp_id",
+    Message.user_id, Message.contact_phone, Message.timestamp.desc(), Message.id.desc()
+)
+Index("ix_messages_user_timestamp_id", Message.user_id, Message.timestamp.desc(), Message.id.desc())
+
+# The trigram indexes need pg_trgm before create_all builds the table
+event.listen(Message.__table__, "before_create", DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
@@ -0,0 +1,29 @@
+from sqlalchemy import Column, String, DateTime, ForeignKey, UniqueConstraint
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import relationship
+from app.db.session import Base
+import uuid
+from datetime import datetime
+
+class SyncState(Base):
+    """High-water mark of the last successful backup, per user and source"""
+    __tablename__ = "sync_states"
+    __table_args__ = (
+        UniqueConstraint("user_id", "source", name="uq_sync_states_user_source"),
+    )
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    source = Column(String, nullable=False)  # 'api' (Meta) or 'baileys'
+    
+    # Newest message already stored for this source
+    last_message_at = Column(DateTime, nullable=True)
+    last_message_id = Column(String, nullable=True)
+    
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    # Relationships
+    user = relationship("User", backref="sync_states")
+    
+    def __repr__(self):
+        return f"<SyncState {self.user_id} {self.source} @ {self.last_message_at}>"
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Boolean, DateTime, Integer, Text
+from sqlalchemy import Column, String, Boolean, DateTime, Integer, Text, Index, func
 from sqlalchemy.dialects.postgresql import UUID
 from app.db.session import Base
 import uuid
@@ -35,3 +35,7 @@ class User(Base):
     
     def __repr__(self):
         return f"<User {self.email}>"
+
+
+# Case-insensitive login lookup (lower(email) = normalized username)
+Index("ix_users_email_lower", func.lower(User.email))
@@ -0,0 +1,26 @@
+from sqlalchemy import Column, Integer, BigInteger, DateTime, ForeignKey
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import relationship, backref
+from app.db.session import Base
+from datetime import datetime
+
+class UserStats(Base):
+    """Dashboard totals per user, kept current by backups (see app/services/user_stats.py)"""
+    __tablename__ = "user_stats"
+    
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    
+    total_backups = Column(Integer, default=0, nullable=False)
+    total_messages = Column(BigInteger, default=0, nullable=False)
+    total_contacts = Column(Integer, default=0, nullable=False)
+    bytes_stored = Column(BigInteger, default=0, nullable=False)  # UTF-8 size of stored message text
+    last_backup_date = Column(DateTime, nullable=True)
+    
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    reconciled_at = Column(DateTime, nullable=True)  # Last full recount
+    
+    # Relationships
+    user = relationship("User", backref=backref("stats", uselist=False))
+    
+    def __repr__(self):
+        return f"<UserStats {self.user_id}: {self.total_messages} messages>"
@@ -2,7 +2,7 @@
 Initialize schedulers package
 """
 
-from .express_backup import run_express_backup
-from .pro_backup import run_pro_backup
+from .due_scheduler import DueBackupScheduler
+from .leader import run_as_leader
 
-__all__ = ['run_express_backup', 'run_pro_backup']
+__all__ = ['DueBackupScheduler', 'run_as_leader']
@@ -0,0 +1,26 @@
+"""
+Standalone scheduler process
+
+    python -m app.schedulers
+
+Runs the due-time backup scheduler outside the API. Start as many copies as
+you like; the advisory lock makes sure only one schedules at a time. Set
+RUN_SCHEDULER=false on the API processes when using this.
+"""
+
+import asyncio
+import logging
+from app.db.session import worker_engine, Base
+from app.schedulers.due_scheduler import DueBackupScheduler
+from app.schedulers.leader import run_as_leader
+
+logging.basicConfig(level=logging.INFO)
+
+
+async def main():
+    Base.metadata.create_all(bind=worker_engine)
+    await run_as_leader(DueBackupScheduler().run)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
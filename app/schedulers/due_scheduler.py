@@ -0,0 +1,194 @@
+"""
+Due-Time Backup Scheduler
+Queues a backup job for each user when their own backup_frequency_hours has elapsed,
+spread with per-user jitter instead of everyone at once
+"""
+
+import asyncio
+import heapq
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+from uuid import UUID
+from sqlalchemy import func, case, or_, and_, exists
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.db.session import WorkerSessionLocal
+from app.models.user import User
+from app.models.backup import Backup
+from app.models.job import Job
+from app.services.plans import PLANS
+from app.services.job_queue import enqueue_job, ACTIVE_STATUSES
+from app.services.user_stats import reconcile_user_stats
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Integration that backs up each plan (see app.workers.job_worker.run_backup_job)
+BACKUP_SERVICES = {
+    'express': 'baileys',
+    'pro': 'whatsapp_api',
+}
+
+
+def jitter_offset(user_id: UUID, frequency_hours: int) -> timedelta:
+    """
+    Stable per-user offset inside the jitter window
+    The same user always lands on the same slot, so schedules don't drift
+    """
+    window = frequency_hours * 3600 * settings.BACKUP_SCHEDULE_JITTER_FRACTION
+    return timedelta(seconds=(user_id.int % 10_000) / 10_000 * window)
+
+
+def compute_due_times(db: Session) -> List[Tuple[datetime, UUID, str]]:
+    """
+    Next due time for every user eligible for auto-backup
+    
+    due = last completed backup + backup_frequency_hours + jitter,
+    but never sooner than BACKUP_RETRY_MINUTES after the last attempt
+    so a failing account isn't retried on every tick. Users with a backup
+    job already queued or running are left out.
+    
+    Returns:
+        List of (due_at, user_id, plan_type)
+    """
+    last = db.query(
+        Backup.user_id.label("user_id"),
+        func.max(case((Backup.status == "completed", Backup.backup_date))).label("last_completed"),
+        func.max(Backup.backup_date).label("last_attempt")
+    ).group_by(Backup.user_id).subquery()
+    
+    rows = db.query(
+        User.id, User.plan_type, User.backup_frequency_hours, User.created_at,
+        last.c.last_completed, last.c.last_attempt
+    ).outerjoin(last, last.c.user_id == User.id).filter(
+        User.auto_backup_enabled == True,
+        ~exists().where(
+            Job.user_id == User.id,
+            Job.kind == "backup",
+            Job.status.in_(ACTIVE_STATUSES)
+        ),
+        or_(
+            and_(User.plan_type == 'express', User.baileys_session_id.isnot(None)),
+            and_(
+                User.plan_type == 'pro',
+                User.whatsapp_phone_id.isnot(None),
+                User.whatsapp_access_token.isnot(None)
+            )
+        )
+    ).all()
+    
+    retry_delay = timedelta(minutes=settings.BACKUP_RETRY_MINUTES)
+    due_times = []
+    for row in rows:
+        frequency = row.backup_frequency_hours or PLANS[row.plan_type]['backup_frequency_hours']
+        anchor = row.last_completed or row.created_at or datetime.utcnow()
+        due_at = anchor + timedelta(hours=frequency) + jitter_offset(row.id, frequency)
+        if row.last_completed is None:
+            # First backup: don't wait a full period, just spread inside the jitter window
+            due_at = anchor + jitter_offset(row.id, frequency)
+        if row.last_attempt and row.last_attempt != row.last_completed:
+            due_at = max(due_at, row.last_attempt + retry_delay)
+        due_times.append((due_at, row.id, row.plan_type))
+    return due_times
+
+
+class DueBackupScheduler:
+    """
+    Priority queue of (due_at, user) rebuilt from the database every
+    BACKUP_SCHEDULER_REFRESH_SECONDS; due users get a durable backup job
+    that the job workers pick up, so a restart never loses scheduled work
+    
+    Every STATS_RECONCILE_HOURS it also recounts the dashboard stats in the
+    background, correcting any drift in the incrementally maintained counters
+    """
+    
+    def __init__(self):
+        self._heap: List[Tuple[datetime, UUID, str]] = []
+        self._next_refresh: Optional[datetime] = None
+        self._next_reconcile: Optional[datetime] = None
+        self._reconcile_task: Optional[asyncio.Task] = None
+    
+    def refresh(self) -> None:
+        """Rebuild the due-time heap from the latest backups"""
+        db = WorkerSessionLocal()
+        try:
+            self._heap = compute_due_times(db)
+        finally:
+            db.close()
+        heapq.heapify(self._heap)
+        self._next_refresh = datetime.utcnow() + timedelta(seconds=settings.BACKUP_SCHEDULER_REFRESH_SECONDS)
+        metrics.set("scheduler.queued_users", len(self._heap))
+        logger.info(f"Scheduler refreshed: {len(self._heap)} users queued")
+    
+    def pop_due(self, now: datetime) -> List[Tuple[UUID, str]]:
+        """Remove and return (user_id, plan_type) for users whose due time has passed"""
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            _, user_id, plan_type = heapq.heappop(self._heap)
+            due.append((user_id, plan_type))
+        return due
+    
+    @staticmethod
+    def enqueue(due: List[Tuple[UUID, str]]) -> None:
+        """Queue one backup job per due user (deduplicated against active jobs)"""
+        db = WorkerSessionLocal()
+        try:
+            for user_id, plan_type in due:
+                enqueue_job("backup", user_id, db, payload={"service": BACKUP_SERVICES[plan_type]})
+        finally:
+            db.close()
+        metrics.incr("scheduler.enqueued", len(due))
+    
+    @staticmethod
+    def reconcile_stats() -> None:
+        """Batched recount of every user's stats row"""
+        db = WorkerSessionLocal()
+        try:
+            start = datetime.utcnow()
+            users = reconcile_user_stats(db)
+            metrics.observe("stats.reconcile_seconds", (datetime.utcnow() - start).total_seconds())
+            metrics.incr("stats.reconciled_users", users)
+        except Exception as e:
+            logger.error(f"Stats reconciliation failed: {e}")
+        finally:
+            db.close()
+    
+    def maybe_reconcile(self, now: datetime) -> None:
+        """Start the stats recount when due, unless one is still running"""
+        if self._next_reconcile and now < self._next_reconcile:
+            return
+        if self._reconcile_task and not self._reconcile_task.done():
+            return
+        self._next_reconcile = now + timedelta(hours=settings.STATS_RECONCILE_HOURS)
+        self._reconcile_task = asyncio.create_task(asyncio.to_thread(self.reconcile_stats))
+    
+    async def run(self) -> None:
+        """Scheduler loop: refresh, enqueue due users, sleep until the next due time"""
+        logger.info("🚀 Due-time backup scheduler started")
+        
+        while True:
+            try:
+                now = datetime.utcnow()
+                if self._next_refresh is None or now >= self._next_refresh:
+                    await asyncio.to_thread(self.refresh)
+                
+                self.maybe_reconcile(now)
+                
+                due = self.pop_due(now)
+                if due:
+                    logger.info(f"Queueing {len(due)} due backups")
+                    await asyncio.to_thread(self.enqueue, due)
+                
+                wake_at = self._next_refresh
+                if self._heap:
+                    wake_at = min(wake_at, self._heap[0][0])
+                sleep_for = (wake_at - datetime.utcnow()).total_seconds()
+                await asyncio.sleep(min(max(sleep_for, 1), settings.BACKUP_SCHEDULER_REFRESH_SECONDS))
+                
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Scheduler error: {e}")
+                self._next_refresh = None
+                await asyncio.sleep(60)
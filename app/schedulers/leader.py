@@ -0,0 +1,127 @@
+"""
+Scheduler Leader Election
+Only the process holding a Postgres advisory lock runs the backup scheduler;
+if it dies, its connection closes, the lock is released and another process takes over
+"""
+
+import asyncio
+from typing import Awaitable, Callable, Optional
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.pool import NullPool
+from app.core.config import settings
+from app.core.metrics import metrics
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Dedicated, unpooled engine: closing the connection must really end the
+# Postgres session, otherwise a pooled connection would keep the lock alive
+lock_engine = create_engine(settings.DATABASE_URL, poolclass=NullPool)
+
+
+class AdvisoryLock:
+    """Session-level pg advisory lock held on its own connection"""
+    
+    def __init__(self, key: int):
+        self.key = key
+        self._conn: Optional[Connection] = None
+    
+    @property
+    def held(self) -> bool:
+        return self._conn is not None
+    
+    def try_acquire(self) -> bool:
+        """Take the lock without waiting; True if this process is now the leader"""
+        conn = lock_engine.connect()
+        try:
+            acquired = conn.execute(
+                text("SELECT pg_try_advisory_lock(:key)"), {"key": self.key}
+            ).scalar()
+            # The lock outlives the transaction; don't sit idle in one
+            conn.commit()
+        except Exception:
+            conn.close()
+            raise
+        
+        if acquired:
+            self._conn = conn
+        else:
+            conn.close()
+        return bool(acquired)
+    
+    def heartbeat(self) -> bool:
+        """Check the lock connection is still alive; False means leadership is lost"""
+        if not self._conn:
+            return False
+        try:
+            self._conn.execute(text("SELECT 1"))
+            self._conn.commit()
+            return True
+        except Exception as e:
+            logger.error(f"Scheduler lock connection lost: {e}")
+            self._close()
+            return False
+    
+    def release(self) -> None:
+        if not self._conn:
+            return
+        try:
+            self._conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": self.key})
+            self._conn.commit()
+        except Exception as e:
+            logger.error(f"Failed to release scheduler lock: {e}")
+        finally:
+            self._close()
+    
+    def _close(self) -> None:
+        try:
+            self._conn.close()
+        except Exception:
+            pass
+        self._conn = None
+
+
+async def run_as_leader(scheduler: Callable[[], Awaitable[None]]) -> None:
+    """
+    Run `scheduler` only while this process holds the scheduler lock
+    
+    Non-leaders retry every SCHEDULER_LEADER_RETRY_SECONDS; the leader checks
+    its lock connection every SCHEDULER_HEARTBEAT_SECONDS and stops the
+    scheduler as soon as the lock is lost
+    """
+    lock = AdvisoryLock(settings.SCHEDULER_LOCK_KEY)
+    task: Optional[asyncio.Task] = None
+    
+    try:
+        while True:
+            if not lock.held:
+                metrics.set("scheduler.is_leader", 0)
+                try:
+                    acquired = await asyncio.to_thread(lock.try_acquire)
+                except Exception as e:
+                    logger.error(f"Scheduler lock error: {e}")
+                    acquired = False
+                
+                if not acquired:
+                    await asyncio.sleep(settings.SCHEDULER_LEADER_RETRY_SECONDS)
+                    continue
+                
+                logger.info("👑 Acquired scheduler lock, this process runs the backup schedule")
+                metrics.set("scheduler.is_leader", 1)
+                task = asyncio.create_task(scheduler())
+            
+            await asyncio.sleep(settings.SCHEDULER_HEARTBEAT_SECONDS)
+            
+            alive = await asyncio.to_thread(lock.heartbeat)
+            if not alive or task.done():
+                if task.done() and not task.cancelled() and task.exception():
+                    logger.error(f"Scheduler stopped: {task.exception()}")
+                logger.warning("Giving up scheduler leadership")
+                task.cancel()
+                await asyncio.to_thread(lock.release)
+    finally:
+        if task:
+            task.cancel()
+        await asyncio.to_thread(lock.release)
+        metrics.set("scheduler.is_leader", 0)
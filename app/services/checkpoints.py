@@ -0,0 +1,183 @@
+"""
+Backup Checkpoint Service
+Records page-level progress on the Backup row so failed backups resume instead of restarting
+
+The start/complete/fail helpers are plain blocking calls; async backup code
+runs them with asyncio.to_thread so the event loop never waits on the database
+"""
+
+from typing import Callable, Optional, Tuple
+from uuid import UUID
+from datetime import datetime, timedelta
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.backup import Backup
+from app.models.job import Job
+from app.models.message import Message
+from app.services.ingestion import MessageIngestor
+from app.services.sync_state import advance_sync_state
+from app.services.user_stats import record_backup_started
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def _held_by_other_job(user_id: UUID, db: Session) -> bool:
+    """
+    True while another live backup job (lock refreshed within JOB_LOCK_TIMEOUT_SECONDS)
+    runs for the user. Called from inside a backup job, whose own lock is one of them.
+    """
+    fresh_after = datetime.utcnow() - timedelta(seconds=settings.JOB_LOCK_TIMEOUT_SECONDS)
+    live = db.query(func.count(Job.id)).filter(
+        Job.user_id == user_id,
+        Job.kind == "backup",
+        Job.status == "running",
+        Job.locked_at >= fresh_after
+    ).scalar()
+    return live > 1
+
+
+def find_resumable_backup(user_id: UUID, source: str, db: Session) -> Optional[Backup]:
+    """
+    Returns the user's latest backup for this source if it can be resumed
+    
+    A failed backup is resumable when it has a checkpoint. An in-progress one was
+    interrupted (its worker died and the job was re-queued) when no other live job
+    holds the user; it is taken over even without a checkpoint, so a running
+    backup is never taken over and a dead one never stays in progress
+    """
+    latest = db.query(Backup).filter(
+        Backup.user_id == user_id,
+        Backup.backup_source == source
+    ).order_by(Backup.backup_date.desc()).first()
+    
+    if not latest:
+        return None
+    
+    if latest.status == "failed":
+        return latest if latest.resume_cursor else None
+    
+    if latest.status == "in_progress" and not _held_by_other_job(user_id, db):
+        return latest
+    
+    return None
+
+
+def checkpoint_writer(backup: Backup, db: Session) -> Callable[[Optional[str], int], None]:
+    """
+    Build the ingestor callback that commits progress after each batch
+    
+    Args:
+        backup: Backup being written (counts continue from its committed_messages)
+        db: Database session owning the ingestion transaction
+    """
+    base = backup.committed_messages or 0
+    
+    def checkpoint(cursor: Optional[str], inserted: int) -> None:
+        if cursor:
+            backup.resume_cursor = cursor
+        backup.committed_messages = base + inserted
+        backup.last_checkpoint_at = datetime.utcnow()
+        db.commit()
+    
+    return checkpoint
+
+
+def backup_totals(backup_id: UUID, db: Session):
+    """
+    Recount contacts and newest message for a backup that spans several runs
+    Returns (total_contacts, latest_timestamp)
+    """
+    return db.query(
+        func.count(func.distinct(Message.contact_phone)),
+        func.max(Message.timestamp)
+    ).filter(Message.backup_id == backup_id).one()
+
+
+def start_backup(user_id: UUID, source: str, db: Session) -> Tuple[Backup, Optional[str]]:
+    """
+    Resume the user's failed/interrupted backup for this source, or start a new one, and commit
+    
+    Returns:
+        (backup, checkpoint cursor to resume paging from, or None for a fresh backup)
+    """
+    backup = find_resumable_backup(user_id, source, db)
+    resume_from = None
+    if backup:
+        resume_from = backup.resume_cursor
+        logger.info(
+            f"Resuming backup {backup.id} after {backup.committed_messages} committed messages"
+        )
+        backup.status = "in_progress"
+        backup.error_message = None
+    else:
+        backup = Backup(
+            user_id=user_id,
+            backup_date=datetime.utcnow(),
+            status="in_progress",
+            backup_source=source
+        )
+        db.add(backup)
+        record_backup_started(user_id, backup.backup_date, db)
+    db.flush()
+    
+    # Close older backups left in progress by dead workers so they don't stay open in history
+    if not _held_by_other_job(user_id, db):
+        db.query(Backup).filter(
+            Backup.user_id == user_id,
+            Backup.backup_source == source,
+            Backup.status == "in_progress",
+            Backup.id != backup.id
+        ).update({"status": "failed", "error_message": "Interrupted"}, synchronize_session=False)
+    db.commit()
+    db.refresh(backup)
+    return backup, resume_from
+
+
+def complete_backup(
+    backup: Backup,
+    ingestor: MessageIngestor,
+    db: Session
+) -> Tuple[int, int]:
+    """
+    Mark a backup completed, move the source's high-water mark forward and commit
+    
+    Args:
+        backup: Backup written by `ingestor` (with checkpoint_writer)
+        ingestor: Closed ingestor of this run
+        db: Database session owning the backup
+        
+    Returns:
+        (total_messages, total_contacts)
+    """
+    total_messages = backup.committed_messages or 0
+    total_contacts = len(ingestor.contacts)
+    latest_timestamp = ingestor.latest_timestamp
+    # Earlier runs of a resumed backup wrote part of it
+    resumed = total_messages > ingestor.inserted
+    if resumed:
+        total_contacts, latest_timestamp = backup_totals(backup.id, db)
+    
+    backup.status = "completed"
+    backup.total_messages = total_messages
+    backup.total_contacts = total_contacts
+    backup.resume_cursor = None
+    advance_sync_state(
+        backup.user_id, ingestor.source, db,
+        last_message_at=latest_timestamp,
+        last_message_id=None if resumed else ingestor.latest_message_id
+    )
+    db.commit()
+    return total_messages, total_contacts
+
+
+def fail_backup(backup: Backup, error: str, db: Session) -> None:
+    """
+    Discard the uncommitted batch and mark the backup failed
+    Committed batches stay checkpointed, so the next run resumes from resume_cursor
+    """
+    db.rollback()
+    backup.status = "failed"
+    backup.error_message = error
+    db.commit()
@@ -0,0 +1,139 @@
+"""
+Contact Summary Service
+Keeps contact_summaries in step with messages so contact listings read one row per contact
+"""
+
+from typing import Iterable, Optional, Tuple
+from uuid import UUID
+from datetime import datetime
+from sqlalchemy import and_, case, func, literal_column, or_, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+from app.models.contact_summary import ContactSummary
+import logging
+
+logger = logging.getLogger(__name__)
+
+PREVIEW_LENGTH = 120
+
+# Placeholder names from the normalizers never replace a real display name
+UNKNOWN_NAMES = {None, "", "Unknown"}
+
+# (contact_phone, contact_name, timestamp, message_text) of a newly inserted message
+InsertedMessage = Tuple[Optional[str], Optional[str], Optional[datetime], Optional[str]]
+
+
+def _preview(message_text: Optional[str]) -> Optional[str]:
+    if message_text is None:
+        return None
+    return message_text[:PREVIEW_LENGTH]
+
+
+def record_inserted_messages(user_id: UUID, messages: Iterable[InsertedMessage], db: Session) -> int:
+    """
+    Fold a batch of newly inserted messages into the user's contact summaries
+    Runs in the caller's transaction, so summaries commit together with the batch
+    
+    Args:
+        user_id: Owner of the messages
+        messages: Only rows that were actually inserted (not skipped duplicates)
+        db: Database session
+    
+    Returns:
+        Number of contacts seen for the first time
+    """
+    contacts = {}
+    for phone, name, timestamp, message_text in messages:
+        if not phone:
+            continue
+        entry = contacts.setdefault(phone, {
+            "user_id": user_id,
+            "contact_phone": phone,
+            "contact_name": None,
+            "message_count": 0,
+            "last_message_at": None,
+            "last_message_preview": None,
+            "updated_at": datetime.utcnow(),
+        })
+        entry["message_count"] += 1
+        if entry["last_message_at"] is None or (timestamp and timestamp >= entry["last_message_at"]):
+            entry["last_message_at"] = timestamp
+            entry["last_message_preview"] = _preview(message_text)
+            if name not in UNKNOWN_NAMES:
+                entry["contact_name"] = name
+        elif entry["contact_name"] is None and name not in UNKNOWN_NAMES:
+            entry["contact_name"] = name
+    
+    if not contacts:
+        return 0
+    
+    table = ContactSummary.__table__
+    stmt = pg_insert(table)
+    excluded = stmt.excluded
+    is_newer = or_(table.c.last_message_at.is_(None), excluded.last_message_at >= table.c.last_message_at)
+    stmt = stmt.on_conflict_do_update(
+        constraint="uq_contact_summaries_user_phone",
+        set_={
+            "message_count": table.c.message_count + excluded.message_count,
+            "last_message_at": func.greatest(table.c.last_message_at, excluded.last_message_at),
+            "last_message_preview": case(
+                (is_newer, excluded.last_message_preview),
+                else_=table.c.last_message_preview
+            ),
+            "contact_name": case(
+                (and_(is_newer, excluded.contact_name.isnot(None)), excluded.contact_name),
+                else_=func.coalesce(table.c.contact_name, excluded.contact_name)
+            ),
+            "updated_at": excluded.updated_at,
+        }
+    )
+    # Sorted so concurrent backups lock summary rows in the same order
+    result = db.execute(
+        stmt.returning(literal_column("(xmax = 0)").label("was_inserted")),
+        [contacts[phone] for phone in sorted(contacts)]
+    )
+    return sum(1 for row in result if row.was_inserted)
+
+
+REBUILD_SQL = """
+INSERT INTO contact_summaries (
+    id, user_id, contact_phone, contact_name, message_count,
+    last_message_at, last_message_preview, updated_at
+)
+SELECT
+    gen_random_uuid(), totals.user_id, totals.contact_phone, latest.contact_name,
+    totals.message_count, latest.timestamp, left(latest.message_text, :preview_length), now()
+FROM (
+    SELECT user_id, contact_phone, count(*) AS message_count
+    FROM messages
+    WHERE contact_phone IS NOT NULL {user_filter}
+    GROUP BY user_id, contact_phone
+) totals
+JOIN (
+    SELECT DISTINCT ON (user_id, contact_phone)
+        user_id, contact_phone, nullif(contact_name, 'Unknown') AS contact_name, timestamp, message_text
+    FROM messages
+    WHERE contact_phone IS NOT NULL {user_filter}
+    ORDER BY user_id, contact_phone, timestamp DESC NULLS LAST, id DESC
+) latest USING (user_id, contact_phone)
+ON CONFLICT ON CONSTRAINT uq_contact_summaries_user_phone DO UPDATE SET
+    contact_name = coalesce(excluded.contact_name, contact_summaries.contact_name),
+    message_count = excluded.message_count,
+    last_message_at = excluded.last_message_at,
+    last_message_preview = excluded.last_message_preview,
+    updated_at = excluded.updated_at
+"""
+
+
+def rebuild_contact_summaries(db: Session, user_id: Optional[UUID] = None) -> None:
+    """
+    Recompute summaries from the messages table (backfill / repair)
+    Scans every message of the user (or of everyone), so keep it off request paths;
+    the caller commits
+    """
+    user_filter = "AND user_id = :user_id" if user_id else ""
+    params = {"preview_length": PREVIEW_LENGTH}
+    if user_id:
+        params["user_id"] = user_id
+    db.execute(text(REBUILD_SQL.format(user_filter=user_filter)), params)
+    logger.info(f"Contact summaries rebuilt for {user_id or 'all users'}")
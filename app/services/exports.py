@@ -0,0 +1,272 @@
+"""
+Export Service
+Builds PDF / CSV / NDJSON exports in background jobs and caches the files in
+storage, keyed by what was exported and the latest message it contained
+"""
+
+from typing import Any, Dict, Iterator, Optional
+from uuid import UUID
+from datetime import datetime
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.interfaces.storage import StorageProvider
+from app.infrastructure.storage.local import LocalStorageProvider
+from app.db.session import WorkerSessionLocal
+from app.models.message import Message
+from app.models.contact_summary import ContactSummary
+from app.models.user_stats import UserStats
+from app.models.export_artifact import ExportArtifact
+from app.services.pdf_export import (
+    ConversationExport, conversation_filter, prepare_conversation_export, stream_conversation_pdf
+)
+import csv
+import hashlib
+import io
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+EXPORT_FORMATS = {
+    "pdf": "application/pdf",
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+EXPORT_COLUMNS = (
+    "id", "contact_phone", "contact_name", "timestamp",
+    "is_from_me", "message_type", "message_text",
+)
+
+
+def get_export_storage() -> StorageProvider:
+    return LocalStorageProvider(settings.EXPORT_STORAGE_DIR)
+
+
+def _parse_datetime(value: Optional[str]) -> Optional[datetime]:
+    return datetime.fromisoformat(value) if value else None
+
+
+def export_cache_key(
+    contact_phone: Optional[str],
+    fmt: str,
+    start: Optional[datetime],
+    end: Optional[datetime]
+) -> str:
+    """Stable key for one export request (per user)"""
+    raw = json.dumps([
+        contact_phone or "",
+        fmt,
+        start.isoformat() if start else None,
+        end.isoformat() if end else None,
+    ])
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def export_fingerprint(
+    user_id: UUID,
+    contact_phone: Optional[str],
+    db: Session,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None
+) -> Optional[str]:
+    """
+    Latest message id in the export plus the stored message count
+    Both are index / primary-key lookups; None when there is nothing to export.
+    The count catches older messages backfilled behind the latest one.
+    """
+    latest = conversation_filter(
+        db.query(Message.id), user_id, contact_phone, start, end
+    ).order_by(Message.timestamp.desc(), Message.id.desc()).first()
+    if not latest:
+        return None
+    
+    if contact_phone:
+        count = db.query(ContactSummary.message_count).filter(
+            ContactSummary.user_id == user_id,
+            ContactSummary.contact_phone == contact_phone
+        ).scalar()
+    else:
+        count = db.query(UserStats.total_messages).filter(UserStats.user_id == user_id).scalar()
+    return f"{latest.id}:{count or 0}"
+
+
+def find_cached_export(
+    user_id: UUID,
+    cache_key: str,
+    fingerprint: str,
+    db: Session,
+    storage: Optional[StorageProvider] = None
+) -> Optional[ExportArtifact]:
+    """The stored artifact for this request if its messages haven't changed since"""
+    artifact = db.query(ExportArtifact).filter(
+        ExportArtifact.user_id == user_id,
+        ExportArtifact.cache_key == cache_key
+    ).first()
+    if not artifact or artifact.fingerprint != fingerprint:
+        return None
+    if not (storage or get_export_storage()).exists(artifact.storage_path):
+        return None
+    return artifact
+
+
+def _export_rows(export: ConversationExport) -> Iterator[Message]:
+    """Messages of the export in order, read through a server-side cursor"""
+    db = WorkerSessionLocal()
+    try:
+        rows = conversation_filter(
+            db.query(Message), export.user_id, export.contact_phone, export.start, export.end
+        ).order_by(
+            Message.contact_phone, Message.timestamp, Message.id
+        ).execution_options(yield_per=settings.EXPORT_FETCH_SIZE)
+        for row in rows:
+            yield row
+            # Release loaded rows as we go; nothing is modified
+            db.expunge(row)
+    finally:
+        db.close()
+
+
+def _row_values(msg: Message) -> Dict[str, Any]:
+    return {
+        "id": str(msg.id),
+        "contact_phone": msg.contact_phone,
+        "contact_name": msg.contact_name,
+        "timestamp": msg.timestamp.isoformat() if msg.timestamp else None,
+        "is_from_me": msg.is_from_me,
+        "message_type": msg.message_type,
+        "message_text": msg.message_text,
+    }
+
+
+def stream_csv(export: ConversationExport) -> Iterator[bytes]:
+    """CSV with a header row, emitted in chunks of EXPORT_FETCH_SIZE rows"""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_COLUMNS)
+    writer.writeheader()
+    rows = 0
+    for msg in _export_rows(export):
+        writer.writerow(_row_values(msg))
+        rows += 1
+        if rows % settings.EXPORT_FETCH_SIZE == 0:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode()
+
+
+def stream_ndjson(export: ConversationExport) -> Iterator[bytes]:
+    """One JSON object per line, emitted in chunks of EXPORT_FETCH_SIZE rows"""
+    lines = []
+    for msg in _export_rows(export):
+        lines.append(json.dumps(_row_values(msg), ensure_ascii=False))
+        if len(lines) >= settings.EXPORT_FETCH_SIZE:
+            yield ("\n".join(lines) + "\n").encode()
+            lines = []
+    if lines:
+        yield ("\n".join(lines) + "\n").encode()
+
+
+EXPORT_RENDERERS = {
+    "pdf": stream_conversation_pdf,
+    "csv": stream_csv,
+    "ndjson": stream_ndjson,
+}
+
+
+class _CountingStream:
+    """Passes chunks through while counting bytes"""
+    
+    def __init__(self, chunks: Iterator[bytes]):
+        self.chunks = chunks
+        self.size = 0
+    
+    def __iter__(self):
+        for chunk in self.chunks:
+            self.size += len(chunk)
+            yield chunk
+
+
+def build_export(user_id: UUID, payload: Dict[str, Any], db: Session) -> ExportArtifact:
+    """
+    Produce (or reuse) the export described by a job payload
+    
+    Args:
+        user_id: Owner of the messages
+        payload: {"format", "contact_phone", "start", "end"} (dates as ISO strings)
+        db: Database session
+    
+    Returns:
+        The artifact, freshly generated or from cache
+    """
+    fmt = payload.get("format", "pdf")
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format: {fmt}")
+    contact_phone = payload.get("contact_phone")
+    start = _parse_datetime(payload.get("start"))
+    end = _parse_datetime(payload.get("end"))
+    
+    storage = get_export_storage()
+    cache_key = export_cache_key(contact_phone, fmt, start, end)
+    fingerprint = export_fingerprint(user_id, contact_phone, db, start, end)
+    if not fingerprint:
+        raise ValueError("No messages found for this export")
+    
+    cached = find_cached_export(user_id, cache_key, fingerprint, db, storage)
+    if cached:
+        logger.info(f"Export {cached.id} still current, reusing it")
+        return cached
+    
+    export = prepare_conversation_export(user_id, contact_phone, db, start=start, end=end)
+    stream = _CountingStream(EXPORT_RENDERERS[fmt](export))
+    filename = f"{user_id}-{cache_key[:16]}-{fingerprint.split(':')[0][:8]}.{fmt}"
+    path = storage.save_stream(filename, stream)
+    
+    artifact = db.query(ExportArtifact).filter(
+        ExportArtifact.user_id == user_id,
+        ExportArtifact.cache_key == cache_key
+    ).first()
+    if not artifact:
+        artifact = ExportArtifact(
+            user_id=user_id,
+            contact_phone=contact_phone,
+            format=fmt,
+            range_start=start,
+            range_end=end,
+            cache_key=cache_key
+        )
+        db.add(artifact)
+    previous_path = artifact.storage_path
+    artifact.fingerprint = fingerprint
+    artifact.storage_path = path
+    artifact.size_bytes = stream.size
+    artifact.message_count = export.total_messages
+    artifact.created_at = datetime.utcnow()
+    db.commit()
+    db.refresh(artifact)
+    
+    if previous_path and previous_path != path:
+        storage.delete_file(previous_path)
+    
+    logger.info(f"Export {artifact.id} built: {fmt}, {export.total_messages} messages, {stream.size} bytes")
+    return artifact
+
+
+def export_filename(artifact: ExportArtifact) -> str:
+    if artifact.contact_phone:
+        return f"conversacion_{artifact.contact_phone}.{artifact.format}"
+    return f"whatsbackup_{artifact.created_at.strftime('%Y%m%d')}.{artifact.format}"
+
+
+def serialize_artifact(artifact: ExportArtifact) -> Dict[str, Any]:
+    return {
+        "artifact_id": str(artifact.id),
+        "format": artifact.format,
+        "contact_phone": artifact.contact_phone,
+        "start": artifact.range_start.isoformat() if artifact.range_start else None,
+        "end": artifact.range_end.isoformat() if artifact.range_end else None,
+        "message_count": artifact.message_count,
+        "size_bytes": artifact.size_bytes,
+        "created_at": artifact.created_at.isoformat() if artifact.created_at else None,
+        "download_url": f"/api/v1/exports/{artifact.id}/download",
+    }
@@ -0,0 +1,371 @@
+"""
+Backup Ingestion Engine
+Normalizes WhatsApp payloads into plain rows and bulk-writes them in fixed-size batches
+"""
+
+import asyncio
+import time
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+from uuid import UUID
+from datetime import datetime
+from sqlalchemy import insert, literal_column
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.executors import to_thread_shielded
+from app.models.message import Message
+from app.services.contact_summaries import record_inserted_messages
+from app.services.user_stats import record_ingested
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Column order of a normalized message row
+MESSAGE_COLUMNS = (
+    "whatsapp_message_id",
+    "contact_name",
+    "contact_phone",
+    "message_text",
+    "message_type",
+    "timestamp",
+    "is_from_me",
+)
+
+MessageRow = Tuple[Any, ...]
+
+
+
+class MessagePage(NamedTuple):
+    """One page of raw messages as returned by a fetcher"""
+    messages: List[Dict[str, Any]]
+    cursor: Optional[str] = None  # Paging cursor that continues after this page
+
+
+# Conflict handling on messages.whatsapp_message_id
+#   skip   - INSERT ... ON CONFLICT DO NOTHING (already-stored messages are ignored)
+#   update - INSERT ... ON CONFLICT DO UPDATE (refresh the mutable fields)
+#   error  - plain INSERT, a duplicate aborts the transaction
+CONFLICT_MODES = ("skip", "update", "error")
+
+# Fields refreshed when a message is re-ingested in "update" mode
+UPDATABLE_COLUMNS = ("contact_name", "message_text", "message_type")
+
+
+def normalize_api_message(msg_data: Dict[str, Any], owner_phone: Optional[str]) -> MessageRow:
+    """
+    Normalize a Meta WhatsApp Business API message payload into a row
+
+    Args:
+        msg_data: Raw message dictionary from the Graph API
+        owner_phone: Phone number of the account owner (to flag own messages)
+
+    Returns:
+        Tuple ordered as MESSAGE_COLUMNS
+    """
+    from_data = msg_data.get("from", "")
+    from_number = from_data if isinstance(from_data, str) else from_data.get("phone", "")
+    contact_name = msg_data.get("profile", {}).get("name", "Unknown")
+    message_type = msg_data.get("type", "text")
+
+    # Extract message text based on type
+    message_text = ""
+    if message_type == "text":
+        message_text = msg_data.get("text", {}).get("body", "")
+    elif message_type == "image":
+        message_text = f"[Image: {msg_data.get('image', {}).get('caption', 'No caption')}]"
+    elif message_type == "video":
+        message_text = f"[Video: {msg_data.get('video', {}).get('caption', 'No caption')}]"
+    elif message_type == "audio":
+        message_text = "[Audio message]"
+    elif message_type == "document":
+        message_text = f"[Document: {msg_data.get('document', {}).get('filename', 'Unknown')}]"
+
+    return (
+        msg_data.get("id"),
+        contact_name,
+        from_number,
+        message_text,
+        message_type,
+        datetime.fromtimestamp(int(msg_data.get("timestamp", 0))),
+        from_number == owner_phone,
+    )
+
+
+def normalize_baileys_message(msg_data: Dict[str, Any]) -> MessageRow:
+    """
+    Normalize a message from the Baileys server into a row
+
+    Args:
+        msg_data: Raw message dictionary from /fetch-messages
+
+    Returns:
+        Tuple ordered as MESSAGE_COLUMNS
+    """
+    return (
+        msg_data.get("id"),
+        "Unknown",  # Baileys doesn't provide names easily
+        msg_data.get("from", ""),
+        msg_data.get("text", ""),
+        "text",
+        datetime.fromtimestamp(int(msg_data.get("timestamp", 0))),
+        msg_data.get("from_me", False),
+    )
+
+
+class MessageIngestor:
+    """
+    Buffers normalized message rows and writes them with multi-row INSERTs
+    One INSERT per batch instead of one ORM object per message
+
+    Rows whose whatsapp_message_id already exists are skipped or updated
+    according to on_conflict, so re-running a backup only pays for new rows
+    """
+
+    def __init__(
+        self,
+        db: Session,
+        user_id: UUID,
+        backup_id: UUID,
+        source: str,
+        batch_size: Optional[int] = None,
+        on_conflict: Optional[str] = None,
+        checkpoint: Optional[Callable[[Optional[str], int], None]] = None
+    ):
+        self.db = db
+        self.user_id = user_id
+        self.backup_id = backup_id
+        self.source = source
+        self.batch_size = batch_size or settings.BACKUP_BATCH_SIZE
+        self.on_conflict = on_conflict or settings.BACKUP_CONFLICT_MODE
+        if self.on_conflict not in CONFLICT_MODES:
+            raise ValueError(f"Invalid conflict mode: {self.on_conflict}")
+
+        # Called after every batch with (cursor of the last fully written page,
+        # rows inserted so far); typically commits and records resume state
+        self.checkpoint = checkpoint
+        self._page_cursor: Optional[str] = None
+
+        self._buffer: List[MessageRow] = []
+        self.inserted = 0
+        self.updated = 0
+        self.skipped = 0
+        self.batches = 0
+        self.contacts = set()
+        self.elapsed = 0.0
+
+        # Newest message seen, used to advance the sync high-water mark
+        self.latest_timestamp: Optional[datetime] = None
+        self.latest_message_id: Optional[str] = None
+
+    def add(self, row: MessageRow) -> None:
+        """Queue a normalized row, flushing when the batch is full"""
+        self._buffer.append(row)
+        timestamp = row[5]
+        if timestamp and (self.latest_timestamp is None or timestamp > self.latest_timestamp):
+            self.latest_timestamp = timestamp
+            self.latest_message_id = row[0]
+        if len(self._buffer) >= self.batch_size:
+            self.flush()
+
+    def add_many(self, rows: Iterable[MessageRow]) -> None:
+        """Queue several normalized rows"""
+        for row in rows:
+            self.add(row)
+
+    def mark_page(self, cursor: Optional[str]) -> None:
+        """
+        Record that every row of the page ending at `cursor` has been queued
+        The next flush makes that page durable, so its cursor is safe to resume from
+        """
+        self._page_cursor = cursor
+
+    def flush(self) -> int:
+        """
+        Write the buffered rows as a single multi-row INSERT
+
+        Returns:
+            Number of new rows inserted in this batch
+        """
+        if not self._buffer:
+            return 0
+
+        rows, self._buffer = self._buffer, []
+        received = len(rows)
+        if self.on_conflict != "error":
+            rows = self._dedupe(rows)
+
+        params = [
+            {
+                **dict(zip(MESSAGE_COLUMNS, row)),
+                "user_id": self.user_id,
+                "backup_id": self.backup_id,
+                "source": self.source,
+            }
+            for row in rows
+        ]
+
+        start = time.perf_counter()
+        inserted, updated = self._execute(params)
+        duration = time.perf_counter() - start
+
+        skipped = received - inserted - updated
+        self.inserted += inserted
+        self.updated += updated
+        self.skipped += skipped
+        self.batches += 1
+        self.elapsed += duration
+        self.contacts.update(row[2] for row in rows)
+
+        rate = received / duration if duration > 0 else float(received)
+        logger.info(
+            f"Batch {self.batches}: {inserted} inserted, {updated} updated, {skipped} skipped "
+            f"in {duration:.3f}s ({rate:.0f} rows/s)"
+        )
+
+        if self.checkpoint:
+            self.checkpoint(self._page_cursor, self.inserted)
+        return inserted
+
+    def _execute(self, params: List[Dict[str, Any]]) -> Tuple[int, int]:
+        """
+        Run the batch INSERT and return (inserted, updated) counts
+        Newly inserted rows are folded into the contact summaries and user
+        stats in the same transaction
+        """
+        table = Message.__table__
+        summary_columns = (table.c.contact_phone, table.c.contact_name, table.c.timestamp, table.c.message_text)
+
+        if self.on_conflict == "error":
+            result = self.db.execute(insert(table).returning(*summary_columns), params)
+            self._record_inserted([tuple(row) for row in result])
+            return len(params), 0
+
+        stmt = pg_insert(table)
+        if self.on_conflict == "skip":
+            stmt = stmt.on_conflict_do_nothing(index_elements=[table.c.whatsapp_message_id])
+        else:
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[table.c.whatsapp_message_id],
+                set_={col: stmt.excluded[col] for col in UPDATABLE_COLUMNS}
+            )
+
+        # xmax = 0 only for freshly inserted tuples, updated ones carry the old xmax
+        result = self.db.execute(
+            stmt.returning(literal_column("(xmax = 0)").label("was_inserted"), *summary_columns),
+            params
+        )
+        rows = result.all()
+        new_rows = [tuple(row)[1:] for row in rows if row.was_inserted]
+        self._record_inserted(new_rows)
+        return len(new_rows), len(rows) - len(new_rows)
+
+    def _record_inserted(self, rows: List[Tuple[Any, ...]]) -> None:
+        """Update contact summaries and user stats for (phone, name, timestamp, text) of new rows"""
+        if not rows:
+            return
+        new_contacts = record_inserted_messages(self.user_id, rows, self.db)
+        bytes_stored = sum(len(row[3].encode()) for row in rows if row[3])
+        record_ingested(self.user_id, len(rows), new_contacts, bytes_stored, self.db)
+
+    @staticmethod
+    def _dedupe(rows: List[MessageRow]) -> List[MessageRow]:
+        """
+        Keep the last occurrence of each whatsapp_message_id in a batch
+        ON CONFLICT DO UPDATE cannot touch the same row twice in one statement
+        """
+        seen = {}
+        anonymous = []
+        for row in rows:
+            if row[0] is None:
+                anonymous.append(row)
+            else:
+                seen[row[0]] = row
+        return list(seen.values()) + anonymous
+
+    def close(self) -> Dict[str, Any]:
+        """
+        Flush remaining rows and return ingestion statistics
+        Without a checkpoint callback the caller owns the transaction and commits
+        """
+        self.flush()
+        processed = self.inserted + self.updated + self.skipped
+        rate = processed / self.elapsed if self.elapsed > 0 else float(processed)
+        logger.info(
+            f"Ingested {self.inserted} new messages ({self.updated} updated, {self.skipped} skipped) "
+            f"in {self.batches} batches ({self.elapsed:.2f}s, {rate:.0f} rows/s)"
+        )
+        return {
+            "inserted": self.inserted,
+            "updated": self.updated,
+            "skipped": self.skipped,
+            "batches": self.batches,
+            "contacts": len(self.contacts),
+            "seconds": round(self.elapsed, 3),
+        }
+
+
+def _write_page(ingestor: MessageIngestor, rows: List[MessageRow], cursor: Optional[str]) -> None:
+    ingestor.add_many(rows)
+    ingestor.mark_page(cursor)
+
+
+async def ingest_pages(
+    pages: AsyncIterator[MessagePage],
+    ingestor: MessageIngestor,
+    normalize: Callable[[Dict[str, Any]], MessageRow],
+    max_in_flight: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Consume pages from a fetcher and write them as they arrive
+
+    The fetcher runs as a separate task feeding a bounded queue, so the network
+    fetch of page N+1 overlaps with the database write of page N. Writes run in
+    a worker thread to keep the event loop free; if the caller is cancelled, the
+    write in progress finishes before the cancellation propagates. Peak memory is bounded by
+    max_in_flight pages plus one ingestion batch.
+
+    Args:
+        pages: Async generator of MessagePage
+        ingestor: Ingestor bound to the backup being written
+        normalize: Converts a raw message into a MessageRow
+        max_in_flight: Pages buffered between fetch and write
+
+    Returns:
+        Ingestion statistics (see MessageIngestor.close)
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=max_in_flight or settings.BACKUP_MAX_INFLIGHT_PAGES)
+    done = object()
+
+    async def produce():
+        try:
+            async for page in pages:
+                await queue.put(page)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            await queue.put(done)
+            raise
+        await queue.put(done)
+
+    producer = asyncio.create_task(produce())
+    try:
+        while True:
+            page = await queue.get()
+            if page is done:
+                break
+
+            rows = []
+            for msg_data in page.messages:
+                try:
+                    rows.append(normalize(msg_data))
+                except Exception as e:
+                    logger.error(f"Error saving message: {e}")
+            await to_thread_shielded(_write_page, ingestor, rows, page.cursor)
+
+        # Re-raise any fetch error
+        await producer
+    finally:
+        if not producer.done():
+            producer.cancel()
+
+    return await to_thread_shielded(ingestor.close)
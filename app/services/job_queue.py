@@ -0,0 +1,212 @@
+"""
+Job Queue Service
+Postgres-backed queue: enqueue from request handlers/scheduler, claim from workers
+with SELECT ... FOR UPDATE SKIP LOCKED, retry failures with exponential backoff
+"""
+
+import random
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+from datetime import datetime, timedelta
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.job import Job
+import logging
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_STATUSES = ("queued", "running")
+
+
+def _active_job(kind: str, user_id: UUID, payload: Dict[str, Any], db: Session) -> Optional[Job]:
+    return db.query(Job).filter(
+        Job.user_id == user_id,
+        Job.kind == kind,
+        Job.payload == payload,
+        Job.status.in_(ACTIVE_STATUSES)
+    ).first()
+
+
+def enqueue_job(
+    kind: str,
+    user_id: UUID,
+    db: Session,
+    payload: Optional[Dict[str, Any]] = None
+) -> Job:
+    """
+    Add a job to the queue and commit
+    If the user already has an active job of the same kind and payload, that job
+    is returned instead; the uq_jobs_active_user_kind_payload partial unique index
+    keeps concurrent enqueues from adding a second one
+    
+    Args:
+        kind: Job type, see app.workers.job_worker.JOB_HANDLERS
+        user_id: Owner of the job
+        db: Database session
+        payload: Handler arguments
+        
+    Returns:
+        The queued (or already active) job
+    """
+    payload = payload or {}
+    existing = _active_job(kind, user_id, payload, db)
+    if existing:
+        return existing
+    
+    job = Job(
+        kind=kind,
+        user_id=user_id,
+        payload=payload,
+        status="queued",
+        max_attempts=settings.JOB_MAX_ATTEMPTS,
+        run_at=datetime.utcnow()
+    )
+    db.add(job)
+    try:
+        db.commit()
+    except IntegrityError:
+        # Lost the race to another enqueue of the same job
+        db.rollback()
+        existing = _active_job(kind, user_id, payload, db)
+        if existing:
+            return existing
+        raise
+    db.refresh(job)
+    logger.info(f"Enqueued {kind} job {job.id} for user {user_id}")
+    return job
+
+
+def claim_job(worker_id: str, db: Session, kinds: Optional[List[str]] = None) -> Optional[Job]:
+    """
+    Lock and mark the next runnable job as running
+    SKIP LOCKED lets any number of workers poll concurrently without blocking
+    A queued job that has already used up its attempts is failed and skipped
+    """
+    while True:
+        query = db.query(Job).filter(
+            Job.status == "queued",
+            Job.run_at <= datetime.utcnow()
+        )
+        if kinds:
+            query = query.filter(Job.kind.in_(kinds))
+        
+        job = query.order_by(Job.run_at).with_for_update(skip_locked=True).first()
+        if not job:
+            db.rollback()
+            return None
+        
+        now = datetime.utcnow()
+        if (job.attempts or 0) >= job.max_attempts:
+            job.status = "failed"
+            job.locked_by = None
+            job.finished_at = now
+            job.error = job.error or "Out of attempts"
+            db.commit()
+            logger.error(f"Job {job.id} failed after {job.attempts} attempts: {job.error}")
+            continue
+        
+        job.status = "running"
+        job.attempts = (job.attempts or 0) + 1
+        job.locked_by = worker_id
+        job.locked_at = now
+        job.started_at = job.started_at or now
+        db.commit()
+        db.refresh(job)
+        return job
+
+
+def heartbeat_job(job_id: UUID, db: Session, progress: Optional[Dict[str, Any]] = None) -> None:
+    """Refresh the job lock and optionally record progress"""
+    values = {"locked_at": datetime.utcnow()}
+    if progress is not None:
+        values["progress"] = progress
+    db.query(Job).filter(Job.id == job_id, Job.status == "running").update(values)
+    db.commit()
+
+
+def complete_job(job_id: UUID, result: Optional[Dict[str, Any]], db: Session) -> None:
+    job = db.query(Job).filter(Job.id == job_id).first()
+    if not job:
+        return
+    job.status = "completed"
+    job.result = result
+    job.error = None
+    job.locked_by = None
+    job.finished_at = datetime.utcnow()
+    db.commit()
+
+
+def fail_job(job_id: UUID, error: str, db: Session, retry: bool = True) -> None:
+    """
+    Record a failed attempt: re-queue with exponential backoff and jitter,
+    or mark the job failed once max_attempts is reached
+    """
+    job = db.query(Job).filter(Job.id == job_id).first()
+    if not job:
+        return
+    
+    job.error = error
+    job.locked_by = None
+    if retry and job.attempts < job.max_attempts:
+        delay = min(
+            settings.JOB_RETRY_BASE_SECONDS * 2 ** (job.attempts - 1),
+            settings.JOB_RETRY_MAX_SECONDS
+        )
+        delay *= random.uniform(0.5, 1.0)
+        job.status = "queued"
+        job.run_at = datetime.utcnow() + timedelta(seconds=delay)
+        logger.warning(f"Job {job.id} attempt {job.attempts} failed, retrying in {delay:.0f}s: {error}")
+    else:
+        job.status = "failed"
+        job.finished_at = datetime.utcnow()
+        logger.error(f"Job {job.id} failed after {job.attempts} attempts: {error}")
+    db.commit()
+
+
+def requeue_stale_jobs(db: Session) -> int:
+    """
+    Put running jobs back in the queue when their worker stopped heartbeating
+    (process crashed or was restarted mid-job). Jobs that have used up their
+    attempts are failed instead, so a job that keeps killing its worker
+    (OOM, segfault) isn't retried forever
+    """
+    now = datetime.utcnow()
+    stale = db.query(Job).filter(
+        Job.status == "running",
+        Job.locked_at < now - timedelta(seconds=settings.JOB_LOCK_TIMEOUT_SECONDS)
+    )
+    failed = stale.filter(Job.attempts >= Job.max_attempts).update({
+        "status": "failed",
+        "locked_by": None,
+        "error": "Worker stopped responding",
+        "finished_at": now
+    }, synchronize_session=False)
+    count = stale.filter(Job.attempts < Job.max_attempts).update(
+        {"status": "queued", "locked_by": None, "run_at": now}, synchronize_session=False
+    )
+    db.commit()
+    if count:
+        logger.warning(f"Re-queued {count} stale jobs")
+    if failed:
+        logger.error(f"Failed {failed} stale jobs that ran out of attempts")
+    return count
+
+
+def get_job(job_id: UUID, user_id: UUID, db: Session) -> Optional[Job]:
+    return db.query(Job).filter(Job.id == job_id, Job.user_id == user_id).first()
+
+
+def serialize_job(job: Job) -> Dict[str, Any]:
+    return {
+        "job_id": str(job.id),
+        "kind": job.kind,
+        "status": job.status,
+        "attempts": job.attempts,
+        "progress": job.progress,
+        "result": job.result,
+        "error": job.error,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+    }
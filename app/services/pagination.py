@@ -0,0 +1,95 @@
+"""
+Keyset Pagination
+Opaque cursors over (sort value, id) so every page is an index range scan,
+however deep the client has scrolled
+"""
+
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Query
+from typing import Any, Callable, List, NamedTuple, Optional, Tuple
+from datetime import datetime
+from uuid import UUID
+import base64
+import json
+
+
+class Page(NamedTuple):
+    rows: List[Any]
+    before: Optional[str]  # Cursor for the next (older) page, None at the end
+    after: Optional[str]  # Cursor for the previous (newer) page, None at the start
+
+
+def encode_cursor(sort_value: datetime, row_id: UUID) -> str:
+    raw = json.dumps([sort_value.isoformat(), str(row_id)], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, UUID]:
+    """
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        sort_value, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(sort_value), UUID(row_id)
+    except (TypeError, ValueError) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def keyset_page(
+    query: Query,
+    sort_column,
+    id_column,
+    limit: int,
+    before: Optional[str] = None,
+    after: Optional[str] = None,
+    key: Optional[Callable[[Any], Tuple[datetime, UUID]]] = None
+) -> Page:
+    """
+    One page of `query`, newest first, positioned by a cursor
+    
+    Args:
+        query: Filtered query (no ORDER BY / LIMIT)
+        sort_column: Column ordered descending (e.g. Message.timestamp)
+        id_column: Unique tie-breaker (e.g. Message.id)
+        limit: Page size
+        before: Return rows older than this cursor
+        after: Return rows newer than this cursor
+        key: (sort value, id) of a row; defaults to the ORM attributes of the columns
+    
+    Returns:
+        Page of rows (newest first) with the cursors for the adjacent pages
+    
+    Raises:
+        ValueError: If a cursor is malformed or both are given
+    """
+    if before and after:
+        raise ValueError("Use either 'before' or 'after', not both")
+    if key is None:
+        key = lambda row: (getattr(row, sort_column.key), getattr(row, id_column.key))
+    
+    position = tuple_(sort_column, id_column)
+    if after:
+        # Walk forward (ascending) from the cursor, then flip back to newest first
+        query = query.filter(position > decode_cursor(after))
+        rows = query.order_by(sort_column.asc(), id_column.asc()).limit(limit + 1).all()
+        has_more = len(rows) > limit
+        rows = rows[:limit][::-1]
+        has_newer, has_older = has_more, True
+    else:
+        if before:
+            query = query.filter(position < decode_cursor(before))
+        rows = query.order_by(sort_column.desc(), id_column.desc()).limit(limit + 1).all()
+        has_older = len(rows) > limit
+        rows = rows[:limit]
+        has_newer = bool(before)
+    
+    if not rows:
+        # Past either end: the same cursor leads back into the data
+        return Page(rows, after, before)
+    return Page(
+        rows,
+        encode_cursor(*key(rows[-1])) if has_older else None,
+        encode_cursor(*key(rows[0])) if has_newer else None
+    )
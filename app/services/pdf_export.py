@@ -0,0 +1,340 @@
+"""
+Conversation PDF Export
+Streams a conversation to PDF page by page: rows come from a server-side
+cursor, layout runs in the CPU process pool and each finished page is
+emitted as bytes, so memory stays flat however long the conversation is
+"""
+
+from typing import Iterator, List, NamedTuple, Optional, Tuple
+from uuid import UUID
+from datetime import datetime
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from app.core.config import settings
+from app.core.executors import submit_cpu
+from app.core.metrics import metrics
+from app.db.session import WorkerSessionLocal
+from app.models.message import Message
+from app.models.contact_summary import ContactSummary
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+PAGE_WIDTH, PAGE_HEIGHT = 612, 792  # US letter, points
+MARGIN_LEFT = 50
+TEXT_INDENT = 70
+MARGIN_TOP = 750
+MARGIN_BOTTOM = 50
+TEXT_WIDTH = PAGE_WIDTH - TEXT_INDENT - MARGIN_LEFT
+
+FONT = ("F1", "Helvetica")
+FONT_BOLD = ("F2", "Helvetica-Bold")
+FONT_SIZE = 9
+LINE_HEIGHT = 12
+MESSAGE_GAP = 10
+
+
+class ConversationExport(NamedTuple):
+    """What the export will contain, checked before streaming starts"""
+    user_id: UUID
+    contact_phone: Optional[str]  # None exports the whole account
+    contact_name: Optional[str]
+    total_messages: int
+    start: Optional[datetime]
+    end: Optional[datetime]
+
+
+def conversation_filter(
+    query,
+    user_id: UUID,
+    contact_phone: Optional[str],
+    start: Optional[datetime],
+    end: Optional[datetime]
+):
+    """Restrict a Message query to one conversation (or the whole account) and date range"""
+    query = query.filter(Message.user_id == user_id)
+    if contact_phone:
+        query = query.filter(Message.contact_phone == contact_phone)
+    if start:
+        query = query.filter(Message.timestamp >= start)
+    if end:
+        query = query.filter(Message.timestamp < end)
+    return query
+
+
+def prepare_conversation_export(
+    user_id: UUID,
+    contact_phone: Optional[str],
+    db: Session,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None
+) -> ConversationExport:
+    """
+    Validate an export request and gather the header details
+    
+    Raises:
+        ValueError: If there are no messages in the range
+    """
+    total = conversation_filter(
+        db.query(func.count(Message.id)), user_id, contact_phone, start, end
+    ).scalar()
+    if not total:
+        raise ValueError("No messages found for this contact")
+    
+    if not contact_phone:
+        return ConversationExport(user_id, None, None, total, start, end)
+    summary = db.query(ContactSummary.contact_name).filter(
+        ContactSummary.user_id == user_id,
+        ContactSummary.contact_phone == contact_phone
+    ).first()
+    contact_name = summary.contact_name if summary else None
+    return ConversationExport(user_id, contact_phone, contact_name, total, start, end)
+
+
+def wrap_text(text: str, font_name: str, font_size: float, max_width: float) -> List[str]:
+    """
+    Break text into lines no wider than max_width, keeping the message's own line breaks
+    Words longer than a line are split by character
+    """
+    lines = []
+    for paragraph in (text or "").splitlines() or [""]:
+        line = ""
+        for word in paragraph.split(" "):
+            candidate = f"{line} {word}" if line else word
+            if stringWidth(candidate, font_name, font_size) <= max_width:
+                line = candidate
+                continue
+            if line:
+                lines.append(line)
+            line = ""
+            for char in word:
+                if stringWidth(line + char, font_name, font_size) > max_width and line:
+                    lines.append(line)
+                    line = ""
+                line += char
+        lines.append(line)
+    return lines
+
+
+def _pdf_string(text: str) -> bytes:
+    """Literal PDF string in WinAnsi (unsupported characters become '?')"""
+    raw = text.encode("cp1252", errors="replace")
+    return b"(" + raw.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)") + b")"
+
+
+class StreamingPDFWriter:
+    """
+    Minimal PDF writer that emits each object as soon as it is complete
+    
+    Objects 1-4 (catalog, page tree, two fonts) are reserved up front; the
+    page tree and cross-reference table are written last, once all pages
+    are known. Only the page object numbers and byte offsets stay in memory.
+    """
+    
+    CATALOG, PAGES, FONT_REGULAR, FONT_BOLD = 1, 2, 3, 4
+    
+    def __init__(self):
+        self.offset = 0
+        self.offsets = {}
+        self.next_object = 5
+        self.pages: List[int] = []
+    
+    def _emit(self, data: bytes) -> bytes:
+        self.offset += len(data)
+        return data
+    
+    def _object(self, number: int, body: bytes) -> bytes:
+        self.offsets[number] = self.offset
+        return self._emit(b"%d 0 obj\n" % number + body + b"\nendobj\n")
+    
+    def begin(self) -> bytes:
+        out = self._emit(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        out += self._object(self.CATALOG, b"<< /Type /Catalog /Pages %d 0 R >>" % self.PAGES)
+        for number, (_, base_font) in ((self.FONT_REGULAR, FONT), (self.FONT_BOLD, FONT_BOLD)):
+            out += self._object(
+                number,
+                b"<< /Type /Font /Subtype /Type1 /BaseFont /%s /Encoding /WinAnsiEncoding >>" % base_font.encode()
+            )
+        return out
+    
+    def page(self, content: bytes) -> bytes:
+        """Write one page with the given content stream"""
+        content_number, page_number = self.next_object, self.next_object + 1
+        self.next_object += 2
+        self.pages.append(page_number)
+        out = self._object(
+            content_number,
+            b"<< /Length %d >>\nstream\n" % len(content) + content + b"\nendstream"
+        )
+        out += self._object(
+            page_number,
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 %d %d] "
+            b"/Resources << /Font << /%s %d 0 R /%s %d 0 R >> >> /Contents %d 0 R >>" % (
+                self.PAGES, PAGE_WIDTH, PAGE_HEIGHT,
+                FONT[0].encode(), self.FONT_REGULAR, FONT_BOLD[0].encode(), self.FONT_BOLD,
+                content_number
+            )
+        )
+        return out
+    
+    def finish(self) -> bytes:
+        kids = b" ".join(b"%d 0 R" % number for number in self.pages)
+        out = self._object(self.PAGES, b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(self.pages)))
+        xref_offset = self.offset
+        size = self.next_object
+        xref = [b"xref\n0 %d\n" % size, b"0000000000 65535 f \n"]
+        for number in range(1, size):
+            xref.append(b"%010d 00000 n \n" % self.offsets[number])
+        out += self._emit(b"".join(xref))
+        out += self._emit(
+            b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (size, self.CATALOG, xref_offset)
+        )
+        return out
+
+
+class _PageBuilder:
+    """Collects text lines for the current page as a content stream"""
+    
+    def __init__(self, top: float = MARGIN_TOP):
+        self.y = top
+        self.parts: List[bytes] = []
+    
+    def fits(self, height: float) -> bool:
+        return self.y - height >= MARGIN_BOTTOM
+    
+    def text(self, x: float, font: Tuple[str, str], size: float, text: str) -> None:
+        self.parts.append(
+            b"BT /%s %d Tf %d %d Td %s Tj ET" % (font[0].encode(), size, x, self.y, _pdf_string(text))
+        )
+    
+    def content(self) -> bytes:
+        return b"\n".join(self.parts)
+
+
+# (contact_phone, contact_name, message_text, timestamp, is_from_me) of one message
+ExportRow = Tuple[Optional[str], Optional[str], Optional[str], Optional[datetime], Optional[bool]]
+
+# Layout position carried between batches: (y of the next line, lines on the unfinished page)
+PageState = Tuple[float, List[bytes]]
+
+
+def render_batch(rows: List[ExportRow], state: PageState, whole_account: bool) -> Tuple[List[bytes], PageState]:
+    """
+    Lay out a batch of messages (runs in the CPU process pool)
+    
+    Args:
+        rows: Messages in export order, as plain tuples
+        state: Position on the page left unfinished by the previous batch
+        whole_account: Outgoing messages name their recipient
+    
+    Returns:
+        Content streams of the pages completed by this batch, and the new state
+    """
+    page = _PageBuilder()
+    page.y, page.parts = state
+    pages = []
+    for contact_phone, contact_name, message_text, timestamp, is_from_me in rows:
+        sender = "Yo" if is_from_me else (contact_name or contact_phone)
+        if is_from_me and whole_account:
+            sender = f"Yo -> {contact_name or contact_phone}"
+        stamp = timestamp.strftime("%Y-%m-%d %H:%M") if timestamp else ""
+        lines = wrap_text(message_text, FONT[1], FONT_SIZE, TEXT_WIDTH)
+        
+        # Keep the sender line with at least the first line of text
+        if not page.fits(15 + LINE_HEIGHT):
+            pages.append(page.content())
+            page = _PageBuilder()
+        page.text(MARGIN_LEFT, FONT_BOLD, FONT_SIZE, f"{sender} - {stamp}")
+        page.y -= 15
+        
+        for line in lines:
+            if not page.fits(LINE_HEIGHT):
+                pages.append(page.content())
+                page = _PageBuilder()
+            page.text(TEXT_INDENT, FONT, FONT_SIZE, line)
+            page.y -= LINE_HEIGHT
+        page.y -= MESSAGE_GAP
+    return pages, (page.y, page.parts)
+
+
+def _row_batches(export: ConversationExport) -> Iterator[List[ExportRow]]:
+    """Rows of the export in EXPORT_RENDER_BATCH_SIZE lists, read through a server-side cursor"""
+    db = WorkerSessionLocal()
+    try:
+        rows = conversation_filter(
+            db.query(
+                Message.contact_phone, Message.contact_name, Message.message_text,
+                Message.timestamp, Message.is_from_me
+            ),
+            export.user_id, export.contact_phone, export.start, export.end
+        ).order_by(
+            Message.contact_phone, Message.timestamp, Message.id
+        ).execution_options(yield_per=settings.EXPORT_FETCH_SIZE)
+        
+        batch = []
+        for row in rows:
+            batch.append(tuple(row))
+            if len(batch) >= settings.EXPORT_RENDER_BATCH_SIZE:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+    finally:
+        db.close()
+
+
+def stream_conversation_pdf(export: ConversationExport) -> Iterator[bytes]:
+    """
+    Render the conversation as PDF bytes, one page at a time
+    
+    Uses its own session: the response body is produced after the request's
+    session has been closed. Layout runs in the CPU process pool one batch at
+    a time while the next batch is fetched; this thread only assembles the
+    finished pages into the file.
+    """
+    writer = StreamingPDFWriter()
+    yield writer.begin()
+    
+    page = _PageBuilder()
+    if export.contact_phone:
+        title = f"Conversacion con {export.contact_name or export.contact_phone}"
+    else:
+        title = "Todas las conversaciones"
+    page.text(MARGIN_LEFT, FONT_BOLD, 16, title)
+    page.y -= 20
+    page.text(MARGIN_LEFT, FONT, 10, f"Total mensajes: {export.total_messages}")
+    page.y -= 15
+    page.text(MARGIN_LEFT, FONT, 10, f"Exportado: {datetime.now().strftime('%Y-%m-%d %H:%M')}")
+    if export.start or export.end:
+        page.y -= 15
+        period_start = export.start.strftime('%Y-%m-%d') if export.start else "inicio"
+        period_end = export.end.strftime('%Y-%m-%d') if export.end else "hoy"
+        page.text(MARGIN_LEFT, FONT, 10, f"Periodo: {period_start} - {period_end}")
+    page.y -= 35
+    
+    state: PageState = (page.y, page.parts)
+    whole_account = not export.contact_phone
+    pending = None
+    started = time.perf_counter()
+    # Each batch continues the previous one's page, so at most one batch per
+    # export is in the pool; fetching the next batch overlaps with rendering
+    for batch in _row_batches(export):
+        if pending:
+            pages, state = pending.result()
+            for content in pages:
+                yield writer.page(content)
+        pending = submit_cpu(render_batch, batch, state, whole_account)
+    if pending:
+        pages, state = pending.result()
+        for content in pages:
+            yield writer.page(content)
+    
+    yield writer.page(b"\n".join(state[1]))
+    yield writer.finish()
+    metrics.observe("exports.pdf_seconds", time.perf_counter() - started)
+    logger.info(
+        f"Exported {export.total_messages} messages with {export.contact_phone or 'all contacts'} "
+        f"({len(writer.pages)} pages, {writer.offset} bytes)"
+    )
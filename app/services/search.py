@@ -0,0 +1,150 @@
+"""
+Message Search Service
+Full-text (ranked, highlighted) and substring search over backed-up messages
+"""
+
+from sqlalchemy import func, or_, literal
+from sqlalchemy.orm import Session
+from app.models.message import Message
+from typing import List, Dict, Any
+from uuid import UUID
+
+SEARCH_MODES = ("fulltext", "substring", "fuzzy")
+
+# ts_headline options for result snippets
+HEADLINE_OPTIONS = "StartSel=<mark>, StopSel=</mark>, MaxFragments=2, MaxWords=20, MinWords=5, FragmentDelimiter= … "
+
+
+def _serialize(msg: Message) -> Dict[str, Any]:
+    return {
+        "id": str(msg.id),
+        "contact_name": msg.contact_name,
+        "contact_phone": msg.contact_phone,
+        "message_text": msg.message_text,
+        "timestamp": msg.timestamp.isoformat(),
+        "is_from_me": msg.is_from_me
+    }
+
+
+def fulltext_search(user_id: UUID, query: str, db: Session, limit: int = 100) -> List[Dict[str, Any]]:
+    """
+    Ranked full-text search using the GIN-indexed search_vector column
+    Accepts web-search syntax ("exact phrase", or, -excluded) in Spanish or English
+    
+    Args:
+        user_id: Owner of the messages
+        query: User search text
+        db: Database session
+        limit: Maximum results
+    
+    Returns:
+        Messages ordered by relevance, each with a highlighted `snippet`
+    """
+    spanish = func.websearch_to_tsquery("spanish", query)
+    english = func.websearch_to_tsquery("english", query)
+    tsquery = spanish.op("||")(english)
+    rank = func.ts_rank(Message.search_vector, tsquery)
+    
+    # Rank and limit first so snippets are only built for the returned rows
+    matches = db.query(Message.id, rank.label("rank")).filter(
+        Message.user_id == user_id,
+        Message.search_vector.op("@@")(tsquery)
+    ).order_by(rank.desc(), Message.timestamp.desc()).limit(limit).subquery()
+    
+    snippet = func.ts_headline("spanish", Message.message_text, tsquery, HEADLINE_OPTIONS)
+    rows = db.query(Message, matches.c.rank, snippet.label("snippet")).join(
+        matches, Message.id == matches.c.id
+    ).order_by(matches.c.rank.desc(), Message.timestamp.desc()).all()
+    
+    return [
+        {**_serialize(msg), "rank": float(msg_rank), "snippet": msg_snippet}
+        for msg, msg_rank, msg_snippet in rows
+    ]
+
+
+def substring_search(user_id: UUID, query: str, db: Session, limit: int = 100) -> List[Dict[str, Any]]:
+    """Case-insensitive substring match on the message text (newest first, sequential scan)"""
+    messages = db.query(Message).filter(
+        Message.user_id == user_id,
+        Message.message_text.ilike(f"%{query}%")
+    ).order_by(Message.timestamp.desc()).limit(limit).all()
+    
+    return [_serialize(msg) for msg in messages]
+
+
+def fuzzy_search(user_id: UUID, query: str, db: Session, limit: int = 100) -> List[Dict[str, Any]]:
+    """
+    Trigram (pg_trgm) search tolerant of typos and partial input
+    Matches partial phone numbers, misspelled contact names and words in the
+    text, all served by the *_trgm GIN indexes
+    
+    Args:
+        user_id: Owner of the messages
+        query: User search text
+        db: Database session
+        limit: Maximum results
+    
+    Returns:
+        Messages ordered by similarity, each with its `similarity` score (0-1)
+    """
+    score = func.greatest(
+        func.similarity(Message.contact_phone, query),
+        func.similarity(Message.contact_name, query),
+        func.word_similarity(query, Message.message_text)
+    )
+    messages = db.query(Message, score.label("similarity")).filter(
+        Message.user_id == user_id,
+        or_(
+            Message.contact_phone.ilike(f"%{query}%"),
+            Message.contact_name.op("%")(query),
+            literal(query).op("<%")(Message.message_text)
+        )
+    ).order_by(score.desc(), Message.timestamp.desc()).limit(limit).all()
+    
+    return [
+        {**_serialize(msg), "similarity": float(similarity)}
+        for msg, similarity in messages
+    ]
+
+
+def contact_match(query: str, fuzzy: bool = False, phone_column=None, name_column=None):
+    """
+    Filter and ranking expressions for finding contacts by phone or name
+    
+    Args:
+        query: Partial phone number or contact name
+        fuzzy: Tolerate misspelled names (trigram similarity) instead of substring only
+        phone_column: Column to match phones on (default Message.contact_phone)
+        name_column: Column to match names on (default Message.contact_name)
+    
+    Returns:
+        (condition, score) to apply to the query
+    """
+    phone_column = phone_column if phone_column is not None else Message.contact_phone
+    name_column = name_column if name_column is not None else Message.contact_name
+    pattern = f"%{query}%"
+    condition = or_(phone_column.ilike(pattern), name_column.ilike(pattern))
+    if fuzzy:
+        condition = or_(condition, name_column.op("%")(query))
+    score = func.greatest(
+        func.similarity(phone_column, query),
+        func.similarity(name_column, query)
+    )
+    return condition, score
+
+
+def search_messages(
+    user_id: UUID,
+    query: str,
+    db: Session,
+    mode: str = "fulltext",
+    limit: int = 100
+) -> List[Dict[str, Any]]:
+    """Dispatch to the search implementation for `mode` (see SEARCH_MODES)"""
+    if mode == "substring":
+        return substring_search(user_id, query, db, limit)
+    if mode == "fulltext":
+        return fulltext_search(user_id, query, db, limit)
+    if mode == "fuzzy":
+        return fuzzy_search(user_id, query, db, limit)
+    raise ValueError(f"Unknown search mode: {mode}")
@@ -0,0 +1,57 @@
+"""
+Incremental Sync Service
+Tracks the per-user, per-source high-water mark so backups only fetch new messages
+"""
+
+from typing import Optional
+from uuid import UUID
+from datetime import datetime
+from sqlalchemy.orm import Session
+from app.models.sync_state import SyncState
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def get_sync_state(user_id: UUID, source: str, db: Session) -> Optional[SyncState]:
+    """
+    Returns the sync state for a user and source, or None before the first backup
+    """
+    return db.query(SyncState).filter(
+        SyncState.user_id == user_id,
+        SyncState.source == source
+    ).first()
+
+
+def get_high_water_mark(user_id: UUID, source: str, db: Session) -> Optional[datetime]:
+    """
+    Returns the timestamp of the newest stored message for this source
+    Fetchers request only messages at or after this point
+    """
+    state = get_sync_state(user_id, source, db)
+    return state.last_message_at if state else None
+
+
+def advance_sync_state(
+    user_id: UUID,
+    source: str,
+    db: Session,
+    last_message_at: Optional[datetime],
+    last_message_id: Optional[str] = None
+) -> SyncState:
+    """
+    Move the high-water mark forward after a successful backup
+    The mark never moves backwards; the caller commits
+    """
+    state = get_sync_state(user_id, source, db)
+    if not state:
+        state = SyncState(user_id=user_id, source=source)
+        db.add(state)
+    
+    if last_message_at and (not state.last_message_at or last_message_at > state.last_message_at):
+        state.last_message_at = last_message_at
+        state.last_message_id = last_message_id
+    
+    state.updated_at = datetime.utcnow()
+    logger.info(f"Sync state for {user_id}/{source} advanced to {state.last_message_at}")
+    return state
@@ -0,0 +1,128 @@
+"""
+User Statistics Service
+Per-user dashboard counters updated in the same transaction as the backup
+writes, plus a batched recount that repairs any drift
+"""
+
+from typing import Optional
+from uuid import UUID
+from datetime import datetime
+from sqlalchemy import func, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.user import User
+from app.models.user_stats import UserStats
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def _increment(user_id: UUID, db: Session, last_backup_date: Optional[datetime] = None, **deltas) -> None:
+    """Upsert the stats row, adding `deltas` to its counters"""
+    table = UserStats.__table__
+    values = {"user_id": user_id, "updated_at": datetime.utcnow(), "last_backup_date": last_backup_date}
+    values.update(deltas)
+    stmt = pg_insert(table).values(**values)
+    set_ = {name: table.c[name] + stmt.excluded[name] for name in deltas}
+    set_["updated_at"] = stmt.excluded.updated_at
+    if last_backup_date:
+        set_["last_backup_date"] = func.greatest(table.c.last_backup_date, stmt.excluded.last_backup_date)
+    db.execute(stmt.on_conflict_do_update(index_elements=[table.c.user_id], set_=set_))
+
+
+def record_ingested(user_id: UUID, messages: int, new_contacts: int, bytes_stored: int, db: Session) -> None:
+    """
+    Count a batch of newly inserted messages
+    Called by the ingestor inside the batch transaction; the caller commits
+    """
+    if messages or new_contacts:
+        _increment(
+            user_id, db,
+            total_messages=messages,
+            total_contacts=new_contacts,
+            bytes_stored=bytes_stored
+        )
+
+
+def record_backup_started(user_id: UUID, backup_date: datetime, db: Session) -> None:
+    """Count a new backup record; the caller commits"""
+    _increment(user_id, db, last_backup_date=backup_date, total_backups=1)
+
+
+def get_user_stats(user_id: UUID, db: Session) -> Optional[UserStats]:
+    """Primary-key lookup of the user's stats row (None before the first backup)"""
+    return db.get(UserStats, user_id)
+
+
+RECOUNT_SQL = """
+INSERT INTO user_stats (
+    user_id, total_backups, total_messages, total_contacts, bytes_stored,
+    last_backup_date, updated_at, reconciled_at
+)
+SELECT
+    u.id,
+    coalesce(b.total_backups, 0),
+    coalesce(m.total_messages, 0),
+    coalesce(c.total_contacts, 0),
+    coalesce(m.bytes_stored, 0),
+    b.last_backup_date,
+    now(),
+    now()
+FROM users u
+LEFT JOIN (
+    SELECT user_id, count(*) AS total_backups, max(backup_date) AS last_backup_date
+    FROM backups WHERE user_id = ANY(CAST(:user_ids AS uuid[])) GROUP BY user_id
+) b ON b.user_id = u.id
+LEFT JOIN (
+    SELECT user_id, count(*) AS total_messages,
+           sum(coalesce(octet_length(message_text), 0)) AS bytes_stored
+    FROM messages WHERE user_id = ANY(CAST(:user_ids AS uuid[])) GROUP BY user_id
+) m ON m.user_id = u.id
+LEFT JOIN (
+    SELECT user_id, count(*) AS total_contacts
+    FROM contact_summaries WHERE user_id = ANY(CAST(:user_ids AS uuid[])) GROUP BY user_id
+) c ON c.user_id = u.id
+WHERE u.id = ANY(CAST(:user_ids AS uuid[]))
+ON CONFLICT (user_id) DO UPDATE SET
+    total_backups = excluded.total_backups,
+    total_messages = excluded.total_messages,
+    total_contacts = excluded.total_contacts,
+    bytes_stored = excluded.bytes_stored,
+    last_backup_date = excluded.last_backup_date,
+    updated_at = excluded.updated_at,
+    reconciled_at = excluded.reconciled_at
+"""
+
+
+def reconcile_user_stats(db: Session, batch_size: Optional[int] = None) -> int:
+    """
+    Recount every user's stats from the source tables, one batch of users per transaction
+    Short transactions keep row locks brief for backups running meanwhile
+    
+    Args:
+        db: Database session
+        batch_size: Users per batch (default STATS_RECONCILE_BATCH_SIZE)
+    
+    Returns:
+        Number of users reconciled
+    """
+    batch_size = batch_size or settings.STATS_RECONCILE_BATCH_SIZE
+    last_id = None
+    total = 0
+    
+    while True:
+        query = db.query(User.id).order_by(User.id)
+        if last_id is not None:
+            query = query.filter(User.id > last_id)
+        user_ids = [row.id for row in query.limit(batch_size).all()]
+        if not user_ids:
+            break
+        
+        db.execute(text(RECOUNT_SQL), {"user_ids": [str(user_id) for user_id in user_ids]})
+        db.commit()
+        total += len(user_ids)
+        last_id = user_ids[-1]
+    
+    logger.info(f"User stats reconciled for {total} users")
+    return total
@@ -3,14 +3,21 @@ WhatsBackup Core Service
 Specialized in fetching, storing, and managing WhatsApp Business conversation backups
 """
 
-import httpx
+from app.integrations.graph_client import GraphAPIClient
 from datetime import datetime, timedelta
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.models.message import Message
 from app.models.backup import Backup
 from app.models.user import User
-from typing import List, Dict, Any
+from app.services.ingestion import MessageIngestor, MessagePage, ingest_pages, normalize_api_message
+from app.services.sync_state import get_high_water_mark
+from app.core.executors import to_thread_shielded
+from app.services.checkpoints import start_backup, complete_backup, fail_backup, checkpoint_writer
+from app.services import search
+from app.services.pdf_export import prepare_conversation_export, stream_conversation_pdf
+from typing import List, Dict, Any, Optional, AsyncIterator, Iterator
 import asyncio
+import time
 
 class WhatsAppBackupService:
     """
@@ -22,36 +29,63 @@ class WhatsAppBackupService:
         self.api_url = "https://graph.facebook.com/v18.0"
         self.phone_id = phone_number_id
         self.token = access_token
+        self.client = GraphAPIClient(access_token)
     
-    async def fetch_conversation_history(self, days_back: int = 30) -> List[Dict[str, Any]]:
+    async def iter_conversation_pages(
+        self,
+        days_back: int = 30,
+        since: Optional[datetime] = None,
+        after: Optional[str] = None
+    ) -> AsyncIterator[MessagePage]:
         """
-        Fetch complete message history from WhatsApp Business API
+        Stream message history from WhatsApp Business API one page at a time
         Uses pagination to get ALL messages, not just recent ones
+        When `since` is given, stops paging once already-stored messages are reached
+        When `after` is given, resumes paging from that checkpoint cursor
         """
         url = f"{self.api_url}/{self.phone_id}/messages"
-        headers = {"Authorization": f"Bearer {self.token}"}
         
-        all_messages = []
-        params = {"limit": 100}  # Max per request
+        if since:
+            cutoff = int(since.timestamp())
+        else:
+            cutoff = int(time.time()) - days_back * 24 * 60 * 60
         
-        async with httpx.AsyncClient() as client:
-            while True:
-                try:
-                    response = await client.get(url, headers=headers, params=params)
-                    data = response.json()
-                    
-                    if "data" in data:
-                        all_messages.extend(data["data"])
-                    
-                    # Check for next page
-                    if "paging" in data and "next" in data["paging"]:
-                        params["after"] = data["paging"]["cursors"]["after"]
-                    else:
-                        break
-                except Exception as e:
-                    print(f"Error fetching messages: {e}")
-                    break
+        params = {"limit": 100, "since": cutoff}  # Max per request
+        if after:
+            params["after"] = after
         
+        while True:
+            # Retries throttling/transient errors, raises on anything else
+            response = await self.client.get(url, params=params)
+            data = response.json()
+            
+            messages = data.get("data", [])
+            newer = [m for m in messages if int(m.get("timestamp", 0)) >= cutoff]
+            after = data.get("paging", {}).get("cursors", {}).get("after")
+            if newer:
+                yield MessagePage(newer, after)
+            
+            # Reached messages from a previous backup
+            if len(newer) < len(messages):
+                break
+            
+            # Check for next page
+            if "paging" in data and "next" in data["paging"]:
+                params["after"] = after
+            else:
+                break
+    
+    async def fetch_conversation_history(
+        self,
+        days_back: int = 30,
+        since: Optional[datetime] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Fetch message history into a list (see iter_conversation_pages)
+        """
+        all_messages = []
+        async for page in self.iter_conversation_pages(days_back=days_back, since=since):
+            all_messages.extend(page.messages)
         return all_messages
     
     async def create_backup(self, user_id: int, db: Session) -> Dict[str, Any]:
@@ -59,7 +93,8 @@ class WhatsAppBackupService:
         Create complete backup of WhatsApp conversations
         CORE FEATURE - This is what customers pay for
         """
-        user = db.query(User).filter(User.id == user_id).first()
+        # Blocking DB work runs in a thread so the event loop keeps serving other jobs
+        user = await to_thread_shielded(db.get, User, user_id)
         
         if not user:
             raise ValueError("User not found")
@@ -67,59 +102,46 @@ class WhatsAppBackupService:
         if not user.whatsapp_phone_id or not user.whatsapp_access_token:
             raise ValueError("User doesn't have WhatsApp connected")
         
-        # Fetch messages from WhatsApp
-        messages_data = await self.fetch_conversation_history(days_back=90)
-        
-        # Create backup record
-        backup = Backup(
-            user_id=user_id,
-            backup_date=datetime.utcnow(),
-            status="in_progress"
-        )
-        db.add(backup)
-        db.commit()
-        db.refresh(backup)
-        
-        # Save messages to database (PERSISTENT BACKUP)
-        saved_count = 0
-        contacts = set()
-        
-        for msg_data in messages_data:
-            try:
-                # Extract message details from WhatsApp payload
-                from_data = msg_data.get("from", {})
-                contact_phone = from_data if isinstance(from_data, str) else from_data.get("phone", "")
-                
-                message = Message(
-                    user_id=user_id,
-                    backup_id=backup.id,
-                    whatsapp_message_id=msg_data.get("id"),
-                    contact_name=msg_data.get("profile", {}).get("name", "Unknown"),
-                    contact_phone=contact_phone,
-                    message_text=msg_data.get("text", {}).get("body", ""),
-                    message_type=msg_data.get("type", "text"),
-                    timestamp=datetime.fromtimestamp(int(msg_data.get("timestamp", 0))),
-                    is_from_me=contact_phone == user.phone_number
-                )
-                db.add(message)
-                saved_count += 1
-                contacts.add(contact_phone)
-            except Exception as e:
-                print(f"Error saving message: {e}")
-                continue
-        
-        # Mark backup as completed
-        backup.status = "completed"
-        backup.total_messages = saved_count
-        backup.total_contacts = len(contacts)
-        db.commit()
+        owner_phone = user.phone_number
+        
+        # Resume a failed/interrupted backup from its checkpoint, or start a new one
+        backup, resume_from = await to_thread_shielded(start_backup, user_id, "api", db)
+        backup_id, backup_date = backup.id, backup.backup_date
+        
+        try:
+            # Save messages to database (PERSISTENT BACKUP)
+            # Pages newer than the last backup are written as they arrive;
+            # upserts skip anything a previous backup already stored.
+            # Every batch commits and checkpoints the cursor of the last complete page.
+            since = await to_thread_shielded(get_high_water_mark, user_id, "api", db)
+            ingestor = MessageIngestor(
+                db, user_id, backup_id, source="api",
+                checkpoint=checkpoint_writer(backup, db)
+            )
+            
+            stats = await ingest_pages(
+                self.iter_conversation_pages(days_back=90, since=since, after=resume_from),
+                ingestor,
+                lambda msg_data: normalize_api_message(msg_data, owner_phone)
+            )
+            
+            # Mark backup as completed and move the high-water mark forward
+            saved_count, total_contacts = await to_thread_shielded(
+                complete_backup, backup, ingestor, db
+            )
+        except (Exception, asyncio.CancelledError) as e:
+            # Also on timeout/shutdown; committed batches stay checkpointed for the next run
+            await to_thread_shielded(fail_backup, backup, str(e) or "Interrupted", db)
+            raise
         
         return {
-            "backup_id": str(backup.id),
+            "backup_id": str(backup_id),
             "total_messages": saved_count,
-            "total_contacts": len(contacts),
+            "skipped_messages": stats["skipped"],
+            "updated_messages": stats["updated"],
+            "total_contacts": total_contacts,
             "status": "completed",
-            "backup_date": backup.backup_date.isoformat()
+            "backup_date": backup_date.isoformat()
         }
     
     def get_backup_history(self, user_id: int, db: Session) -> List[Dict[str, Any]]:
@@ -139,75 +161,52 @@ class WhatsAppBackupService:
             for backup in backups
         ]
     
-    def search_messages(self, user_id: int, query: str, db: Session) -> List[Dict[str, Any]]:
+    async def get_backup_history_async(self, user_id: int, db: AsyncSession) -> List[Dict[str, Any]]:
+        """get_backup_history on an AsyncSession (for `async def` endpoints)"""
+        return await db.run_sync(lambda session: self.get_backup_history(user_id, session))
+    
+    def search_messages(
+        self,
+        user_id: int,
+        query: str,
+        db: Session,
+        mode: str = "fulltext",
+        limit: int = 100
+    ) -> List[Dict[str, Any]]:
         """
         Search through backed-up messages
         VALUE: "Find any conversation from months ago in seconds"
+        Full-text (ranked, with highlighted snippets) by default, or substring ILIKE
         """
-        messages = db.query(Message).filter(
-            Message.user_id == user_id,
-            Message.message_text.ilike(f"%{query}%")
-        ).order_by(Message.timestamp.desc()).limit(100).all()
-        
-        return [
-            {
-                "id": str(msg.id),
-                "contact_name": msg.contact_name,
-                "contact_phone": msg.contact_phone,
-                "message_text": msg.message_text,
-                "timestamp": msg.timestamp.isoformat(),
-                "is_from_me": msg.is_from_me
-            }
-            for msg in messages
-        ]
+        return search.search_messages(user_id, query, db, mode=mode, limit=limit)
     
-    def export_conversation_pdf(self, user_id: int, contact_phone: str, db: Session):
+    async def search_messages_async(
+        self,
+        user_id: int,
+        query: str,
+        db: AsyncSession,
+        mode: str = "fulltext",
+        limit: int = 100
+    ) -> List[Dict[str, Any]]:
+        """search_messages on an AsyncSession (for `async def` endpoints)"""
+        return await db.run_sync(
+            lambda session: search.search_messages(user_id, query, session, mode=mode, limit=limit)
+        )
+    
+    def export_conversation_pdf(
+        self,
+        user_id: int,
+        contact_phone: str,
+        db: Session,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None
+    ) -> Iterator[bytes]:
         """
         Export complete conversation to PDF
         VALUE: "Legal documentation, audits, accounting records"
-        """
-        from reportlab.lib.pagesizes import letter
-        from reportlab.pdfgen import canvas
-        from io import BytesIO
-        
-        messages = db.query(Message).filter(
-            Message.user_id == user_id,
-            Message.contact_phone == contact_phone
-        ).order_by(Message.timestamp).all()
         
-        if not messages:
-            raise ValueError("No messages found for this contact")
-        
-        buffer = BytesIO()
-        pdf = canvas.Canvas(buffer, pagesize=letter)
-        
-        # Header
-        pdf.setFont("Helvetica-Bold", 16)
-        pdf.drawString(50, 750, f"Conversacion con {messages[0].contact_name}")
-        pdf.setFont("Helvetica", 10)
-        pdf.drawString(50, 730, f"Total mensajes: {len(messages)}")
-        pdf.drawString(50, 715, f"Exportado: {datetime.now().strftime('%Y-%m-%d %H:%M')}")
-        
-        # Messages
-        y_position = 680
-        for msg in messages:
-            if y_position < 50:
-                pdf.showPage()
-                y_position = 750
-            
-            sender = "Yo" if msg.is_from_me else msg.contact_name
-            timestamp = msg.timestamp.strftime("%Y-%m-%d %H:%M")
-            
-            pdf.setFont("Helvetica-Bold", 9)
-            pdf.drawString(50, y_position, f"{sender} - {timestamp}")
-            y_position -= 15
-            
-            pdf.setFont("Helvetica", 9)
-            # Word wrap for long messages
-            text = msg.message_text[:200] + "..." if len(msg.message_text) > 200 else msg.message_text
-            pdf.drawString(70, y_position, text)
-            y_position -= 25
-        
-        pdf.save()
-        buffer.seek(0)
-        return buffer
+        Checks the conversation up front (ValueError if empty), then returns
+        an iterator that streams the PDF page by page (see app/services/pdf_export.py)
+        """
+        export = prepare_conversation_export(user_id, contact_phone, db, start=start, end=end)
+        return stream_conversation_pdf(export)
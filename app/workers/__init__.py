@@ -0,0 +1,7 @@
+"""
+Background job workers
+"""
+
+from .job_worker import JobWorker, JOB_HANDLERS
+
+__all__ = ['JobWorker', 'JOB_HANDLERS']
@@ -0,0 +1,29 @@
+"""
+Standalone job worker process
+
+    python -m app.workers
+
+Runs queued jobs (backups) outside the API. Start as many as needed; jobs are
+claimed with SKIP LOCKED so each one runs once. This is how jobs run in
+production; RUN_JOB_WORKER=true embeds a worker in the API for development only.
+"""
+
+import asyncio
+import logging
+from app.core.executors import shutdown_process_pool
+from app.db.session import worker_engine, Base
+from app.workers.job_worker import JobWorker
+
+logging.basicConfig(level=logging.INFO)
+
+
+async def main():
+    Base.metadata.create_all(bind=worker_engine)
+    try:
+        await JobWorker().run()
+    finally:
+        shutdown_process_pool()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,237 @@
+"""
+Job Worker
+Claims jobs from the Postgres queue and runs them with bounded concurrency,
+one DB session per job, heartbeating so crashed workers' jobs are picked up again
+"""
+
+import asyncio
+import os
+import socket
+import time
+import uuid
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.executors import to_thread_shielded
+from app.core.metrics import metrics
+from app.db.session import WorkerSessionLocal
+from app.models.backup import Backup
+from app.models.user import User
+from app.services.job_queue import (
+    claim_job, heartbeat_job, complete_job, fail_job, requeue_stale_jobs
+)
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Backup throughput (users/min, msg/s) is reported over this trailing window
+THROUGHPUT_WINDOW_SECONDS = 15 * 60
+
+JobHandler = Callable[[uuid.UUID, Dict[str, Any], Session], Awaitable[Dict[str, Any]]]
+
+
+async def run_backup_job(user_id: uuid.UUID, payload: Dict[str, Any], db: Session) -> Dict[str, Any]:
+    """
+    Run one backup job; payload['service'] selects the integration
+    (whatsapp_api, whatsapp_backup or baileys)
+    Blocking DB calls go through asyncio.to_thread so one backup never stalls the others
+    """
+    service = payload.get("service", "whatsapp_api")
+    
+    if service == "baileys":
+        from app.integrations.whatsapp_baileys import BaileysService
+        from app.services.plans import increment_message_count
+        result = await BaileysService().create_backup(user_id, db)
+        await to_thread_shielded(increment_message_count, user_id, result['total_messages'], db)
+        return result
+    
+    user = await to_thread_shielded(db.get, User, user_id)
+    if not user or not user.whatsapp_phone_id or not user.whatsapp_access_token:
+        raise ValueError("User doesn't have WhatsApp connected")
+    
+    if service == "whatsapp_backup":
+        from app.services.whatsapp_backup import WhatsAppBackupService
+        backup_service = WhatsAppBackupService(user.whatsapp_phone_id, user.whatsapp_access_token)
+        return await backup_service.create_backup(user_id, db)
+    
+    from app.integrations.whatsapp_api import WhatsAppAPIService
+    api_service = WhatsAppAPIService(user.whatsapp_phone_id, user.whatsapp_access_token)
+    return await api_service.create_backup(user_id, db)
+
+
+def _build_export(user_id: uuid.UUID, payload: Dict[str, Any]) -> Dict[str, Any]:
+    from app.services.exports import build_export, serialize_artifact
+    db = WorkerSessionLocal()
+    try:
+        return serialize_artifact(build_export(user_id, payload, db))
+    finally:
+        db.close()
+
+
+async def run_export_job(user_id: uuid.UUID, payload: Dict[str, Any], db: Session) -> Dict[str, Any]:
+    """
+    Build (or reuse) an export file; payload has format, contact_phone, start and end
+    Rendering is blocking work, so it runs in a thread with its own session
+    """
+    return await asyncio.to_thread(_build_export, user_id, payload)
+
+
+JOB_HANDLERS: Dict[str, JobHandler] = {
+    "backup": run_backup_job,
+    "export": run_export_job,
+}
+
+
+def backup_progress(user_id: uuid.UUID, db: Session) -> Optional[Dict[str, Any]]:
+    """Checkpointed progress of the user's running backup, if any"""
+    backup = db.query(Backup).filter(
+        Backup.user_id == user_id,
+        Backup.status == "in_progress"
+    ).order_by(Backup.backup_date.desc()).first()
+    if not backup:
+        return None
+    return {"backup_id": str(backup.id), "committed_messages": backup.committed_messages or 0}
+
+
+class JobWorker:
+    """
+    Runs up to `concurrency` jobs at a time from the queue
+    Any number of workers (processes or the embedded API worker) can run side by side
+    """
+    
+    def __init__(self, concurrency: Optional[int] = None, worker_id: Optional[str] = None):
+        self.concurrency = concurrency or settings.JOB_WORKER_CONCURRENCY
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self.running = 0
+        self.started_at = time.monotonic()
+        self._finished_backups: deque = deque()  # (finished_at, messages) inside the window
+    
+    def _record_backup(self, service: str, result: Optional[Dict[str, Any]]) -> None:
+        """Count a finished backup (result is None when it failed) and report throughput"""
+        messages = (result or {}).get("total_messages", 0)
+        metrics.incr(f"backups.{service}.succeeded" if result is not None else f"backups.{service}.failed")
+        metrics.incr(f"backups.{service}.messages", messages)
+        
+        now = time.monotonic()
+        self._finished_backups.append((now, messages))
+        while self._finished_backups[0][0] < now - THROUGHPUT_WINDOW_SECONDS:
+            self._finished_backups.popleft()
+        
+        elapsed = max(min(now - self.started_at, THROUGHPUT_WINDOW_SECONDS), 1.0)
+        metrics.set("backups.users_per_minute", round(len(self._finished_backups) / elapsed * 60, 2))
+        metrics.set(
+            "backups.messages_per_second",
+            round(sum(m for _, m in self._finished_backups) / elapsed, 2)
+        )
+    
+    def _claim(self) -> Optional[Tuple[uuid.UUID, str, uuid.UUID, Dict[str, Any]]]:
+        db = WorkerSessionLocal()
+        try:
+            job = claim_job(self.worker_id, db, kinds=list(JOB_HANDLERS))
+            if not job:
+                return None
+            return job.id, job.kind, job.user_id, job.payload or {}
+        finally:
+            db.close()
+    
+    @staticmethod
+    def _with_session(fn, *args, **kwargs):
+        db = WorkerSessionLocal()
+        try:
+            return fn(*args, db=db, **kwargs)
+        finally:
+            db.close()
+    
+    def _heartbeat(self, job_id: uuid.UUID, user_id: uuid.UUID, kind: str) -> None:
+        db = WorkerSessionLocal()
+        try:
+            progress = backup_progress(user_id, db) if kind == "backup" else None
+            heartbeat_job(job_id, db, progress=progress)
+        finally:
+            db.close()
+    
+    async def _heartbeat_loop(self, job_id: uuid.UUID, user_id: uuid.UUID, kind: str) -> None:
+        while True:
+            await asyncio.sleep(settings.JOB_HEARTBEAT_SECONDS)
+            try:
+                await asyncio.to_thread(self._heartbeat, job_id, user_id, kind)
+            except Exception as e:
+                logger.error(f"Heartbeat failed for job {job_id}: {e}")
+    
+    async def _execute(self, job_id: uuid.UUID, kind: str, user_id: uuid.UUID, payload: Dict[str, Any]) -> None:
+        handler = JOB_HANDLERS[kind]
+        heartbeat = asyncio.create_task(self._heartbeat_loop(job_id, user_id, kind))
+        db = WorkerSessionLocal()
+        start = time.perf_counter()
+        self.running += 1
+        metrics.set("jobs.running", self.running)
+        result = None
+        try:
+            # On timeout the handler is cancelled and wait_for returns only once it
+            # has unwound: its in-flight write finished and the backup is marked failed
+            # with its checkpoint kept, so the retry resumes it and db can be closed
+            result = await asyncio.wait_for(
+                handler(user_id, payload, db), timeout=settings.BACKUP_JOB_TIMEOUT_SECONDS
+            )
+            await to_thread_shielded(self._with_session, complete_job, job_id, result)
+            metrics.incr(f"jobs.{kind}.completed")
+            logger.info(f"✅ Job {job_id} ({kind}) completed in {time.perf_counter() - start:.1f}s")
+        except asyncio.TimeoutError:
+            result = None
+            await to_thread_shielded(self._with_session, fail_job, job_id, "Timed out")
+            metrics.incr(f"jobs.{kind}.failed")
+        except asyncio.CancelledError:
+            # Worker shutting down; re-queue now instead of waiting for the reaper
+            result = None
+            await to_thread_shielded(self._with_session, fail_job, job_id, "Worker stopped")
+            metrics.incr(f"jobs.{kind}.failed")
+            raise
+        except Exception as e:
+            result = None
+            # Configuration problems (ValueError) won't fix themselves on retry
+            await to_thread_shielded(
+                self._with_session, fail_job, job_id, str(e), retry=not isinstance(e, ValueError)
+            )
+            metrics.incr(f"jobs.{kind}.failed")
+        finally:
+            heartbeat.cancel()
+            db.close()
+            self.running -= 1
+            metrics.set("jobs.running", self.running)
+            metrics.observe(f"jobs.{kind}.seconds", time.perf_counter() - start)
+            if kind == "backup":
+                self._record_backup(payload.get("service", "whatsapp_api"), result)
+    
+    async def _slot(self) -> None:
+        while True:
+            try:
+                claimed = await asyncio.to_thread(self._claim)
+            except Exception as e:
+                logger.error(f"Job claim error: {e}")
+                claimed = None
+            
+            if not claimed:
+                await asyncio.sleep(settings.JOB_POLL_SECONDS)
+                continue
+            
+            await self._execute(*claimed)
+    
+    async def _reaper(self) -> None:
+        """Re-queue jobs whose worker stopped heartbeating"""
+        while True:
+            try:
+                await asyncio.to_thread(self._with_session, requeue_stale_jobs)
+            except Exception as e:
+                logger.error(f"Stale job check failed: {e}")
+            await asyncio.sleep(settings.JOB_LOCK_TIMEOUT_SECONDS)
+    
+    async def run(self) -> None:
+        logger.info(f"🚀 Job worker {self.worker_id} started ({self.concurrency} slots)")
+        tasks = [asyncio.create_task(self._slot()) for _ in range(self.concurrency)]
+        tasks.append(asyncio.create_task(self._reaper()))
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
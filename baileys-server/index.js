@@ -140,7 +140,7 @@ app.get('/status/:session_id', (req, res) => {
  * Fetch messages from a session
  */
 app.post('/fetch-messages', async (req, res) => {
-    const { session_id, days_back = 30 } = req.body;
+    const { session_id, days_back = 30, since } = req.body;
 
     if (!session_id) {
         return res.status(400).json({ error: 'session_id is required' });
@@ -169,12 +169,16 @@ app.post('/fetch-messages', async (req, res) => {
             }
         }
 
-        console.log(`[Fetch] Found ${messages.length} total messages`);
+        // Only messages at or after the caller's high-water mark (or inside the window)
+        const cutoff = since ?? Math.floor(Date.now() / 1000) - days_back * 24 * 60 * 60;
+        const recent = messages.filter(msg => Number(msg.messageTimestamp) >= cutoff);
+
+        console.log(`[Fetch] Found ${messages.length} total messages, ${recent.length} since ${cutoff}`);
 
         res.json({
             session_id,
-            total_messages: messages.length,
-            messages: messages.map(msg => ({
+            total_messages: recent.length,
+            messages: recent.map(msg => ({
                 id: msg.key?.id,
                 from: msg.key?.remoteJid,
                 text: msg.message?.conversation || msg.message?.extendedTextMessage?.text || '',